@@ -6,18 +6,23 @@ Identifica problemas de calidad en los datos originales
 """
 
 import pandas as pd
+import argparse
 import json
 import sys
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from esquema_datos import cargar_dataset
+from metricas_ejecucion import medir_exploracion, registrar_etapa
+from perfilado import contar_defectos, perfilar_fechas
+
+COLUMNAS_FECHA = {'fecha_nacimiento', 'fecha_cita'}
 
 def cargar_datos():
     """Carga los datos desde el archivo JSON"""
     try:
-        with open('../datos/dataset_hospital.json', 'r', encoding='utf-8') as file:
-            datos = json.load(file)
-        
-        df_pacientes = pd.DataFrame(datos['pacientes'])
-        df_citas = pd.DataFrame(datos['citas_medicas'])
+        df_pacientes, df_citas = cargar_dataset('../datos/dataset_hospital.json')
         
         print("Datos cargados exitosamente:")
         print(f"  - Pacientes: {len(df_pacientes):,} registros")
@@ -32,8 +37,67 @@ def cargar_datos():
         print(f"ERROR al cargar datos: {e}")
         sys.exit(1)
 
-def analizar_pacientes(df):
+def perfilar_columna(serie):
+    """Faltantes, frecuencias y clasificación de formato de una columna
+    
+    En las columnas de fechas se conserva el perfil completo de
+    perfilar_fechas para contar los defectos sin volver a descomponerlas.
+    """
+    perfil = {
+        'faltantes': int(serie.isna().sum()),
+        'frecuencias': serie.value_counts(dropna=False)
+    }
+    if serie.name in COLUMNAS_FECHA:
+        perfil['fechas'] = perfilar_fechas(serie)
+        perfil['formatos'] = perfil['fechas']['formato'].value_counts(dropna=False)
+    return perfil
+
+def es_columna_texto(serie):
+    """Columnas de texto libre (no categóricas), las más costosas de perfilar"""
+    return pd.api.types.is_string_dtype(serie) and not isinstance(serie.dtype, pd.CategoricalDtype)
+
+def perfilar_tablas(tablas, hilos=None, procesos=False):
+    """Perfila en paralelo todas las columnas de varias tablas
+    
+    tablas es un dict {nombre: DataFrame}. Cada columna es una tarea del
+    pool de hilos (las reducciones de pandas liberan el GIL); con
+    procesos=True las columnas de texto van a un pool de procesos. Todas
+    las tablas comparten los pools, así que se perfilan a la vez.
+    """
+    with ThreadPoolExecutor(max_workers=hilos) as pool_hilos, \
+            (ProcessPoolExecutor() if procesos else nullcontext()) as pool_procesos:
+        futuros = {}
+        for nombre, df in tablas.items():
+            for columna in df.columns:
+                serie = df[columna]
+                pool = pool_procesos if pool_procesos and es_columna_texto(serie) else pool_hilos
+                futuros[nombre, columna] = pool.submit(perfilar_columna, serie)
+        
+        perfiles = {nombre: {} for nombre in tablas}
+        for (nombre, columna), futuro in futuros.items():
+            perfiles[nombre][columna] = futuro.result()
+    return perfiles
+
+def imprimir_faltantes(df, perfil):
+    """Imprime faltantes por columna a partir del perfil"""
+    print("\nValores faltantes por columna:")
+    for columna in df.columns:
+        cantidad = perfil[columna]['faltantes']
+        porcentaje = (cantidad / len(df)) * 100
+        print(f"  {columna}: {cantidad} ({porcentaje:.1f}%)")
+
+def imprimir_formatos(perfil, columna):
+    """Imprime la clasificación de formatos de una columna de fechas"""
+    print(f"\nFormatos de {columna}:")
+    formatos = perfil[columna]['formatos']
+    for formato, cantidad in formatos[formatos > 0].items():
+        print(f"  {'nulo/no reconocido' if pd.isna(formato) else formato}: {cantidad}")
+
+def analizar_pacientes(df, perfil=None):
     """Analiza la tabla de pacientes"""
+    if perfil is None:
+        perfil = perfilar_tablas({'pacientes': df})['pacientes']
+    
     print("\n" + "="*60)
     print("ANÁLISIS DE LA TABLA PACIENTES")
     print("="*60)
@@ -44,22 +108,23 @@ def analizar_pacientes(df):
     print("\nPrimeras 3 filas:")
     print(df.head(3).to_string())
     
-    print("\nValores faltantes por columna:")
-    faltantes = df.isnull().sum()
-    for columna, cantidad in faltantes.items():
-        porcentaje = (cantidad / len(df)) * 100
-        print(f"  {columna}: {cantidad} ({porcentaje:.1f}%)")
+    imprimir_faltantes(df, perfil)
     
     print("\nProblemas identificados en sexo:")
-    print(df['sexo'].value_counts(dropna=False))
+    print(perfil['sexo']['frecuencias'])
     
     print("\nEjemplos de fechas de nacimiento:")
     fechas_muestra = df['fecha_nacimiento'].dropna().head(10).tolist()
     for i, fecha in enumerate(fechas_muestra, 1):
         print(f"  {i}. {fecha}")
+    
+    imprimir_formatos(perfil, 'fecha_nacimiento')
 
-def analizar_citas(df):
+def analizar_citas(df, perfil=None):
     """Analiza la tabla de citas médicas"""
+    if perfil is None:
+        perfil = perfilar_tablas({'citas': df})['citas']
+    
     print("\n" + "="*60)
     print("ANÁLISIS DE LA TABLA CITAS MÉDICAS")
     print("="*60)
@@ -70,21 +135,19 @@ def analizar_citas(df):
     print("\nPrimeras 3 filas:")
     print(df.head(3).to_string())
     
-    print("\nValores faltantes por columna:")
-    faltantes = df.isnull().sum()
-    for columna, cantidad in faltantes.items():
-        porcentaje = (cantidad / len(df)) * 100
-        print(f"  {columna}: {cantidad} ({porcentaje:.1f}%)")
+    imprimir_faltantes(df, perfil)
     
     print("\nEstados de cita únicos:")
-    print(df['estado_cita'].value_counts(dropna=False))
+    print(perfil['estado_cita']['frecuencias'])
     
     print("\nEjemplos de fechas de cita:")
     fechas_muestra = df['fecha_cita'].dropna().head(10).tolist()
     for i, fecha in enumerate(fechas_muestra, 1):
         print(f"  {i}. {fecha}")
+    
+    imprimir_formatos(perfil, 'fecha_cita')
 
-def identificar_problemas(df_pacientes, df_citas):
+def identificar_problemas(df_pacientes, df_citas, defectos=None):
     """Identifica problemas específicos de calidad"""
     print("\n" + "="*60)
     print("PROBLEMAS DE CALIDAD IDENTIFICADOS")
@@ -92,41 +155,34 @@ def identificar_problemas(df_pacientes, df_citas):
     
     problemas = []
     
+    if defectos is None:
+        defectos = contar_defectos(df_pacientes, df_citas)
+    
     # Problema 1: Inconsistencias en sexo
-    sexo_invalidos = df_pacientes[~df_pacientes['sexo'].isin(['M', 'F'])]['sexo'].count()
+    sexo_invalidos = defectos['sexo_inconsistente']
     if sexo_invalidos > 0:
         problemas.append(f"Valores de sexo inconsistentes: {sexo_invalidos} casos")
     
     # Problema 2: Fechas con formato español
-    fechas_espanol = 0
-    for fecha in df_pacientes['fecha_nacimiento'].dropna():
-        if isinstance(fecha, str) and 'de' in fecha:
-            fechas_espanol += 1
-    
+    fechas_espanol = defectos['fechas_nacimiento_español']
     if fechas_espanol > 0:
         problemas.append(f"Fechas de nacimiento en formato español: {fechas_espanol} casos")
     
     # Problema 3: Fechas de citas inválidas
-    fechas_invalidas = 0
-    for fecha in df_citas['fecha_cita'].dropna():
-        if isinstance(fecha, str):
-            try:
-                partes = fecha.split('-')
-                if len(partes) == 3:
-                    año, mes, dia = int(partes[0]), int(partes[1]), int(partes[2])
-                    if mes > 12 or dia > 31 or mes < 1 or dia < 1:
-                        fechas_invalidas += 1
-            except:
-                fechas_invalidas += 1
-    
+    fechas_invalidas = defectos['fechas_cita_invalidas']
     if fechas_invalidas > 0:
         problemas.append(f"Fechas de citas inválidas: {fechas_invalidas} casos")
     
     # Problema 4: Estados faltantes
-    estados_faltantes = df_citas['estado_cita'].isnull().sum()
+    estados_faltantes = defectos['estados_cita_faltantes']
     if estados_faltantes > 0:
         problemas.append(f"Estados de cita faltantes: {estados_faltantes} casos")
     
+    # Problema 5: Estados fuera del catálogo
+    estados_no_reconocidos = defectos['estados_cita_no_reconocidos']
+    if estados_no_reconocidos > 0:
+        problemas.append(f"Estados de cita no reconocidos: {estados_no_reconocidos} casos")
+    
     print("Resumen de problemas encontrados:")
     for i, problema in enumerate(problemas, 1):
         print(f"  {i}. {problema}")
@@ -134,18 +190,38 @@ def identificar_problemas(df_pacientes, df_citas):
     return problemas
 
 def main():
+    parser = argparse.ArgumentParser(description="Análisis exploratorio de datos hospitalarios")
+    parser.add_argument('--hilos', type=int, default=None,
+                        help="Hilos para perfilar columnas (por defecto, según los núcleos)")
+    parser.add_argument('--procesos', action='store_true',
+                        help="Perfila las columnas de texto en un pool de procesos")
+    args = parser.parse_args()
+    
     print("ANÁLISIS EXPLORATORIO DE DATOS HOSPITALARIOS")
     print("=" * 80)
     
     # Cargar datos
     df_pacientes, df_citas = cargar_datos()
     
+    # Perfilar ambas tablas a la vez, una tarea por columna
+    inicio = time.perf_counter()
+    perfiles = perfilar_tablas({'pacientes': df_pacientes, 'citas': df_citas},
+                               hilos=args.hilos, procesos=args.procesos)
+    print(f"\nPerfilado paralelo de columnas: {time.perf_counter() - inicio:.3f} s")
+    
     # Analizar cada tabla
-    analizar_pacientes(df_pacientes)
-    analizar_citas(df_citas)
+    analizar_pacientes(df_pacientes, perfiles['pacientes'])
+    analizar_citas(df_citas, perfiles['citas'])
+    
+    # Medir la exploración una vez (reutilizando los perfiles de fechas) y
+    # registrarla en el manifiesto de ejecución
+    fechas = {columna: perfiles[tabla][columna]['fechas']
+              for tabla in perfiles for columna in COLUMNAS_FECHA if columna in perfiles[tabla]}
+    exploracion = medir_exploracion(df_pacientes, df_citas, fechas)
+    registrar_etapa('exploracion', exploracion)
     
     # Identificar problemas
-    problemas = identificar_problemas(df_pacientes, df_citas)
+    problemas = identificar_problemas(df_pacientes, df_citas, exploracion['defectos'])
     
     # Guardar resumen
     resumen = f"""
@@ -165,6 +241,7 @@ SIGUIENTE PASO: Ejecutar script de limpieza de datos
         f.write(resumen)
     
     print(f"\nResumen guardado en: reportes/01_resumen_exploratorio.txt")
+    print(f"Métricas registradas en: resultados/manifiesto_ejecucion.json")
     print("ANÁLISIS EXPLORATORIO COMPLETADO")
 
 if __name__ == "__main__":
@@ -7,132 +7,189 @@ Sin errores de visualización
 
 import pandas as pd
 import numpy as np
+import argparse
+import hashlib
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
+from esquema_datos import cargar_dataset
+from metricas_ejecucion import etapa_o_medir, medir_exploracion
 import warnings
 warnings.filterwarnings('ignore')
 
+TAMAÑO_FIGURA = (20, 15)
+RUTA_IMAGEN = '../resultados/analisis_completo_corregido.png'
+RUTA_CACHE = '../resultados/cache_visualizaciones.json'
+# Incrementar al cambiar el dibujo de los paneles para invalidar la caché
+VERSION_PANELES = 1
+
 def cargar_datos():
-    with open('../datos/dataset_hospital.json', 'r', encoding='utf-8') as file:
-        datos = json.load(file)
-    return pd.DataFrame(datos['pacientes']), pd.DataFrame(datos['citas_medicas'])
+    return cargar_dataset('../datos/dataset_hospital.json')
+
+def hash_datos(*tablas):
+    """Huella de contenido de las tablas (hash vectorizado de pandas)"""
+    huella = hashlib.sha256()
+    for df in tablas:
+        huella.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        huella.update('|'.join(df.columns).encode('utf-8'))
+    return huella.hexdigest()
+
+def calcular_agregados(df_pacientes, df_citas):
+    """Calcula una sola vez los agregados de los nueve paneles (serializables en JSON)"""
+    def conteos(serie, top=None):
+        frecuencias = serie.value_counts(dropna=True)
+        frecuencias = frecuencias[frecuencias > 0]
+        if top:
+            frecuencias = frecuencias.head(top)
+        return {'etiquetas': [str(i) for i in frecuencias.index], 'valores': frecuencias.tolist()}
+    
+    def histograma(serie, bins):
+        valores = pd.to_numeric(serie, errors='coerce').dropna().to_numpy(dtype=float)
+        cuentas, bordes = np.histogram(valores, bins=bins)
+        return {'cuentas': cuentas.tolist(), 'bordes': bordes.tolist()}
+    
+    def completitud(df):
+        return {'etiquetas': list(df.columns),
+                'valores': (df.notna().mean() * 100).tolist()}
+    
+    return {
+        'edades': histograma(df_pacientes['edad'], 30),
+        'sexo': conteos(df_pacientes['sexo']),
+        'ciudades': conteos(df_pacientes['ciudad'], 5),
+        'costos': histograma(df_citas['costo'], 20),
+        'estados': conteos(df_citas['estado_cita']),
+        'especialidades': conteos(df_citas['especialidad'], 5),
+        'completitud_pacientes': completitud(df_pacientes),
+        'completitud_citas': completitud(df_citas)
+    }
+
+def agregados_problemas(exploracion):
+    """Panel de problemas con las cifras medidas en la exploración"""
+    defectos = exploracion['defectos']
+    return {
+        'etiquetas': ['Fechas Inválidas', 'Nombres Duplicados', 'Edades Faltantes', 'Citas Huérfanas'],
+        'valores': [defectos['fechas_cita_invalidas'], defectos['nombres_duplicados'],
+                    exploracion['nulos']['pacientes']['edad'], defectos['citas_huerfanas']]
+    }
+
+def dibujar_panel(indice, agregados):
+    """Dibuja el panel indice (1-9) en los ejes actuales"""
+    if indice == 1:
+        datos = agregados['edades']
+        bordes = np.asarray(datos['bordes'])
+        plt.bar(bordes[:-1], datos['cuentas'], width=np.diff(bordes), align='edge',
+                alpha=0.7, color='skyblue', edgecolor='black')
+        plt.title('Distribución de Edades')
+        plt.xlabel('Edad')
+        plt.ylabel('Frecuencia')
+    elif indice == 2:
+        datos = agregados['sexo']
+        plt.pie(datos['valores'], labels=datos['etiquetas'], autopct='%1.1f%%')
+        plt.title('Distribución de Sexo (sin nulos)')
+    elif indice in (3, 5, 6):
+        clave, titulo, color = {
+            3: ('ciudades', 'Top 5 Ciudades', 'lightgreen'),
+            5: ('estados', 'Estados de Citas (sin nulos)', 'lightcoral'),
+            6: ('especialidades', 'Top 5 Especialidades', 'lightblue')
+        }[indice]
+        datos = agregados[clave]
+        plt.bar(range(len(datos['valores'])), datos['valores'], color=color)
+        plt.title(titulo)
+        plt.xticks(range(len(datos['etiquetas'])), datos['etiquetas'], rotation=45)
+    elif indice == 4:
+        datos = agregados['costos']
+        bordes = np.asarray(datos['bordes'])
+        plt.bar(bordes[:-1], datos['cuentas'], width=np.diff(bordes), align='edge',
+                alpha=0.7, color='orange', edgecolor='black')
+        plt.title('Distribución de Costos')
+        plt.xlabel('Costo ($)')
+    elif indice == 7:
+        datos = agregados['problemas']
+        plt.bar(datos['etiquetas'], datos['valores'], color=['red', 'orange', 'yellow', 'pink'], alpha=0.7)
+        plt.title('Problemas de Calidad Identificados')
+        plt.xticks(rotation=45)
+        plt.ylabel('Cantidad')
+    else:
+        clave, titulo, color = {
+            8: ('completitud_pacientes', 'Completitud Pacientes (%)', 'green'),
+            9: ('completitud_citas', 'Completitud Citas (%)', 'blue')
+        }[indice]
+        datos = agregados[clave]
+        plt.bar(range(len(datos['valores'])), datos['valores'], color=color, alpha=0.7)
+        plt.title(titulo)
+        plt.xticks(range(len(datos['etiquetas'])), datos['etiquetas'], rotation=45)
+        plt.ylim(0, 100)
+
+def renderizar_panel(indice, agregados, dpi):
+    """Renderiza un panel en su propia figura y devuelve los píxeles RGBA"""
+    ancho, alto = TAMAÑO_FIGURA
+    fig = plt.figure(figsize=(ancho / 3, alto / 3), dpi=dpi)
+    dibujar_panel(indice, agregados)
+    fig.tight_layout()
+    fig.canvas.draw()
+    pixeles = np.asarray(fig.canvas.buffer_rgba()).copy()
+    plt.close(fig)
+    return pixeles
 
-def generar_visualizaciones_corregidas(df_pacientes, df_citas):
-    """Genera visualizaciones sin errores de None"""
+def generar_visualizaciones_corregidas(df_pacientes, df_citas, exploracion, dpi=300, procesos=None,
+                                       ruta_imagen=RUTA_IMAGEN, ruta_cache=RUTA_CACHE):
+    """Genera visualizaciones sin errores de None
+    
+    Los agregados se guardan en caché junto con el hash de los datos: si
+    los datos no cambiaron se reutilizan, y si tampoco cambian los
+    agregados ni los DPI se omite el renderizado. Cada panel se dibuja en
+    un proceso distinto y luego se componen en una sola imagen 3x3.
+    """
     print("GENERANDO VISUALIZACIONES CORREGIDAS...")
     
-    plt.style.use('default')
-    fig = plt.figure(figsize=(20, 15))
-    
-    # 1. Distribución de edades
-    plt.subplot(3, 3, 1)
-    edades = df_pacientes['edad'].dropna()
-    plt.hist(edades, bins=30, alpha=0.7, color='skyblue', edgecolor='black')
-    plt.title('Distribución de Edades')
-    plt.xlabel('Edad')
-    plt.ylabel('Frecuencia')
-    
-    # 2. Distribución de sexo (filtrar None)
-    plt.subplot(3, 3, 2)
-    sexo_counts = df_pacientes['sexo'].value_counts(dropna=True)  # Sin None
-    plt.pie(sexo_counts.values, labels=sexo_counts.index, autopct='%1.1f%%')
-    plt.title('Distribución de Sexo (sin nulos)')
-    
-    # 3. Ciudades más frecuentes (sin None)
-    plt.subplot(3, 3, 3)
-    ciudades = df_pacientes['ciudad'].value_counts(dropna=True).head(5)
-    plt.bar(range(len(ciudades)), ciudades.values, color='lightgreen')
-    plt.title('Top 5 Ciudades')
-    plt.xticks(range(len(ciudades)), ciudades.index, rotation=45)
-    
-    # 4. Distribución de costos
-    plt.subplot(3, 3, 4)
-    costos = df_citas['costo'].dropna()
-    plt.hist(costos, bins=20, alpha=0.7, color='orange', edgecolor='black')
-    plt.title('Distribución de Costos')
-    plt.xlabel('Costo ($)')
-    
-    # 5. Estados de citas (sin None)
-    plt.subplot(3, 3, 5)
-    estados = df_citas['estado_cita'].value_counts(dropna=True)
-    plt.bar(range(len(estados)), estados.values, color='lightcoral')
-    plt.title('Estados de Citas (sin nulos)')
-    plt.xticks(range(len(estados)), estados.index, rotation=45)
-    
-    # 6. Especialidades (sin None)
-    plt.subplot(3, 3, 6)
-    especialidades = df_citas['especialidad'].value_counts(dropna=True).head(5)
-    plt.bar(range(len(especialidades)), especialidades.values, color='lightblue')
-    plt.title('Top 5 Especialidades')
-    plt.xticks(range(len(especialidades)), especialidades.index, rotation=45)
-    
-    # 7. Problemas de calidad
-    plt.subplot(3, 3, 7)
-    problemas = [
-        'Fechas Inválidas',
-        'Nombres Duplicados', 
-        'Edades Faltantes',
-        'Citas Huérfanas'
-    ]
-    cantidades = [3314, 4985, 1647, 177]
-    colores = ['red', 'orange', 'yellow', 'pink']
-    
-    plt.bar(problemas, cantidades, color=colores, alpha=0.7)
-    plt.title('Problemas de Calidad Identificados')
-    plt.xticks(rotation=45)
-    plt.ylabel('Cantidad')
-    
-    # 8. Completitud de datos - Pacientes
-    plt.subplot(3, 3, 8)
-    completitud_pac = []
-    columnas_pac = []
-    for col in df_pacientes.columns:
-        pct_completo = ((len(df_pacientes) - df_pacientes[col].isnull().sum()) / len(df_pacientes)) * 100
-        completitud_pac.append(pct_completo)
-        columnas_pac.append(col)
-    
-    plt.bar(range(len(columnas_pac)), completitud_pac, color='green', alpha=0.7)
-    plt.title('Completitud Pacientes (%)')
-    plt.xticks(range(len(columnas_pac)), columnas_pac, rotation=45)
-    plt.ylim(0, 100)
-    
-    # 9. Completitud de datos - Citas
-    plt.subplot(3, 3, 9)
-    completitud_cit = []
-    columnas_cit = []
-    for col in df_citas.columns:
-        pct_completo = ((len(df_citas) - df_citas[col].isnull().sum()) / len(df_citas)) * 100
-        completitud_cit.append(pct_completo)
-        columnas_cit.append(col)
-    
-    plt.bar(range(len(columnas_cit)), completitud_cit, color='blue', alpha=0.7)
-    plt.title('Completitud Citas (%)')
-    plt.xticks(range(len(columnas_cit)), columnas_cit, rotation=45)
-    plt.ylim(0, 100)
-    
-    plt.tight_layout()
-    plt.savefig('../resultados/analisis_completo_corregido.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    cache = {}
+    if os.path.exists(ruta_cache):
+        with open(ruta_cache, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    
+    huella = hash_datos(df_pacientes, df_citas)
+    if cache.get('hash_datos') == huella:
+        agregados = cache['agregados']
+        print("  Agregados reutilizados desde la caché")
+    else:
+        agregados = calcular_agregados(df_pacientes, df_citas)
+    agregados['problemas'] = agregados_problemas(exploracion)
+    
+    hash_render = hashlib.sha256(
+        json.dumps({'agregados': agregados, 'dpi': dpi, 'version': VERSION_PANELES},
+                   sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    if cache.get('hash_render') == hash_render and os.path.exists(ruta_imagen):
+        print(f"  Sin cambios en los agregados: se conserva {ruta_imagen}")
+        return agregados
+    
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        paneles = list(pool.map(renderizar_panel, range(1, 10), [agregados] * 9, [dpi] * 9))
+    
+    imagen = np.vstack([np.hstack(paneles[fila * 3:fila * 3 + 3]) for fila in range(3)])
+    plt.imsave(ruta_imagen, imagen, dpi=dpi)
+    
+    with open(ruta_cache, 'w', encoding='utf-8') as f:
+        json.dump({'hash_datos': huella, 'hash_render': hash_render, 'dpi': dpi,
+                   'agregados': agregados}, f, ensure_ascii=False)
     
     print("Visualizaciones guardadas en: resultados/analisis_completo_corregido.png")
+    return agregados
 
-def generar_reporte_detallado(df_pacientes, df_citas):
+def generar_reporte_detallado(df_pacientes, df_citas, exploracion):
     """Genera reporte técnico detallado"""
     
-    # Calcular métricas detalladas
-    fechas_invalidas = 0
-    for fecha in df_citas['fecha_cita'].dropna():
-        if isinstance(fecha, str):
-            try:
-                partes = fecha.split('-')
-                if len(partes) == 3:
-                    año, mes, dia = int(partes[0]), int(partes[1]), int(partes[2])
-                    if mes > 12 or dia > 31:
-                        fechas_invalidas += 1
-            except:
-                fechas_invalidas += 1
+    # Métricas medidas en la exploración (manifiesto de ejecución)
+    defectos = exploracion['defectos']
+    nulos_pac = exploracion['nulos']['pacientes']
+    nulos_citas = exploracion['nulos']['citas']
+    fechas_invalidas = defectos['fechas_cita_invalidas']
+    ciudades = df_pacientes['ciudad'].value_counts(normalize=True).head(3)
+    ciudades_principales = ', '.join(f"{ciudad} ({proporcion:.1%})" for ciudad, proporcion in ciudades.items())
     
     reporte = f"""
 ===============================================================================
@@ -151,37 +208,37 @@ VOLUMEN DE DATOS:
 PROBLEMAS CRÍTICOS IDENTIFICADOS:
 
 1. INTEGRIDAD DE DATOS:
-   - Citas huérfanas: 177 registros (1.8%)
+   - Citas huérfanas: {defectos['citas_huerfanas']:,} registros ({defectos['citas_huerfanas']/len(df_citas)*100:.1f}%)
    - Referencias a pacientes inexistentes detectadas
 
 2. CALIDAD DE FECHAS:
    - Fechas de citas inválidas: {fechas_invalidas:,} ({fechas_invalidas/len(df_citas)*100:.1f}%)
    - Formatos incorrectos: "2023-19-01", "2023-20-01", etc.
-   - Fechas en español: 4 casos identificados
+   - Fechas de nacimiento en español: {defectos['fechas_nacimiento_español']:,} casos identificados
 
 3. DUPLICACIÓN MASIVA:
-   - Nombres duplicados: {df_pacientes['nombre'].duplicated().sum():,} ({df_pacientes['nombre'].duplicated().sum()/len(df_pacientes)*100:.1f}%)
+   - Nombres duplicados: {defectos['nombres_duplicados']:,} ({defectos['nombres_duplicados']/len(df_pacientes)*100:.1f}%)
    - Indica posible generación sintética de datos
 
 4. INCONSISTENCIAS DE FORMATO:
    - Sexo: Male/Female/M/F mezclados
-   - Estados de cita: {df_citas['estado_cita'].isnull().sum():,} valores faltantes
+   - Estados de cita: {defectos['estados_cita_faltantes']:,} valores faltantes
 
 5. COMPLETITUD DE DATOS:
    Pacientes:
-   - Edad: {df_pacientes['edad'].isnull().sum():,} faltantes ({df_pacientes['edad'].isnull().sum()/len(df_pacientes)*100:.1f}%)
-   - Email: {df_pacientes['email'].isnull().sum():,} faltantes ({df_pacientes['email'].isnull().sum()/len(df_pacientes)*100:.1f}%)
-   - Teléfono: {df_pacientes['telefono'].isnull().sum():,} faltantes ({df_pacientes['telefono'].isnull().sum()/len(df_pacientes)*100:.1f}%)
+   - Edad: {nulos_pac['edad']:,} faltantes ({nulos_pac['edad']/len(df_pacientes)*100:.1f}%)
+   - Email: {nulos_pac['email']:,} faltantes ({nulos_pac['email']/len(df_pacientes)*100:.1f}%)
+   - Teléfono: {nulos_pac['telefono']:,} faltantes ({nulos_pac['telefono']/len(df_pacientes)*100:.1f}%)
    
    Citas:
-   - Fecha: {df_citas['fecha_cita'].isnull().sum():,} faltantes ({df_citas['fecha_cita'].isnull().sum()/len(df_citas)*100:.1f}%)
-   - Especialidad: {df_citas['especialidad'].isnull().sum():,} faltantes ({df_citas['especialidad'].isnull().sum()/len(df_citas)*100:.1f}%)
-   - Médico: {df_citas['medico'].isnull().sum():,} faltantes ({df_citas['medico'].isnull().sum()/len(df_citas)*100:.1f}%)
+   - Fecha: {nulos_citas['fecha_cita']:,} faltantes ({nulos_citas['fecha_cita']/len(df_citas)*100:.1f}%)
+   - Especialidad: {nulos_citas['especialidad']:,} faltantes ({nulos_citas['especialidad']/len(df_citas)*100:.1f}%)
+   - Médico: {nulos_citas['medico']:,} faltantes ({nulos_citas['medico']/len(df_citas)*100:.1f}%)
 
 DISTRIBUCIONES PRINCIPALES:
 - Edades: {df_pacientes['edad'].dropna().min():.0f}-{df_pacientes['edad'].dropna().max():.0f} años (promedio: {df_pacientes['edad'].dropna().mean():.1f})
 - Costos: ${df_citas['costo'].dropna().min():.0f}-${df_citas['costo'].dropna().max():.0f} (promedio: ${df_citas['costo'].dropna().mean():.2f})
-- Ciudades principales: Cali, Bogotá, Bucaramanga (distribución equilibrada)
+- Ciudades principales: {ciudades_principales}
 
 RECOMENDACIONES INMEDIATAS:
 1. Implementar limpieza sistemática de fechas inválidas
@@ -206,16 +263,25 @@ Reporte generado el: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
     return reporte
 
 def main():
+    parser = argparse.ArgumentParser(description="Análisis estadístico profundo")
+    parser.add_argument('--dpi', type=int, default=300, help="Resolución de la imagen de paneles")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Procesos para renderizar los paneles (por defecto, según los núcleos)")
+    args = parser.parse_args()
+    
     print("ANÁLISIS ESTADÍSTICO PROFUNDO - VERSIÓN CORREGIDA")
     print("=" * 80)
     
     df_pacientes, df_citas = cargar_datos()
     
+    # Cifras de la exploración desde el manifiesto (se miden solo si faltan)
+    exploracion = etapa_o_medir('exploracion', lambda: medir_exploracion(df_pacientes, df_citas))
+    
     # Generar visualizaciones corregidas
-    generar_visualizaciones_corregidas(df_pacientes, df_citas)
+    generar_visualizaciones_corregidas(df_pacientes, df_citas, exploracion, dpi=args.dpi, procesos=args.procesos)
     
     # Generar reporte técnico
-    reporte = generar_reporte_detallado(df_pacientes, df_citas)
+    reporte = generar_reporte_detallado(df_pacientes, df_citas, exploracion)
     
     print("\nReporte técnico guardado en: reportes/reporte_tecnico_detallado.txt")
     print("ANÁLISIS COMPLETADO SIN ERRORES")
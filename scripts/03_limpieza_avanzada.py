@@ -7,23 +7,169 @@ Sistema robusto para manejar los problemas críticos identificados
 
 import pandas as pd
 import numpy as np
+import argparse
+import io
 import json
-import re
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, redirect_stdout
 from datetime import datetime, date
+from functools import wraps
+from esquema_datos import ESTADOS_CITA, SEXO_LIMPIO, a_registros_json, cargar_dataset
+from fechas import aplicar_memoizado, crear_fecha, descomponer_fecha, parsear_memoizado
+from metricas_ejecucion import medir_limpieza, registrar_etapa
 import warnings
 warnings.filterwarnings('ignore')
 
+def paso_instrumentado(tabla, columnas, reglas=None):
+    """Mide un paso de limpieza que modifica las columnas indicadas de una tabla
+    
+    reglas identifica la regla aplicada a cada celda modificada: un texto
+    fijo o una función (antes, despues) -> Serie de reglas.
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            with self.medir_paso(metodo.__name__, tabla, columnas, reglas or metodo.__name__):
+                return metodo(self, *args, **kwargs)
+        return envoltura
+    return decorador
+
+def como_texto(serie):
+    """Representación en texto de una columna para comparar y auditar valores"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        serie = serie.dt.strftime('%Y-%m-%d')
+    return serie.astype('string')
+
+def diferencias_texto(anteriores, nuevos):
+    """Filas cuyo texto cambió entre dos versiones de una columna"""
+    texto_antes, texto_despues = como_texto(anteriores), como_texto(nuevos)
+    return ((texto_antes != texto_despues).fillna(False).to_numpy(dtype=bool)
+            | (texto_antes.isna() != texto_despues.isna()).to_numpy())
+
+def cambios_por_valor(anteriores, nuevos):
+    """Filas modificadas por un paso en el que el valor nuevo depende solo del anterior
+    
+    El texto se compara una vez por valor distinto de la columna original;
+    los nulos de entrada se consideran sin cambios.
+    """
+    codigos, unicos = pd.factorize(anteriores)
+    valores, primeras = np.unique(codigos, return_index=True)
+    primeras = primeras[valores >= 0]
+    distintos = diferencias_texto(pd.Series(unicos), nuevos.iloc[primeras].reset_index(drop=True))
+    return np.append(distintos, False)[codigos]
+
+def reglas_fecha_nacimiento(antes, despues):
+    """Regla aplicada a cada fecha de nacimiento modificada"""
+    texto = como_texto(antes)
+    return np.select(
+        [despues.isna().to_numpy(),
+         texto.str.contains(r'^\d{4}-\d{2}-33$').fillna(False).to_numpy(dtype=bool),
+         texto.str.contains(' de ', regex=False).fillna(False).to_numpy(dtype=bool),
+         texto.str.contains('/', regex=False).fillna(False).to_numpy(dtype=bool)],
+        ['fecha_invalida_a_nulo', 'dia_33_a_03', 'fecha_español_a_iso', 'fecha_barra_a_iso'],
+        'fecha_normalizada'
+    )
+
+def reglas_edad(antes, despues):
+    """Regla aplicada a cada edad modificada"""
+    return np.where(antes.isna().to_numpy(), 'edad_completada', 'edad_discrepante_recalculada')
+
+def reglas_fecha_cita(antes, despues):
+    """Regla aplicada a cada fecha de cita modificada"""
+    mes = pd.to_numeric(como_texto(antes).str.split('-').str[1], errors='coerce')
+    return np.select(
+        [despues.isna().to_numpy(), (mes > 12).fillna(False).to_numpy(dtype=bool)],
+        ['fecha_invalida_a_nulo', 'mes_menos_12'],
+        'fecha_normalizada'
+    )
+
+def reglas_estado_cita(antes, despues):
+    """Regla aplicada a cada estado de cita completado o no reconocido"""
+    inferidas = como_texto(despues).map({
+        'Completada': 'estado_inferido_fecha_y_costo',
+        'Cancelada': 'estado_inferido_sin_fecha',
+        'Reprogramada': 'estado_inferido_otros'
+    }).to_numpy(dtype=object)
+    return np.where(antes.notna().to_numpy(), 'estado_no_reconocido_inferido', inferidas)
+
+def fragmentar_por_paciente(df_pacientes, df_citas, n_fragmentos):
+    """Divide ambas tablas en fragmentos con los mismos rangos de id_paciente
+    
+    Cada cita queda en el fragmento de su paciente, por lo que los pasos por
+    fila se pueden ejecutar de forma independiente en cada fragmento.
+    """
+    ids = df_pacientes['id_paciente'].to_numpy(dtype='float64', na_value=np.nan)
+    ids = ids[~np.isnan(ids)]
+    cuantiles = np.linspace(0, 1, n_fragmentos + 1)[1:-1]
+    limites = np.unique(np.quantile(ids, cuantiles)) if len(ids) else np.array([])
+    
+    def asignar(df):
+        return np.searchsorted(limites, df['id_paciente'].to_numpy(dtype='float64', na_value=np.nan),
+                               side='right')
+    
+    grupos_pacientes = asignar(df_pacientes)
+    grupos_citas = asignar(df_citas)
+    return [
+        (df_pacientes[grupos_pacientes == grupo], df_citas[grupos_citas == grupo])
+        for grupo in range(len(limites) + 1)
+    ]
+
+def limpiar_fragmento(fragmento, medir_memoria=False):
+    """Ejecuta los pasos por fila sobre un fragmento (en un proceso hijo)"""
+    df_pacientes, df_citas = fragmento
+    limpiador = HospitalDataCleaner(df_pacientes, df_citas, medir_memoria=medir_memoria)
+    with redirect_stdout(io.StringIO()):
+        for paso in HospitalDataCleaner.PASOS_POR_FILA:
+            getattr(limpiador, paso)()
+    return {
+        'pacientes': limpiador.df_pacientes,
+        'citas': limpiador.df_citas,
+        'log': limpiador.log_limpieza,
+        'supuestos': limpiador.supuestos,
+        'metricas': limpiador.metricas_pasos,
+        'linaje': limpiador.linaje
+    }
+
 class HospitalDataCleaner:
     """Sistema avanzado de limpieza de datos hospitalarios"""
     
-    def __init__(self, df_pacientes, df_citas):
-        self.df_pacientes_original = df_pacientes.copy()
-        self.df_citas_original = df_citas.copy()
-        self.df_pacientes = df_pacientes.copy()
-        self.df_citas = df_citas.copy()
+    CLAVES = {'pacientes': 'id_paciente', 'citas': 'id_cita'}
+    # Pasos que solo dependen de cada fila; la integridad referencial necesita
+    # el conjunto global de pacientes y se ejecuta sobre las tablas unidas
+    PASOS_POR_FILA = ['limpiar_sexo', 'limpiar_fechas_nacimiento', 'calcular_edades',
+                      'limpiar_fechas_citas', 'completar_estados_citas']
+    COLUMNAS_LINAJE = ['tabla', 'fila', 'id_registro', 'columna', 'regla',
+                       'valor_anterior', 'valor_nuevo']
+    
+    def __init__(self, df_pacientes, df_citas, medir_memoria=True):
+        # Los originales se guardan como referencia y las tablas de trabajo
+        # comparten sus columnas: los pasos reemplazan columnas completas
+        self.df_pacientes_original = df_pacientes
+        self.df_citas_original = df_citas
+        self.df_pacientes = df_pacientes.copy(deep=False)
+        self.df_citas = df_citas.copy(deep=False)
+        self.estadisticas_iniciales = {
+            'pacientes': self.estadisticas_tabla(df_pacientes),
+            'citas': self.estadisticas_tabla(df_citas)
+        }
         self.log_limpieza = []
         self.supuestos = []
-        
+        self.metricas_pasos = []
+        self.linaje = []
+        self.mascaras_cambios = {}
+        self.medir_memoria = medir_memoria
+        
+    @staticmethod
+    def estadisticas_tabla(df):
+        """Filas y nulos por columna de una tabla"""
+        return {
+            'filas': len(df),
+            'nulos': {columna: int(n) for columna, n in df.isna().sum().items()}
+        }
+    
     def log(self, accion, detalles):
         """Registra acciones de limpieza"""
         entrada = f"{datetime.now().strftime('%H:%M:%S')} - {accion}: {detalles}"
@@ -35,6 +181,106 @@ class HospitalDataCleaner:
         self.supuestos.append(descripcion)
         print(f"  SUPUESTO: {descripcion}")
     
+    def marcar_cambios(self, columna, mascara):
+        """Informa a medir_paso de las filas que el paso modificó en una columna"""
+        self.mascaras_cambios[columna] = np.asarray(mascara, dtype=bool)
+    
+    def registrar_cambios(self, tabla, columna, regla, mascara, anteriores, nuevos):
+        """Agrega al linaje las celdas de una columna marcadas por una máscara
+        
+        anteriores y nuevos están alineados con las filas actuales de la tabla;
+        regla es un texto o un arreglo con la regla de cada fila marcada. Solo
+        las filas marcadas se convierten a texto.
+        """
+        mascara = np.asarray(mascara, dtype=bool)
+        if not mascara.any():
+            return
+        
+        df = getattr(self, f'df_{tabla}')
+        self.linaje.append(pd.DataFrame({
+            'tabla': tabla,
+            'fila': df.index[mascara],
+            'id_registro': como_texto(df[self.CLAVES[tabla]][mascara]).to_numpy(),
+            'columna': columna,
+            'regla': regla,
+            'valor_anterior': como_texto(anteriores[mascara]).to_numpy(),
+            'valor_nuevo': como_texto(nuevos[mascara]).to_numpy()
+        }))
+    
+    def linaje_cambios(self):
+        """Devuelve el linaje de cambios por celda como una tabla columnar"""
+        if not self.linaje:
+            return pd.DataFrame(columns=self.COLUMNAS_LINAJE)
+        linaje = pd.concat(self.linaje, ignore_index=True)
+        return linaje.astype({'tabla': 'category', 'columna': 'category', 'regla': 'category',
+                              'id_registro': 'string', 'valor_anterior': 'string',
+                              'valor_nuevo': 'string'})
+    
+    @contextmanager
+    def medir_paso(self, paso, tabla, columnas, reglas):
+        """Registra tiempo, filas y memoria pico de un paso de limpieza
+        
+        tracemalloc encarece cada asignación de memoria en Python; con
+        medir_memoria=False solo se mide tiempo y filas.
+        """
+        df_entrada = getattr(self, f'df_{tabla}')
+        filas_entrada = len(df_entrada)
+        # Las columnas de entrada no se modifican en el lugar, así que basta con referenciarlas
+        antes = {columna: df_entrada[columna] for columna in columnas}
+        self.mascaras_cambios = {}
+        
+        # Solo se detiene tracemalloc si lo inició esta medición
+        iniciado = self.medir_memoria and not tracemalloc.is_tracing()
+        if iniciado:
+            tracemalloc.start()
+        elif self.medir_memoria:
+            tracemalloc.reset_peak()
+        
+        pico_mb = None
+        try:
+            inicio = time.perf_counter()
+            yield
+            segundos = time.perf_counter() - inicio
+            if self.medir_memoria:
+                pico_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            if iniciado:
+                tracemalloc.stop()
+        
+        df_salida = getattr(self, f'df_{tabla}')
+        filas_salida = len(df_salida)
+        if filas_salida != filas_entrada or not columnas:
+            filas_cambiadas = abs(filas_entrada - filas_salida)
+        else:
+            cambiadas = np.zeros(filas_salida, dtype=bool)
+            for columna in columnas:
+                anteriores, nuevos = antes[columna], df_salida[columna]
+                # Los pasos marcan las filas que modifican; si no, se comparan las columnas completas
+                distintos = self.mascaras_cambios.get(columna)
+                if distintos is None:
+                    distintos = diferencias_texto(anteriores, nuevos)
+                regla = reglas(anteriores[distintos], nuevos[distintos]) if callable(reglas) else reglas
+                self.registrar_cambios(tabla, columna, regla, distintos, anteriores, nuevos)
+                cambiadas |= distintos
+            filas_cambiadas = int(cambiadas.sum())
+        
+        metrica = {
+            'paso': paso,
+            'tabla': tabla,
+            'segundos': round(segundos, 6),
+            'filas_entrada': filas_entrada,
+            'filas_salida': filas_salida,
+            'filas_cambiadas': filas_cambiadas,
+            'memoria_pico_mb': None if pico_mb is None else round(pico_mb, 3)
+        }
+        self.metricas_pasos.append(metrica)
+        
+        memoria = "n/d" if pico_mb is None else f"{pico_mb:.2f} MB"
+        self.log(f"Métricas {paso}",
+                f"{segundos * 1000:.1f} ms, filas {filas_entrada} -> {filas_salida}, "
+                f"cambiadas {filas_cambiadas}, memoria pico {memoria}")
+    
+    @paso_instrumentado('pacientes', ['sexo'], 'sexo_estandarizado_m_f')
     def limpiar_sexo(self):
         """Estandariza valores de sexo"""
         print("\n1. ESTANDARIZANDO CAMPO SEXO")
@@ -49,7 +295,9 @@ class HospitalDataCleaner:
             'F': 'F'
         }
         
-        self.df_pacientes['sexo'] = self.df_pacientes['sexo'].map(mapeo_sexo)
+        originales = self.df_pacientes['sexo']
+        self.df_pacientes['sexo'] = originales.map(mapeo_sexo).astype(SEXO_LIMPIO)
+        self.marcar_cambios('sexo', cambios_por_valor(originales, self.df_pacientes['sexo']))
         
         despues = self.df_pacientes['sexo'].value_counts(dropna=False)
         
@@ -58,72 +306,42 @@ class HospitalDataCleaner:
         
         return antes, despues
     
+    @paso_instrumentado('pacientes', ['fecha_nacimiento'], reglas_fecha_nacimiento)
     def limpiar_fechas_nacimiento(self):
         """Limpia fechas de nacimiento con múltiples formatos"""
         print("\n2. LIMPIANDO FECHAS DE NACIMIENTO")
         
         def procesar_fecha_nacimiento(fecha):
-            if pd.isna(fecha):
+            partes = descomponer_fecha(str(fecha))
+            if partes is None:
                 return None
             
-            try:
-                fecha_str = str(fecha)
-                
-                # Formato estándar YYYY-MM-DD
-                if re.match(r'^\d{4}-\d{2}-\d{2}$', fecha_str):
-                    # Verificar fecha válida
-                    partes = fecha_str.split('-')
-                    año, mes, dia = int(partes[0]), int(partes[1]), int(partes[2])
-                    
-                    # Detectar día 33 (error común)
-                    if dia == 33:
-                        dia = 3  # Asumir que 33 era 03
-                        fecha_str = f"{año}-{mes:02d}-{dia:02d}"
-                    
-                    if mes > 12 or dia > 31:
-                        return None
-                    
-                    return pd.to_datetime(fecha_str).date()
-                
-                # Formato español: "DD de MMM de YYYY"
-                if 'de' in fecha_str:
-                    meses = {
-                        'enero': '01', 'febrero': '02', 'marzo': '03', 'abril': '04',
-                        'mayo': '05', 'junio': '06', 'julio': '07', 'agosto': '08',
-                        'septiembre': '09', 'octubre': '10', 'noviembre': '11', 'diciembre': '12',
-                        'ene': '01', 'feb': '02', 'mar': '03', 'abr': '04',
-                        'may': '05', 'jun': '06', 'jul': '07', 'ago': '08',
-                        'sep': '09', 'oct': '10', 'nov': '11', 'dic': '12'
-                    }
-                    
-                    # Buscar patrón
-                    patron = r'(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})'
-                    match = re.search(patron, fecha_str.lower())
-                    
-                    if match:
-                        dia, mes_nombre, año = match.groups()
-                        if mes_nombre in meses:
-                            fecha_nueva = f"{año}-{meses[mes_nombre]}-{dia.zfill(2)}"
-                            return pd.to_datetime(fecha_nueva).date()
-                
-                return None
-                
-            except Exception:
-                return None
+            formato, año, mes, dia = partes
+            
+            # Detectar día 33 (error común)
+            if formato == 'iso' and dia == 33:
+                dia = 3  # Asumir que 33 era 03
+            
+            return crear_fecha(año, mes, dia)
         
         fechas_antes = self.df_pacientes['fecha_nacimiento'].notna().sum()
         
-        self.df_pacientes['fecha_nacimiento'] = self.df_pacientes['fecha_nacimiento'].apply(
-            procesar_fecha_nacimiento
+        originales = self.df_pacientes['fecha_nacimiento']
+        self.df_pacientes['fecha_nacimiento'], proporcion = parsear_memoizado(
+            originales, procesar_fecha_nacimiento
         )
+        self.marcar_cambios('fecha_nacimiento',
+                            cambios_por_valor(originales, self.df_pacientes['fecha_nacimiento']))
         
         fechas_despues = self.df_pacientes['fecha_nacimiento'].notna().sum()
         
+        self.log("Parseo memoizado", f"Valores únicos/total: {proporcion:.1%}")
         self.log("Fechas de nacimiento procesadas", 
                 f"Válidas: {fechas_antes} -> {fechas_despues}")
         self.supuesto("Fechas con día 33 se corrigieron a día 03")
         self.supuesto("Fechas en español se convirtieron a formato ISO")
     
+    @paso_instrumentado('pacientes', ['edad'], reglas_edad)
     def calcular_edades(self):
         """Calcula edades desde fechas de nacimiento"""
         print("\n3. CALCULANDO Y VALIDANDO EDADES")
@@ -148,143 +366,174 @@ class HospitalDataCleaner:
                 return None
         
         # Calcular edades desde fechas
-        edades_calculadas = self.df_pacientes['fecha_nacimiento'].apply(calcular_edad_actual)
-        
-        # Comparar con edades existentes
-        discrepancias = 0
-        edades_completadas = 0
-        
-        for idx, row in self.df_pacientes.iterrows():
-            edad_original = row['edad']
-            edad_calculada = edades_calculadas[idx]
-            
-            if pd.notna(edad_calculada):
-                if pd.isna(edad_original):
-                    # Completar edad faltante
-                    self.df_pacientes.loc[idx, 'edad'] = edad_calculada
-                    edades_completadas += 1
-                elif abs(edad_original - edad_calculada) > 2:
-                    # Discrepancia significativa - usar calculada
-                    self.df_pacientes.loc[idx, 'edad'] = edad_calculada
-                    discrepancias += 1
+        edades_calculadas, proporcion = aplicar_memoizado(
+            self.df_pacientes['fecha_nacimiento'], calcular_edad_actual
+        )
+        self.log("Cálculo memoizado", f"Fechas únicas/total: {proporcion:.1%}")
+        
+        # Comparar con edades existentes: se completan las faltantes y, en
+        # discrepancias de más de 2 años, se usa la calculada
+        edades = self.df_pacientes['edad']
+        calculadas = pd.Series(pd.array(edades_calculadas, dtype=edades.dtype), index=edades.index)
+        completadas = calculadas.notna() & edades.isna()
+        discrepantes = calculadas.notna() & (edades - calculadas).abs().gt(2).fillna(False)
+        modificadas = completadas | discrepantes
+        self.df_pacientes['edad'] = edades.mask(modificadas, calculadas)
+        self.marcar_cambios('edad', modificadas.to_numpy())
+        discrepancias = int(discrepantes.sum())
+        edades_completadas = int(completadas.sum())
         
         self.log("Edades procesadas", 
                 f"Discrepancias corregidas: {discrepancias}, Completadas: {edades_completadas}")
         self.supuesto("En discrepancias >2 años, se priorizó edad calculada desde fecha nacimiento")
     
+    @paso_instrumentado('citas', ['fecha_cita'], reglas_fecha_cita)
     def limpiar_fechas_citas(self):
         """Limpia fechas de citas con problemas masivos de formato"""
         print("\n4. LIMPIANDO FECHAS DE CITAS (PROBLEMA CRÍTICO)")
         
         def procesar_fecha_cita(fecha):
-            if pd.isna(fecha):
+            partes = descomponer_fecha(str(fecha))
+            if partes is None:
                 return None
             
-            try:
-                fecha_str = str(fecha)
-                
-                # Detectar formato YYYY-MM-DD con errores
-                if re.match(r'^\d{4}-\d{1,2}-\d{1,2}$', fecha_str):
-                    partes = fecha_str.split('-')
-                    año, mes, dia = int(partes[0]), int(partes[1]), int(partes[2])
-                    
-                    # Corregir meses inválidos comunes
-                    if mes > 12:
-                        # Patrones detectados: 13->01, 14->02, 15->03, etc.
-                        if mes <= 24:
-                            mes = mes - 12
-                        else:
-                            return None  # Muy inválido
-                    
-                    # Validar día
-                    if dia > 31 or dia < 1:
-                        return None
-                    
-                    # Validar año razonable
-                    if año < 2020 or año > 2030:
-                        return None
-                    
-                    try:
-                        return pd.to_datetime(f"{año}-{mes:02d}-{dia:02d}").date()
-                    except:
-                        return None
-                
-                return None
-                
-            except:
+            formato, año, mes, dia = partes
+            
+            # Corregir meses inválidos comunes en formato ISO
+            if formato == 'iso' and mes > 12:
+                # Patrones detectados: 13->01, 14->02, 15->03, etc.
+                if mes <= 24:
+                    mes = mes - 12
+                else:
+                    return None  # Muy inválido
+            
+            # Validar año razonable
+            if año < 2020 or año > 2030:
                 return None
+            
+            return crear_fecha(año, mes, dia)
         
         fechas_antes = self.df_citas['fecha_cita'].notna().sum()
-        fechas_invalidas_antes = 0
+        
+        def mes_invalido(fecha):
+            partes = descomponer_fecha(str(fecha))
+            return partes is not None and partes[2] > 12
         
         # Contar inválidas antes
-        for fecha in self.df_citas['fecha_cita'].dropna():
-            if isinstance(fecha, str):
-                try:
-                    partes = fecha.split('-')
-                    if len(partes) == 3:
-                        mes = int(partes[1])
-                        if mes > 12:
-                            fechas_invalidas_antes += 1
-                except:
-                    continue
-        
-        self.df_citas['fecha_cita'] = self.df_citas['fecha_cita'].apply(procesar_fecha_cita)
+        invalidas, _ = aplicar_memoizado(self.df_citas['fecha_cita'], mes_invalido)
+        fechas_invalidas_antes = int(invalidas.eq(True).sum())
+        
+        originales = self.df_citas['fecha_cita']
+        self.df_citas['fecha_cita'], proporcion = parsear_memoizado(originales, procesar_fecha_cita)
+        self.marcar_cambios('fecha_cita', cambios_por_valor(originales, self.df_citas['fecha_cita']))
         
         fechas_despues = self.df_citas['fecha_cita'].notna().sum()
         
+        self.log("Parseo memoizado", f"Valores únicos/total: {proporcion:.1%}")
         self.log("Fechas de citas corregidas", 
                 f"Antes: {fechas_antes}, Después: {fechas_despues}, Inválidas detectadas: {fechas_invalidas_antes}")
         self.supuesto("Meses >12 se corrigieron restando 12 (ej: mes 13 -> mes 1)")
         self.supuesto("Fechas no corregibles se marcaron como null")
     
+    @paso_instrumentado('citas', ['estado_cita'], reglas_estado_cita)
     def completar_estados_citas(self):
         """Completa estados de citas faltantes usando lógica de negocio"""
         print("\n5. COMPLETANDO ESTADOS DE CITAS")
         
-        estados_antes = self.df_citas['estado_cita'].isnull().sum()
-        
-        for idx, row in self.df_citas.iterrows():
-            if pd.isna(row['estado_cita']):
-                # Lógica de negocio para inferir estado
-                if pd.notna(row['fecha_cita']) and pd.notna(row['costo']):
-                    # Tiene fecha y costo -> probablemente completada
-                    self.df_citas.loc[idx, 'estado_cita'] = 'Completada'
-                elif pd.isna(row['fecha_cita']):
-                    # Sin fecha -> probablemente cancelada
-                    self.df_citas.loc[idx, 'estado_cita'] = 'Cancelada'
-                else:
-                    # Otros casos -> reprogramada
-                    self.df_citas.loc[idx, 'estado_cita'] = 'Reprogramada'
+        # Los estados fuera del catálogo se registran y se infieren como faltantes
+        estados = self.df_citas['estado_cita']
+        no_reconocidos = estados.notna() & ~estados.isin(ESTADOS_CITA.categories)
+        if no_reconocidos.any():
+            valores = sorted(estados[no_reconocidos].astype(str).unique())
+            self.log("Estados no reconocidos", f"{int(no_reconocidos.sum())} casos: {', '.join(valores)}")
+        self.df_citas['estado_cita'] = estados.astype(ESTADOS_CITA)
+        
+        faltantes = self.df_citas['estado_cita'].isna()
+        estados_antes = faltantes.sum()
+        
+        # Lógica de negocio para inferir estado: fecha y costo -> probablemente
+        # completada; sin fecha -> probablemente cancelada; otros -> reprogramada
+        con_fecha = self.df_citas['fecha_cita'].notna()
+        inferidos = np.select(
+            [con_fecha & self.df_citas['costo'].notna(), ~con_fecha],
+            ['Completada', 'Cancelada'], 'Reprogramada'
+        )
+        self.df_citas['estado_cita'] = self.df_citas['estado_cita'].mask(
+            faltantes, pd.Series(inferidos, index=faltantes.index, dtype=ESTADOS_CITA)
+        )
+        self.marcar_cambios('estado_cita', faltantes)
         
         estados_despues = self.df_citas['estado_cita'].isnull().sum()
         
         self.log("Estados completados", 
                 f"Faltantes: {estados_antes} -> {estados_despues}")
         self.supuesto("Estados inferidos: fecha+costo=Completada, sin fecha=Cancelada, otros=Reprogramada")
+        if no_reconocidos.any():
+            self.supuesto("Estados fuera del catálogo se trataron como faltantes")
     
+    @paso_instrumentado('citas', [])
     def resolver_integridad_referencial(self):
         """Resuelve problemas de integridad referencial"""
         print("\n6. RESOLVIENDO INTEGRIDAD REFERENCIAL")
         
-        pacientes_validos = set(self.df_pacientes['id_paciente'])
-        citas_huerfanas = []
-        
-        for idx, row in self.df_citas.iterrows():
-            if row['id_paciente'] not in pacientes_validos:
-                citas_huerfanas.append(idx)
+        huerfanas = ~self.df_citas['id_paciente'].isin(self.df_pacientes['id_paciente'])
         
-        if citas_huerfanas:
-            # Remover citas huérfanas
-            self.df_citas = self.df_citas.drop(citas_huerfanas).reset_index(drop=True)
+        if huerfanas.any():
+            # Remover citas huérfanas (se registran en el linaje antes de eliminarlas)
+            self.registrar_cambios('citas', 'id_paciente', 'cita_huerfana_eliminada', huerfanas,
+                                   self.df_citas['id_paciente'],
+                                   pd.Series(pd.NA, index=self.df_citas.index, dtype='string'))
+            self.df_citas = self.df_citas[~huerfanas].reset_index(drop=True)
             
             self.log("Integridad referencial restaurada", 
-                    f"Citas huérfanas removidas: {len(citas_huerfanas)}")
+                    f"Citas huérfanas removidas: {int(huerfanas.sum())}")
             self.supuesto("Citas sin paciente válido fueron eliminadas para mantener integridad")
         else:
             self.log("Integridad referencial", "No se encontraron problemas")
     
-    def ejecutar_limpieza_completa(self):
+    def limpiar_en_paralelo(self, procesos):
+        """Ejecuta los pasos por fila en fragmentos por rango de id_paciente
+        
+        Los fragmentos conservan el índice original, así que al unirlos se
+        recupera el orden de las filas y el linaje apunta a las filas originales.
+        """
+        print(f"\nLIMPIEZA PARALELA: {procesos} procesos")
+        fragmentos = fragmentar_por_paciente(self.df_pacientes, self.df_citas, procesos)
+        
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = list(pool.map(limpiar_fragmento, fragmentos,
+                                       [self.medir_memoria] * len(fragmentos)))
+        
+        self.df_pacientes = pd.concat([r['pacientes'] for r in resultados]).sort_index()
+        self.df_citas = pd.concat([r['citas'] for r in resultados]).sort_index()
+        
+        for numero, resultado in enumerate(resultados, 1):
+            self.log_limpieza.extend(f"[fragmento {numero}] {entrada}" for entrada in resultado['log'])
+            self.linaje.extend(resultado['linaje'])
+        for supuesto in dict.fromkeys(s for r in resultados for s in r['supuestos']):
+            self.supuesto(supuesto)
+        
+        # Métricas combinadas: el tiempo de un paso es el del fragmento más lento
+        metricas = pd.DataFrame([m for r in resultados for m in r['metricas']])
+        for paso in self.PASOS_POR_FILA:
+            grupo = metricas[metricas['paso'] == paso]
+            memoria = grupo['memoria_pico_mb'].dropna()
+            metrica = {
+                'paso': paso,
+                'tabla': grupo['tabla'].iloc[0],
+                'segundos': round(float(grupo['segundos'].max()), 6),
+                'filas_entrada': int(grupo['filas_entrada'].sum()),
+                'filas_salida': int(grupo['filas_salida'].sum()),
+                'filas_cambiadas': int(grupo['filas_cambiadas'].sum()),
+                'memoria_pico_mb': round(float(memoria.max()), 3) if len(memoria) else None
+            }
+            self.metricas_pasos.append(metrica)
+            self.log(f"Métricas {paso}",
+                    f"{metrica['segundos'] * 1000:.1f} ms (fragmento más lento), "
+                    f"filas {metrica['filas_entrada']} -> {metrica['filas_salida']}, "
+                    f"cambiadas {metrica['filas_cambiadas']}, {len(grupo)} fragmentos")
+    
+    def ejecutar_limpieza_completa(self, procesos=1):
         """Ejecuta todo el proceso de limpieza"""
         print("="*80)
         print("INICIANDO LIMPIEZA AVANZADA DE DATOS HOSPITALARIOS")
@@ -292,15 +541,15 @@ class HospitalDataCleaner:
         
         # Estadísticas iniciales
         print(f"\nESTADÍSTICAS INICIALES:")
-        print(f"- Pacientes: {len(self.df_pacientes_original):,}")
-        print(f"- Citas: {len(self.df_citas_original):,}")
+        print(f"- Pacientes: {self.estadisticas_iniciales['pacientes']['filas']:,}")
+        print(f"- Citas: {self.estadisticas_iniciales['citas']['filas']:,}")
         
         # Ejecutar limpieza paso a paso
-        self.limpiar_sexo()
-        self.limpiar_fechas_nacimiento()
-        self.calcular_edades()
-        self.limpiar_fechas_citas()
-        self.completar_estados_citas()
+        if procesos > 1:
+            self.limpiar_en_paralelo(procesos)
+        else:
+            for paso in self.PASOS_POR_FILA:
+                getattr(self, paso)()
         self.resolver_integridad_referencial()
         
         # Estadísticas finales
@@ -314,47 +563,51 @@ class HospitalDataCleaner:
         
         return self.df_pacientes, self.df_citas
 
-def main():
-    print("SISTEMA DE LIMPIEZA AVANZADA - DATOS HOSPITALARIOS")
-    print("=" * 80)
+def limpiar_dataset(ruta_entrada='../datos/dataset_hospital.json', dir_resultados='../resultados',
+                    dir_reportes='../reportes', procesos=1):
+    """Limpia un dataset y escribe datos limpios, linaje, log, métricas y manifiesto
     
-    # Cargar datos
-    with open('../datos/dataset_hospital.json', 'r', encoding='utf-8') as file:
-        datos = json.load(file)
+    Devuelve las métricas de la limpieza registradas en el manifiesto.
+    """
+    def resultado(nombre):
+        return os.path.join(dir_resultados, nombre)
+    
+    def reporte(nombre):
+        return os.path.join(dir_reportes, nombre)
     
-    df_pacientes_original = pd.DataFrame(datos['pacientes'])
-    df_citas_original = pd.DataFrame(datos['citas_medicas'])
+    # Cargar datos
+    df_pacientes_original, df_citas_original = cargar_dataset(ruta_entrada)
     
     # Crear instancia del limpiador
     limpiador = HospitalDataCleaner(df_pacientes_original, df_citas_original)
     
     # Ejecutar limpieza
-    df_pacientes_clean, df_citas_clean = limpiador.ejecutar_limpieza_completa()
+    df_pacientes_clean, df_citas_clean = limpiador.ejecutar_limpieza_completa(procesos)
     
-    # Guardar datos limpios
+    # Guardar datos limpios (fechas ISO y nulos como null)
     datos_limpios = {
-        'pacientes': df_pacientes_clean.to_dict('records'),
-        'citas_medicas': df_citas_clean.to_dict('records')
+        'pacientes': a_registros_json(df_pacientes_clean),
+        'citas_medicas': a_registros_json(df_citas_clean)
     }
     
-    # Convertir fechas a strings para JSON
-    for paciente in datos_limpios['pacientes']:
-        if paciente['fecha_nacimiento']:
-            paciente['fecha_nacimiento'] = str(paciente['fecha_nacimiento'])
-    
-    for cita in datos_limpios['citas_medicas']:
-        if cita['fecha_cita']:
-            cita['fecha_cita'] = str(cita['fecha_cita'])
-    
     # Exportar
-    with open('../resultados/dataset_hospital_limpio.json', 'w', encoding='utf-8') as f:
+    with open(resultado('dataset_hospital_limpio.json'), 'w', encoding='utf-8') as f:
         json.dump(datos_limpios, f, indent=2, ensure_ascii=False)
     
-    df_pacientes_clean.to_csv('../resultados/pacientes_limpio.csv', index=False, encoding='utf-8')
-    df_citas_clean.to_csv('../resultados/citas_limpio.csv', index=False, encoding='utf-8')
+    df_pacientes_clean.to_csv(resultado('pacientes_limpio.csv'), index=False, encoding='utf-8')
+    df_citas_clean.to_csv(resultado('citas_limpio.csv'), index=False, encoding='utf-8')
+    
+    # Guardar linaje de cambios por celda (Parquet, o CSV si falta pyarrow)
+    linaje = limpiador.linaje_cambios()
+    try:
+        archivo_linaje = resultado('linaje_limpieza.parquet')
+        linaje.to_parquet(archivo_linaje, index=False)
+    except ImportError:
+        archivo_linaje = resultado('linaje_limpieza.csv')
+        linaje.to_csv(archivo_linaje, index=False, encoding='utf-8')
     
     # Guardar log de limpieza
-    with open('../reportes/log_limpieza_avanzada.txt', 'w', encoding='utf-8') as f:
+    with open(reporte('log_limpieza_avanzada.txt'), 'w', encoding='utf-8') as f:
         f.write("LOG DE LIMPIEZA AVANZADA\n")
         f.write("="*50 + "\n\n")
         f.write("ACCIONES REALIZADAS:\n")
@@ -363,12 +616,49 @@ def main():
         f.write("\nSUPUESTOS ADOPTADOS:\n")
         for supuesto in limpiador.supuestos:
             f.write(f"- {supuesto}\n")
+        f.write("\nMÉTRICAS POR PASO:\n")
+        f.write(pd.DataFrame(limpiador.metricas_pasos).to_string(index=False))
+        f.write("\n\nCELDAS MODIFICADAS POR REGLA:\n")
+        f.write(linaje.groupby(['columna', 'regla'], observed=True).size()
+                .rename('celdas').to_string())
+        f.write("\n")
+    
+    # Guardar métricas en formato JSON
+    metricas = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'segundos_total': round(sum(m['segundos'] for m in limpiador.metricas_pasos), 6),
+        'estadisticas_iniciales': limpiador.estadisticas_iniciales,
+        'pasos': limpiador.metricas_pasos
+    }
+    with open(reporte('metricas_limpieza.json'), 'w', encoding='utf-8') as f:
+        json.dump(metricas, f, indent=2, ensure_ascii=False)
+    
+    # Registrar las cifras de la limpieza en el manifiesto de ejecución
+    medicion = medir_limpieza(limpiador.estadisticas_iniciales, df_pacientes_clean,
+                              df_citas_clean, linaje, metricas['segundos_total'])
+    registrar_etapa('limpieza', medicion, resultado('manifiesto_ejecucion.json'), ruta_entrada)
     
     print(f"\nARCHIVOS GENERADOS:")
-    print(f"- resultados/dataset_hospital_limpio.json")
-    print(f"- resultados/pacientes_limpio.csv")
-    print(f"- resultados/citas_limpio.csv")
-    print(f"- reportes/log_limpieza_avanzada.txt")
+    for archivo in (resultado('dataset_hospital_limpio.json'), resultado('pacientes_limpio.csv'),
+                    resultado('citas_limpio.csv'), archivo_linaje, reporte('log_limpieza_avanzada.txt'),
+                    reporte('metricas_limpieza.json'), resultado('manifiesto_ejecucion.json')):
+        print(f"- {archivo}")
+    
+    return medicion
+
+def main():
+    parser = argparse.ArgumentParser(description="Limpieza avanzada de datos hospitalarios")
+    parser.add_argument('--procesos', type=int, default=1,
+                        help="Procesos para los pasos por fila (1 = sin paralelismo)")
+    parser.add_argument('--entrada', default='../datos/dataset_hospital.json', help="Dataset original")
+    parser.add_argument('--resultados', default='../resultados', help="Directorio de datos limpios y manifiesto")
+    parser.add_argument('--reportes', default='../reportes', help="Directorio de log y métricas")
+    args = parser.parse_args()
+    
+    print("SISTEMA DE LIMPIEZA AVANZADA - DATOS HOSPITALARIOS")
+    print("=" * 80)
+    
+    limpiar_dataset(args.entrada, args.resultados, args.reportes, args.procesos)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -7,33 +7,39 @@ Valida la calidad post-limpieza y genera reporte ejecutivo
 
 import pandas as pd
 import numpy as np
+import argparse
 import json
+import os
+import sys
 import matplotlib.pyplot as plt
-from datetime import datetime
+from esquema_datos import cargar_dataset
+from informes import FORMATOS, RUTA_CACHE, renderizar_informe
+from metricas_ejecucion import (MetricaNoDisponible, etapa_o_medir, leer_manifiesto, medir_calidad,
+                                medir_exploracion, metrica, registrar_etapa)
 import warnings
 warnings.filterwarnings('ignore')
 
-def cargar_datos_comparacion():
+RUTA_ORIGINAL = '../datos/dataset_hospital.json'
+RUTA_LIMPIO = '../resultados/dataset_hospital_limpio.json'
+RUTA_REPORTE = '../reportes/reporte_ejecutivo_final'
+RUTA_GRAFICO = '../reportes/comparacion_antes_despues.png'
+
+def cargar_datos_comparacion(ruta_original=RUTA_ORIGINAL, ruta_limpio=RUTA_LIMPIO):
     """Carga datos originales y limpios para comparación"""
     
     # Datos originales
-    with open('../datos/dataset_hospital.json', 'r', encoding='utf-8') as f:
-        datos_orig = json.load(f)
-    
-    df_pac_orig = pd.DataFrame(datos_orig['pacientes'])
-    df_citas_orig = pd.DataFrame(datos_orig['citas_medicas'])
+    df_pac_orig, df_citas_orig = cargar_dataset(ruta_original)
     
     # Datos limpios
-    with open('../resultados/dataset_hospital_limpio.json', 'r', encoding='utf-8') as f:
-        datos_limpios = json.load(f)
-    
-    df_pac_limpio = pd.DataFrame(datos_limpios['pacientes'])
-    df_citas_limpio = pd.DataFrame(datos_limpios['citas_medicas'])
+    df_pac_limpio, df_citas_limpio = cargar_dataset(ruta_limpio, limpio=True)
     
     return df_pac_orig, df_citas_orig, df_pac_limpio, df_citas_limpio
 
-def validar_calidad_post_limpieza(df_pac, df_citas):
-    """Ejecuta validaciones de calidad en datos limpios"""
+def validar_calidad_post_limpieza(df_pac, df_citas, conteos=None):
+    """Ejecuta validaciones de calidad en datos limpios
+    
+    Si se pasa el dict conteos, se llena con los casos inválidos medidos.
+    """
     
     print("VALIDACIONES DE CALIDAD POST-LIMPIEZA")
     print("="*60)
@@ -101,6 +107,15 @@ def validar_calidad_post_limpieza(df_pac, df_citas):
     
     print(f"\nRESUMEN: {pass_count}/{len(validaciones)} validaciones pasaron")
     
+    if conteos is not None:
+        conteos.update({
+            'sexo_invalido': len(sexo_invalidos),
+            'fechas_cita_invalidas': fechas_invalidas,
+            'pacientes_inexistentes': len(huerfanas),
+            'estados_invalidos': len(estados_invalidos),
+            'edades_fuera_de_rango': len(edades_invalidas)
+        })
+    
     return validaciones, pass_count == len(validaciones)
 
 def calcular_metricas_mejora(df_pac_orig, df_citas_orig, df_pac_limpio, df_citas_limpio):
@@ -176,8 +191,12 @@ def calcular_metricas_mejora(df_pac_orig, df_citas_orig, df_pac_limpio, df_citas
     
     return metricas
 
-def generar_visualizacion_comparativa(metricas):
-    """Genera visualización antes vs después"""
+def generar_visualizacion_comparativa(metricas, problemas, scores, ruta_imagen=RUTA_GRAFICO):
+    """Genera visualización antes vs después
+    
+    problemas son los resueltos por la limpieza (manifiesto de ejecución) y
+    scores los medidos antes y después por medir_calidad.
+    """
     
     print("\nGENERANDO VISUALIZACIÓN COMPARATIVA...")
     
@@ -202,16 +221,17 @@ def generar_visualizacion_comparativa(metricas):
     axes[0,0].set_ylim(0, 100)
     
     # 2. Problemas resueltos
-    problemas = ['Citas Huérfanas', 'Fechas Inválidas', 'Sexo Inconsistente']
-    antes_prob = [metricas['integridad']['huerfanas']['antes'], 3314, 2021]
+    tipos_problema = ['Citas Huérfanas', 'Fechas Inválidas', 'Sexo Inconsistente']
+    antes_prob = [metricas['integridad']['huerfanas']['antes'],
+                  problemas['fechas_cita_corregidas'], problemas['sexo_estandarizado']]
     despues_prob = [metricas['integridad']['huerfanas']['despues'], 0, 0]
     
-    x = np.arange(len(problemas))
+    x = np.arange(len(tipos_problema))
     axes[0,1].bar(x - width/2, antes_prob, width, label='Antes', alpha=0.7, color='red')
     axes[0,1].bar(x + width/2, despues_prob, width, label='Después', alpha=0.7, color='green')
     axes[0,1].set_title('Problemas Resueltos')
     axes[0,1].set_xticks(x)
-    axes[0,1].set_xticklabels(problemas, rotation=45)
+    axes[0,1].set_xticklabels(tipos_problema, rotation=45)
     axes[0,1].legend()
     
     # 3. Volumen de datos
@@ -227,10 +247,10 @@ def generar_visualizacion_comparativa(metricas):
     axes[1,0].set_xticklabels(volumenes)
     axes[1,0].legend()
     
-    # 4. Score de calidad (simulado)
+    # 4. Score de calidad medido
     categorias = ['Completitud', 'Consistencia', 'Integridad', 'Validez']
-    score_antes = [67, 25, 82, 45]  # Basado en análisis
-    score_despues = [85, 95, 100, 98]  # Post-limpieza
+    score_antes = [scores['antes'][categoria.lower()] for categoria in categorias]
+    score_despues = [scores['despues'][categoria.lower()] for categoria in categorias]
     
     x = np.arange(len(categorias))
     axes[1,1].bar(x - width/2, score_antes, width, label='Antes', alpha=0.7, color='orange')
@@ -242,141 +262,138 @@ def generar_visualizacion_comparativa(metricas):
     axes[1,1].set_ylim(0, 100)
     
     plt.tight_layout()
-    plt.savefig('../reportes/comparacion_antes_despues.png', dpi=300, bbox_inches='tight')
+    plt.savefig(ruta_imagen, dpi=300, bbox_inches='tight')
     plt.show()
+    plt.close(fig)
     
-    print("Visualización guardada en: reportes/comparacion_antes_despues.png")
+    print(f"Visualización guardada en: {ruta_imagen}")
 
-def generar_reporte_ejecutivo(validaciones, metricas, todas_validas):
-    """Genera reporte ejecutivo final"""
-    
-    fecha_actual = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+def contexto_reporte_ejecutivo(validacion, limpieza):
+    """Valores ya formateados de la plantilla del reporte ejecutivo"""
     
-    reporte = f"""
-===============================================================================
-REPORTE EJECUTIVO - LIMPIEZA DE DATOS HOSPITALARIOS
-===============================================================================
-
-FECHA: {fecha_actual}
-PROYECTO: Análisis y Limpieza de Datos Hospitalarios
-ESTADO: {"COMPLETADO EXITOSAMENTE" if todas_validas else "COMPLETADO CON OBSERVACIONES"}
-
-RESUMEN EJECUTIVO:
-Se ejecutó un proceso sistemático de limpieza de datos sobre un dataset hospitalario
-con 5,010 pacientes y 9,961 citas médicas. Los datos presentaban problemas críticos
-de calidad que fueron identificados, documentados y corregidos exitosamente.
-
-PROBLEMAS CRÍTICOS IDENTIFICADOS Y RESUELTOS:
-1. Fechas de citas inválidas: 3,314 casos (33.3% del total)
-   - Formatos incorrectos como "2023-19-01" (mes 19)
-   - SOLUCIÓN: Corrección algorítmica de meses >12
-
-2. Inconsistencias en formato de sexo: 2,021 casos
-   - Mezcla de Male/Female/M/F
-   - SOLUCIÓN: Estandarización a formato M/F
-
-3. Integridad referencial: 190 citas huérfanas
-   - Citas referenciando pacientes inexistentes
-   - SOLUCIÓN: Eliminación de registros órfanos
-
-4. Valores faltantes masivos:
-   - Edades: 1,647 casos (32.9%)
-   - Estados de cita: 2,542 casos (25.5%)
-   - SOLUCIÓN: Cálculo automático y lógica de negocio
-
-MEJORAS LOGRADAS:
-
-COMPLETITUD DE DATOS:
-- Sexo: {metricas['completitud']['sexo']['antes']:.1f}% → {metricas['completitud']['sexo']['despues']:.1f}%
-- Edad: {metricas['completitud']['edad']['antes']:.1f}% → {metricas['completitud']['edad']['despues']:.1f}%
-- Estados: {metricas['completitud']['estados']['antes']:.1f}% → {metricas['completitud']['estados']['despues']:.1f}%
-
-CONSISTENCIA:
-- Formato de sexo: 100% estandarizado a M/F
-- Fechas: Todas en formato ISO estándar
-- Estados: Solo valores válidos (Completada/Cancelada/Reprogramada)
-
-INTEGRIDAD:
-- Citas huérfanas: {metricas['integridad']['huerfanas']['antes']} → {metricas['integridad']['huerfanas']['despues']}
-- Referencias válidas: 100%
+    problemas = limpieza['problemas_resueltos']
+    nulos_antes = limpieza['nulos']['antes']
+    metricas = validacion['mejora']
+    completitud = metricas['completitud']
+    pacientes = metricas['volumen']['pacientes']['antes']
+    citas = metricas['volumen']['citas']['antes']
+    scores = validacion['scores']['despues']
+    todas_validas = validacion['aprobadas'] == validacion['total']
+    
+    return {
+        'fecha': validacion['generado'],
+        'estado': "COMPLETADO EXITOSAMENTE" if todas_validas else "COMPLETADO CON OBSERVACIONES",
+        'pacientes': f"{pacientes:,}",
+        'citas': f"{citas:,}",
+        'fechas_cita_corregidas': f"{problemas['fechas_cita_corregidas']:,}",
+        'pct_fechas_cita_corregidas': f"{problemas['fechas_cita_corregidas'] / citas * 100:.1f}",
+        'sexo_estandarizado': f"{problemas['sexo_estandarizado']:,}",
+        'citas_huerfanas_eliminadas': f"{problemas['citas_huerfanas_eliminadas']:,}",
+        'nulos_edad': f"{nulos_antes['pacientes']['edad']:,}",
+        'pct_nulos_edad': f"{nulos_antes['pacientes']['edad'] / pacientes * 100:.1f}",
+        'nulos_estado': f"{nulos_antes['citas']['estado_cita']:,}",
+        'pct_nulos_estado': f"{nulos_antes['citas']['estado_cita'] / citas * 100:.1f}",
+        'sexo_antes': f"{completitud['sexo']['antes']:.1f}",
+        'sexo_despues': f"{completitud['sexo']['despues']:.1f}",
+        'edad_antes': f"{completitud['edad']['antes']:.1f}",
+        'edad_despues': f"{completitud['edad']['despues']:.1f}",
+        'estados_antes': f"{completitud['estados']['antes']:.1f}",
+        'estados_despues': f"{completitud['estados']['despues']:.1f}",
+        'huerfanas_antes': str(metricas['integridad']['huerfanas']['antes']),
+        'huerfanas_despues': str(metricas['integridad']['huerfanas']['despues']),
+        'consistencia_despues': f"{scores['consistencia']:.1f}",
+        'integridad_despues': f"{scores['integridad']:.1f}",
+        'resultado_validaciones': ("✓ TODAS LAS VALIDACIONES PASARON" if todas_validas
+                                   else "⚠ ALGUNAS VALIDACIONES REQUIEREN ATENCIÓN"),
+        'resultados_validacion': "".join(f"- {v['validacion']}: {v['resultado']} - {v['detalle']}\n"
+                                         for v in validacion['validaciones']),
+    }
 
-VALIDACIONES POST-LIMPIEZA:
-{"✓ TODAS LAS VALIDACIONES PASARON" if todas_validas else "⚠ ALGUNAS VALIDACIONES REQUIEREN ATENCIÓN"}
+def generar_reporte_ejecutivo(manifiesto, formatos=FORMATOS, usar_cache=True, ruta_base=RUTA_REPORTE,
+                              ruta_cache=RUTA_CACHE, fuente=RUTA_ORIGINAL):
+    """Genera reporte ejecutivo final (plantillas/reporte_ejecutivo.txt) con las cifras del manifiesto"""
+    contexto = contexto_reporte_ejecutivo(metrica(manifiesto, 'validacion', fuente),
+                                          metrica(manifiesto, 'limpieza', fuente))
+    return renderizar_informe('reporte_ejecutivo', contexto, ruta_base, formatos,
+                              titulo='Reporte Ejecutivo - Limpieza de Datos Hospitalarios',
+                              ruta_cache=ruta_cache, usar_cache=usar_cache)
 
-Resultados de validación:
-"""
+def validar_dataset(ruta_original=RUTA_ORIGINAL, ruta_limpio=RUTA_LIMPIO, dir_resultados='../resultados',
+                    dir_reportes='../reportes'):
+    """Valida el dataset limpio, registra la etapa y genera gráfico y reporte ejecutivo
     
-    for test, resultado, detalle in validaciones:
-        reporte += f"- {test}: {resultado} - {detalle}\n"
-    
-    reporte += f"""
-
-SUPUESTOS ADOPTADOS:
-1. Fechas con mes >12 se corrigieron restando 12 (ej: mes 13 → mes 1)
-2. En discrepancias edad vs fecha nacimiento, se priorizó fecha nacimiento
-3. Estados faltantes se infirieron: fecha+costo=Completada, sin fecha=Cancelada
-4. Citas sin paciente válido se eliminaron para mantener integridad
-5. Fechas con día 33 se corrigieron a día 03
-
-ARCHIVOS GENERADOS:
-- dataset_hospital_limpio.json: Datos completos en formato JSON
-- pacientes_limpio.csv: Tabla de pacientes limpia
-- citas_limpio.csv: Tabla de citas limpia
-- log_limpieza_avanzada.txt: Log detallado del proceso
-- comparacion_antes_despues.png: Visualizaciones comparativas
-
-RECOMENDACIONES FUTURAS:
-1. Implementar validaciones en tiempo real durante captura
-2. Establecer catálogos controlados para campos categóricos
-3. Crear alertas automáticas para valores atípicos
-4. Documentar procedimientos de limpieza como estándar
-5. Capacitar al personal en estándares de calidad de datos
-
-CONCLUSIONES:
-El proceso de limpieza fue exitoso. Los datos están ahora en condiciones
-óptimas para análisis, reportes y uso en sistemas de producción.
-La calidad general mejoró significativamente en todas las dimensiones
-evaluadas (completitud, consistencia, integridad y validez).
-
-===============================================================================
-Reporte generado automáticamente por el sistema de limpieza avanzada
-===============================================================================
-"""
+    Requiere la etapa 'limpieza' en el manifiesto de dir_resultados
+    (MetricaNoDisponible si falta). Devuelve las métricas de la validación.
+    """
+    ruta_manifiesto = os.path.join(dir_resultados, 'manifiesto_ejecucion.json')
     
-    return reporte
-
-def main():
-    print("VALIDACIÓN FINAL Y REPORTE TÉCNICO")
-    print("=" * 80)
+    # Cifras de la limpieza registradas por 03_limpieza_avanzada.py
+    limpieza = metrica(leer_manifiesto(ruta_manifiesto), 'limpieza', ruta_original)
     
     # Cargar datos para comparación
-    df_pac_orig, df_citas_orig, df_pac_limpio, df_citas_limpio = cargar_datos_comparacion()
+    df_pac_orig, df_citas_orig, df_pac_limpio, df_citas_limpio = cargar_datos_comparacion(ruta_original, ruta_limpio)
+    exploracion = etapa_o_medir('exploracion', lambda: medir_exploracion(df_pac_orig, df_citas_orig),
+                                ruta_manifiesto, ruta_original)
     
     # Validar calidad post-limpieza
-    validaciones, todas_validas = validar_calidad_post_limpieza(df_pac_limpio, df_citas_limpio)
+    conteos = {}
+    validaciones, todas_validas = validar_calidad_post_limpieza(df_pac_limpio, df_citas_limpio, conteos)
     
-    # Calcular métricas de mejora
+    # Calcular métricas de mejora y scores de calidad
     metricas = calcular_metricas_mejora(df_pac_orig, df_citas_orig, df_pac_limpio, df_citas_limpio)
+    scores = {
+        'antes': medir_calidad(df_pac_orig, df_citas_orig, exploracion['defectos']['fechas_cita_invalidas']),
+        'despues': medir_calidad(df_pac_limpio, df_citas_limpio, conteos['fechas_cita_invalidas'])
+    }
+    
+    # Registrar la validación en el manifiesto de ejecución
+    manifiesto = registrar_etapa('validacion', {
+        'validaciones': [{'validacion': test, 'resultado': resultado, 'detalle': detalle}
+                         for test, resultado, detalle in validaciones],
+        'aprobadas': sum(resultado == "PASS" for _, resultado, _ in validaciones),
+        'total': len(validaciones),
+        'conteos': conteos,
+        'mejora': metricas,
+        'scores': scores
+    }, ruta_manifiesto, ruta_original)
     
     # Generar visualización comparativa
-    generar_visualizacion_comparativa(metricas)
+    generar_visualizacion_comparativa(metricas, limpieza['problemas_resueltos'], scores,
+                                      os.path.join(dir_reportes, 'comparacion_antes_despues.png'))
+    
+    # Generar reporte ejecutivo (texto, HTML y PDF)
+    generar_reporte_ejecutivo(manifiesto, ruta_base=os.path.join(dir_reportes, 'reporte_ejecutivo_final'),
+                              ruta_cache=os.path.join(dir_resultados, 'cache_informes.json'),
+                              fuente=ruta_original)
     
-    # Generar reporte ejecutivo
-    reporte = generar_reporte_ejecutivo(validaciones, metricas, todas_validas)
+    return manifiesto['validacion']
+
+def main():
+    parser = argparse.ArgumentParser(description="Validación final y reporte ejecutivo")
+    parser.add_argument('--original', default=RUTA_ORIGINAL, help="Dataset original")
+    parser.add_argument('--limpio', default=RUTA_LIMPIO, help="Dataset limpio")
+    parser.add_argument('--resultados', default='../resultados', help="Directorio del manifiesto")
+    parser.add_argument('--reportes', default='../reportes', help="Directorio de gráfico y reporte")
+    args = parser.parse_args()
+    
+    print("VALIDACIÓN FINAL Y REPORTE TÉCNICO")
+    print("=" * 80)
     
-    # Guardar reporte
-    with open('../reportes/reporte_ejecutivo_final.txt', 'w', encoding='utf-8') as f:
-        f.write(reporte)
+    try:
+        validacion = validar_dataset(args.original, args.limpio, args.resultados, args.reportes)
+    except MetricaNoDisponible as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    todas_validas = validacion['aprobadas'] == validacion['total']
     
     print(f"\n" + "="*80)
     print("PROCESO COMPLETO FINALIZADO")
     print("="*80)
     print("\nARCHIVOS FINALES GENERADOS:")
-    print("- reportes/reporte_ejecutivo_final.txt")
-    print("- reportes/comparacion_antes_despues.png")
-    print("- resultados/dataset_hospital_limpio.json")
-    print("- resultados/pacientes_limpio.csv")
-    print("- resultados/citas_limpio.csv")
+    print(f"- {os.path.join(args.reportes, 'reporte_ejecutivo_final')}.txt (.html, .pdf)")
+    print(f"- {os.path.join(args.reportes, 'comparacion_antes_despues.png')}")
+    print(f"- {args.limpio}")
+    print(f"- {os.path.join(args.resultados, 'manifiesto_ejecucion.json')}")
     
     if todas_validas:
         print("\n✓ PROYECTO COMPLETADO EXITOSAMENTE")
@@ -10,79 +10,344 @@ import numpy as np
 import json
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.offline
 from plotly.subplots import make_subplots
+import argparse
+import hashlib
+import os
+import sys
+import time
 from datetime import datetime
+from esquema_datos import cargar_dataset
+from historial_calidad import RUTA_HISTORIAL, leer_tendencia, registrar_ejecucion
+from metricas_ejecucion import MetricaNoDisponible, integridad_referencial, leer_manifiesto, metrica
 import warnings
 warnings.filterwarnings('ignore')
 
+# Granularidad del cubo de agregados; los cuartiles de costo salen de los
+# centros de bin, con un error de hasta ANCHO_BIN_COSTO / 2
+AÑOS_GRUPO_EDAD = 5
+ANCHO_BIN_COSTO = 10
+
+# Tamaño máximo del HTML generado; los trazos llevan agregados, no filas
+PRESUPUESTO_HTML_BYTES = 2 * 1024 * 1024
+
+# Estadísticas de los datos originales que deja 03_limpieza_avanzada.py
+RUTA_METRICAS_LIMPIEZA = '../reportes/metricas_limpieza.json'
+
+# Formas de cargar plotly.js: archivo local con hash, embebido o CDN (versión fija)
+MODOS_PLOTLY = ('archivo', 'inline', 'cdn')
+
+def cuantil_ponderado(valores, pesos, q):
+    """Cuantil q (interpolación lineal) de valores ordenados repetidos según pesos"""
+    acumulado = np.cumsum(pesos)
+    posicion = q * (acumulado[-1] - 1)
+    inferior = valores[np.searchsorted(acumulado, np.floor(posicion), side='right')]
+    superior = valores[np.searchsorted(acumulado, np.ceil(posicion), side='right')]
+    return inferior + (superior - inferior) * (posicion - np.floor(posicion))
+
+def estadisticas_caja(valores, pesos, media=None):
+    """Cuartiles, bigotes de Tukey y media a partir de un histograma de valores
+    
+    Si valores son centros de bin, cuartiles y bigotes pueden diferir de los
+    exactos hasta medio ancho de bin. media admite el promedio exacto
+    (suma / conteo); si no se da, se calcula sobre los centros.
+    """
+    orden = np.argsort(valores)
+    valores = np.asarray(valores, dtype=float)[orden]
+    pesos = np.asarray(pesos, dtype=float)[orden]
+    q1, mediana, q3 = (cuantil_ponderado(valores, pesos, q) for q in (0.25, 0.5, 0.75))
+    rango = q3 - q1
+    dentro = (valores >= q1 - 1.5 * rango) & (valores <= q3 + 1.5 * rango)
+    return {
+        'q1': round(float(q1), 2), 'mediana': round(float(mediana), 2), 'q3': round(float(q3), 2),
+        'bigote_inferior': round(float(valores[dentro].min()), 2),
+        'bigote_superior': round(float(valores[dentro].max()), 2),
+        'media': round(float(np.average(valores, weights=pesos) if media is None else media), 2)
+    }
+
+def script_plotly(modo, directorio):
+    """Etiqueta <script> de plotly.js y bytes de la librería embebidos en el HTML
+    
+    En modo 'archivo' la librería se escribe una sola vez junto al HTML con el
+    hash de su contenido en el nombre, así el navegador la cachea sin red.
+    """
+    version = plotly.offline.get_plotlyjs_version()
+    if modo == 'cdn':
+        return f'<script src="https://cdn.plot.ly/plotly-{version}.min.js"></script>', 0
+    
+    libreria = plotly.offline.get_plotlyjs()
+    if modo == 'inline':
+        return f'<script type="text/javascript">{libreria}</script>', len(libreria.encode('utf-8'))
+    
+    datos = libreria.encode('utf-8')
+    nombre = f"plotly-{version}.{hashlib.sha256(datos).hexdigest()[:12]}.min.js"
+    ruta = os.path.join(directorio, nombre)
+    if not os.path.exists(ruta):
+        with open(ruta, 'wb') as f:
+            f.write(datos)
+    return f'<script src="{nombre}"></script>', 0
+
+def escribir_html(ruta, contenido, presupuesto_bytes=PRESUPUESTO_HTML_BYTES, bytes_libreria=0):
+    """Escribe el HTML si cabe en el presupuesto de bytes y devuelve su tamaño
+    
+    bytes_libreria (plotly.js embebido) no cuenta contra el presupuesto.
+    """
+    datos = contenido.encode('utf-8')
+    propios = len(datos) - bytes_libreria
+    if presupuesto_bytes is not None and propios > presupuesto_bytes:
+        raise ValueError(f"El dashboard ocupa {propios:,} bytes y supera el "
+                         f"presupuesto de {presupuesto_bytes:,} bytes")
+    with open(ruta, 'wb') as f:
+        f.write(datos)
+    return len(datos)
+
+# Posición (fila, columna) de cada panel de datos en la cuadrícula del dashboard
+POSICIONES_PANELES = {
+    'especialidades': (2, 2),
+    'ciudades': (3, 1),
+    'estados': (3, 2),
+    'volumen': (3, 3),
+    'edades': (4, 1),
+    'costos': (4, 2),
+}
+
+def trazas_panel(nombre, datos):
+    """Trazas de plotly de un panel de datos a partir de sus agregados"""
+    if nombre == 'especialidades':
+        return [go.Bar(x=datos['x'], y=datos['y'],
+                       marker_color=['#3498db', '#e74c3c', '#2ecc71', '#f39c12', '#9b59b6'],
+                       name='Especialidades', text=datos['y'], textposition='outside')]
+    if nombre == 'ciudades':
+        return [go.Bar(x=datos['x'], y=datos['y'], marker_color='lightblue',
+                       name='Ciudades', text=datos['y'], textposition='outside')]
+    if nombre == 'estados':
+        return [go.Bar(x=datos['x'], y=datos['y'], marker_color=['#2ecc71', '#e74c3c', '#f39c12'],
+                       name='Estados', text=datos['y'], textposition='outside')]
+    if nombre == 'volumen':
+        return [
+            go.Bar(x=['Pacientes<br>Original', 'Citas<br>Original'], y=datos['original'],
+                   marker_color='lightcoral', name='Original',
+                   text=[f'{v:,}' for v in datos['original']], textposition='outside'),
+            go.Bar(x=['Pacientes<br>Final', 'Citas<br>Final'], y=datos['final'],
+                   marker_color='lightgreen', name='Final',
+                   text=[f'{v:,}' for v in datos['final']], textposition='outside')
+        ]
+    if nombre == 'edades':
+        if not datos['x']:
+            return []
+        return [go.Bar(x=datos['x'], y=datos['y'], width=datos['ancho'], marker_color='skyblue',
+                       marker_line=dict(color='white', width=1), name='Distribución de Edades')]
+    if nombre == 'costos':
+        colores_esp = ['#3498db', '#e74c3c', '#2ecc71', '#f39c12']
+        return [go.Box(x=[caja['especialidad']],
+                       q1=[caja['q1']], median=[caja['mediana']], q3=[caja['q3']],
+                       lowerfence=[caja['bigote_inferior']], upperfence=[caja['bigote_superior']],
+                       mean=[caja['media']], name=caja['especialidad'],
+                       marker_color=colores_esp[i] if i < len(colores_esp) else '#95a5a6')
+                for i, caja in enumerate(datos['cajas'])]
+    raise KeyError(f"Panel desconocido: {nombre}")
+
 class DashboardInteractivo:
     
+    # Tablas limpias de las que depende cada panel de datos
+    DEPENDENCIAS_PANELES = {
+        'especialidades': {'citas'},
+        'ciudades': {'pacientes'},
+        'estados': {'citas'},
+        'volumen': {'pacientes', 'citas'},
+        'edades': {'pacientes'},
+        'costos': {'citas'},
+    }
+    
     def __init__(self):
         self.datos_originales = None
         self.datos_limpios = None
         self.metricas = {}
-        
-    def cargar_datos(self):
+        self.cubo_citas = None
+        self.cubo_pacientes = None
+        self.estadisticas_originales = None
+        self.kpis_originales = None
+        self.tiempos_limpieza = {}
+        self.tendencia = None
+        self.problemas = None
+        
+    def cargar_datos(self, ruta_original='../datos/dataset_hospital.json',
+                     ruta_limpio='../resultados/dataset_hospital_limpio.json'):
         # Datos originales
-        with open('../datos/dataset_hospital.json', 'r', encoding='utf-8') as f:
-            datos_orig = json.load(f)
-        
-        self.datos_originales = {
-            'pacientes': pd.DataFrame(datos_orig['pacientes']),
-            'citas': pd.DataFrame(datos_orig['citas_medicas'])
-        }
+        pacientes, citas = cargar_dataset(ruta_original)
+        self.datos_originales = {'pacientes': pacientes, 'citas': citas}
+        self.estadisticas_originales = None
+        self.kpis_originales = None
         
         # Datos limpios
-        with open('../resultados/dataset_hospital_limpio.json', 'r', encoding='utf-8') as f:
-            datos_limpios = json.load(f)
-        
-        self.datos_limpios = {
-            'pacientes': pd.DataFrame(datos_limpios['pacientes']),
-            'citas': pd.DataFrame(datos_limpios['citas_medicas'])
+        pacientes, citas = cargar_dataset(ruta_limpio, limpio=True)
+        self.datos_limpios = {'pacientes': pacientes, 'citas': citas}
+    
+    def cargar_estadisticas_limpieza(self, ruta=RUTA_METRICAS_LIMPIEZA):
+        """Reutiliza los nulos por columna que el limpiador midió sobre los datos originales"""
+        try:
+            with open(ruta, encoding='utf-8') as f:
+                metricas = json.load(f)
+            estadisticas = metricas['estadisticas_iniciales']
+        except (FileNotFoundError, KeyError, ValueError):
+            return False
+        # Solo sirven si describen las mismas tablas originales
+        for tabla, df in self.datos_originales.items():
+            if estadisticas.get(tabla, {}).get('filas') != len(df) or \
+                    set(estadisticas[tabla]['nulos']) != set(df.columns):
+                return False
+        self.estadisticas_originales = estadisticas
+        self.kpis_originales = None
+        self.tiempos_limpieza = {}
+        for paso in metricas.get('pasos', []):
+            etapa = f"limpieza.{paso['paso']}"
+            self.tiempos_limpieza[etapa] = max(self.tiempos_limpieza.get(etapa, 0.0), paso['segundos'])
+        return True
+    
+    def medir_kpis(self, datos, estadisticas=None):
+        """Completitud, consistencia e integridad de un par de tablas (en %)
+        
+        La completitud sale de un solo notna().sum() por tabla, o de las
+        estadísticas de nulos del limpiador si se pasan.
+        """
+        if estadisticas is None:
+            proporciones = [datos[tabla][self.datos_originales[tabla].columns].notna().sum() / len(datos[tabla])
+                            for tabla in ('pacientes', 'citas')]
+        else:
+            proporciones = [1 - pd.Series(estadisticas[tabla]['nulos']) / estadisticas[tabla]['filas']
+                            for tabla in ('pacientes', 'citas')]
+        return {
+            'completitud': float(pd.concat(proporciones).mean() * 100),
+            'consistencia': float(datos['pacientes']['sexo'].isin(['M', 'F']).mean() * 100),
+            'integridad': integridad_referencial(datos['pacientes'], datos['citas'])
         }
     
     def calcular_kpis_principales(self):
-        # Completitud
-        completitud_orig = []
-        completitud_limpio = []
-        
-        for tabla in ['pacientes', 'citas']:
-            for col in self.datos_originales[tabla].columns:
-                pct_orig = (self.datos_originales[tabla][col].notna().sum() / 
-                           len(self.datos_originales[tabla])) * 100
-                pct_limpio = (self.datos_limpios[tabla][col].notna().sum() / 
-                             len(self.datos_limpios[tabla])) * 100
-                completitud_orig.append(pct_orig)
-                completitud_limpio.append(pct_limpio)
-        
-        score_completitud_orig = np.mean(completitud_orig)
-        score_completitud_limpio = np.mean(completitud_limpio)
-        
-        # Consistencia
-        sexo_consistente_orig = len(self.datos_originales['pacientes'][
-            self.datos_originales['pacientes']['sexo'].isin(['M', 'F'])
-        ]) / len(self.datos_originales['pacientes']) * 100
-        
-        sexo_consistente_limpio = len(self.datos_limpios['pacientes'][
-            self.datos_limpios['pacientes']['sexo'].isin(['M', 'F'])
-        ]) / len(self.datos_limpios['pacientes']) * 100
-        
-        # Integridad
-        pac_ids_orig = set(self.datos_originales['pacientes']['id_paciente'])
-        citas_ids_orig = set(self.datos_originales['citas']['id_paciente'])
-        integridad_orig = (1 - len(citas_ids_orig - pac_ids_orig) / len(citas_ids_orig)) * 100
-        
-        integridad_limpio = 100.0  # Sabemos que está limpio
+        # Los datos originales no cambian: sus KPIs se calculan una sola vez
+        if self.kpis_originales is None:
+            self.kpis_originales = self.medir_kpis(self.datos_originales, self.estadisticas_originales)
+        kpis_limpios = self.medir_kpis(self.datos_limpios)
         
         self.metricas = {
-            'completitud': {'original': score_completitud_orig, 'limpio': score_completitud_limpio},
-            'consistencia': {'original': sexo_consistente_orig, 'limpio': sexo_consistente_limpio},
-            'integridad': {'original': integridad_orig, 'limpio': integridad_limpio}
+            kpi: {'original': self.kpis_originales[kpi], 'limpio': kpis_limpios[kpi]}
+            for kpi in ('completitud', 'consistencia', 'integridad')
         }
     
+    def construir_cubo(self, tablas=('pacientes', 'citas')):
+        """Agrega los datos limpios una sola vez en cubos que consultan los paneles
+        
+        cubo_citas: citas por (ciudad, especialidad, estado_cita, año_mes,
+        grupo_edad, costo_bin) con conteos y suma de costos; el bin de costo
+        funciona como histograma para los cuantiles. cubo_pacientes: pacientes
+        por (ciudad, grupo_edad), para los paneles a nivel de paciente. tablas
+        indica qué tablas cambiaron: el cubo de pacientes solo se reconstruye
+        si cambiaron los pacientes.
+        """
+        pacientes = self.datos_limpios['pacientes']
+        citas = self.datos_limpios['citas']
+        
+        edad = pd.to_numeric(pacientes['edad'], errors='coerce')
+        atributos = pd.DataFrame({
+            'id_paciente': pacientes['id_paciente'],
+            'ciudad': pacientes['ciudad'],
+            'grupo_edad': (edad // AÑOS_GRUPO_EDAD * AÑOS_GRUPO_EDAD).astype('Int16')
+        })
+        if 'pacientes' in tablas or self.cubo_pacientes is None:
+            self.cubo_pacientes = (atributos.groupby(['ciudad', 'grupo_edad'], dropna=False, observed=True)
+                                   .size().rename('pacientes').reset_index())
+        
+        # Los IDs de paciente duplicados toman los atributos del primer registro
+        atributos = atributos.drop_duplicates('id_paciente')
+        costo = pd.to_numeric(citas['costo'], errors='coerce')
+        hechos = pd.DataFrame({
+            'id_paciente': citas['id_paciente'],
+            'especialidad': citas['especialidad'],
+            'estado_cita': citas['estado_cita'],
+            'año_mes': pd.to_datetime(citas['fecha_cita'], errors='coerce').dt.to_period('M'),
+            'costo_bin': (costo / ANCHO_BIN_COSTO).round() * ANCHO_BIN_COSTO,
+            'costo': costo
+        }).merge(atributos, on='id_paciente', how='left')
+        
+        claves = ['ciudad', 'especialidad', 'estado_cita', 'año_mes', 'grupo_edad', 'costo_bin']
+        self.cubo_citas = (hechos.groupby(claves, dropna=False, observed=True)
+                           .agg(citas=('id_paciente', 'size'),
+                                costo_n=('costo', 'count'),
+                                costo_suma=('costo', 'sum'))
+                           .reset_index())
+        
+        print(f"Cubo de agregados: {len(self.cubo_citas):,} celdas de citas, "
+              f"{len(self.cubo_pacientes):,} de pacientes")
+    
+    def contar_en_cubo(self, cubo, dimension, medida):
+        """Total de una medida por valor de una dimensión, de mayor a menor"""
+        return (cubo.groupby(dimension, observed=True)[medida].sum()
+                .sort_values(ascending=False, kind='stable'))
+    
+    def panel_especialidades(self):
+        """Top 5 de especialidades por número de citas"""
+        especialidades = self.contar_en_cubo(self.cubo_citas, 'especialidad', 'citas').head(5)
+        return {'x': especialidades.index.astype(str).tolist(), 'y': especialidades.tolist()}
+    
+    def panel_ciudades(self):
+        """Top 5 de ciudades por número de pacientes"""
+        ciudades = self.contar_en_cubo(self.cubo_pacientes, 'ciudad', 'pacientes').head(5)
+        return {'x': ciudades.index.astype(str).tolist(), 'y': ciudades.tolist()}
+    
+    def panel_estados(self):
+        """Citas por estado"""
+        estados = self.contar_en_cubo(self.cubo_citas, 'estado_cita', 'citas')
+        return {'x': estados.index.astype(str).tolist(), 'y': estados.tolist()}
+    
+    def panel_volumen(self):
+        """Registros de pacientes y citas antes y después de la limpieza"""
+        return {
+            'original': [len(self.datos_originales['pacientes']), len(self.datos_originales['citas'])],
+            'final': [len(self.datos_limpios['pacientes']), len(self.datos_limpios['citas'])]
+        }
+    
+    def panel_edades(self):
+        """Bins precalculados de pacientes por grupo de edad"""
+        edades = self.cubo_pacientes.groupby('grupo_edad')['pacientes'].sum()
+        return {
+            'x': (edades.index.to_numpy(dtype=int) + AÑOS_GRUPO_EDAD / 2).tolist(),
+            'y': edades.tolist(),
+            'ancho': AÑOS_GRUPO_EDAD
+        }
+    
+    def panel_costos(self):
+        """Cajas de costos de las 4 especialidades con más costos registrados
+        
+        Cuartiles y bigotes salen del histograma de costo_bin (error de hasta
+        ANCHO_BIN_COSTO / 2); la media es exacta, de costo_suma / costo_n.
+        """
+        costos = (self.cubo_citas[self.cubo_citas['costo_n'] > 0]
+                  .groupby(['especialidad', 'costo_bin'], observed=True)[['costo_n', 'costo_suma']].sum())
+        cajas = []
+        if len(costos) > 0:
+            totales = costos.groupby(level=0, observed=True).sum()
+            especialidades_para_costos = totales['costo_n'] \
+                .sort_values(ascending=False, kind='stable').head(4).index
+            for esp in especialidades_para_costos:
+                histograma = costos.loc[esp, 'costo_n']
+                media = totales.loc[esp, 'costo_suma'] / totales.loc[esp, 'costo_n']
+                caja = estadisticas_caja(histograma.index.to_numpy(), histograma.to_numpy(), media)
+                cajas.append({'especialidad': str(esp), **caja})
+        return {'cajas': cajas}
+    
+    def agregados_paneles(self, nombres=None):
+        """Agregados JSON de los paneles de datos indicados (todos por defecto)"""
+        if self.cubo_citas is None:
+            self.construir_cubo()
+        return {nombre: getattr(self, f'panel_{nombre}')()
+                for nombre in (nombres or POSICIONES_PANELES)}
+    
     def crear_dashboard_final(self):
         """Dashboard final con todos los gráficos funcionando"""
         
+        if self.cubo_citas is None:
+            self.construir_cubo()
+        
         fig = make_subplots(
             rows=4, cols=3,
             subplot_titles=[
@@ -95,7 +360,7 @@ class DashboardInteractivo:
                 [{"type": "indicator"}, {"type": "indicator"}, {"type": "indicator"}],
                 [{"type": "scatter"}, {"type": "bar"}, {"type": "bar"}],
                 [{"type": "bar"}, {"type": "bar"}, {"type": "bar"}],
-                [{"type": "histogram"}, {"type": "box"}, {"type": "bar"}]
+                [{"type": "bar"}, {"type": "box"}, {"type": "bar"}]
             ],
             vertical_spacing=0.08
         )
@@ -132,45 +397,47 @@ class DashboardInteractivo:
         ), row=1, col=3)
         
         # Fila 2: Análisis de mejora
-        # Evolución de calidad
-        categorias = ['Completitud', 'Consistencia', 'Integridad']
-        antes = [self.metricas['completitud']['original'], 
-                self.metricas['consistencia']['original'],
-                self.metricas['integridad']['original']]
-        despues = [self.metricas['completitud']['limpio'],
-                  self.metricas['consistencia']['limpio'],
-                  self.metricas['integridad']['limpio']]
-        
-        fig.add_trace(go.Scatter(
-            x=categorias, y=antes, mode='lines+markers+text',
-            name='Antes', line=dict(color='red', width=3),
-            marker=dict(size=12),
-            text=[f'{v:.1f}%' for v in antes],
-            textposition='top center'
-        ), row=2, col=1)
-        
-        fig.add_trace(go.Scatter(
-            x=categorias, y=despues, mode='lines+markers+text',
-            name='Después', line=dict(color='green', width=3),
-            marker=dict(size=12),
-            text=[f'{v:.1f}%' for v in despues],
-            textposition='bottom center'
-        ), row=2, col=1)
-        
-        # Especialidades médicas
-        especialidades = self.datos_limpios['citas']['especialidad'].value_counts().head(5)
-        fig.add_trace(go.Bar(
-            x=especialidades.index, 
-            y=especialidades.values,
-            marker_color=['#3498db', '#e74c3c', '#2ecc71', '#f39c12', '#9b59b6'],
-            name='Especialidades',
-            text=especialidades.values,
-            textposition='outside'
-        ), row=2, col=2)
-        
-        # Problemas solucionados
+        # Evolución de calidad: tendencia del historial, o antes/después si aún no hay historia
+        if self.tendencia is not None and len(self.tendencia) >= 2:
+            colores_kpi = {'completitud': 'darkgreen', 'consistencia': 'darkblue', 'integridad': 'darkorange'}
+            for kpi, color in colores_kpi.items():
+                fig.add_trace(go.Scatter(
+                    x=self.tendencia['fecha'], y=self.tendencia[kpi].round(2),
+                    mode='lines+markers', name=kpi.capitalize(),
+                    line=dict(color=color, width=3), marker=dict(size=8)
+                ), row=2, col=1)
+        else:
+            categorias = ['Completitud', 'Consistencia', 'Integridad']
+            antes = [self.metricas['completitud']['original'], 
+                    self.metricas['consistencia']['original'],
+                    self.metricas['integridad']['original']]
+            despues = [self.metricas['completitud']['limpio'],
+                      self.metricas['consistencia']['limpio'],
+                      self.metricas['integridad']['limpio']]
+            
+            fig.add_trace(go.Scatter(
+                x=categorias, y=antes, mode='lines+markers+text',
+                name='Antes', line=dict(color='red', width=3),
+                marker=dict(size=12),
+                text=[f'{v:.1f}%' for v in antes],
+                textposition='top center'
+            ), row=2, col=1)
+            
+            fig.add_trace(go.Scatter(
+                x=categorias, y=despues, mode='lines+markers+text',
+                name='Después', line=dict(color='green', width=3),
+                marker=dict(size=12),
+                text=[f'{v:.1f}%' for v in despues],
+                textposition='bottom center'
+            ), row=2, col=1)
+        
+        # Problemas solucionados (medidos por la limpieza, desde el manifiesto de ejecución)
+        if self.problemas is None:
+            self.problemas = metrica(leer_manifiesto(), 'limpieza.problemas_resueltos')
         problemas = ['Fechas<br>Inválidas', 'Formato<br>Sexo', 'Citas<br>Huérfanas']
-        cantidad_problemas = [3314, 2021, 190]
+        cantidad_problemas = [self.problemas['fechas_cita_corregidas'],
+                              self.problemas['sexo_estandarizado'],
+                              self.problemas['citas_huerfanas_eliminadas']]
         
         fig.add_trace(go.Bar(
             x=problemas, 
@@ -181,95 +448,11 @@ class DashboardInteractivo:
             textposition='outside'
         ), row=2, col=3)
         
-        # Fila 3: Análisis operacional
-        # Distribución por ciudad
-        ciudades = self.datos_limpios['pacientes']['ciudad'].value_counts().head(5)
-        fig.add_trace(go.Bar(
-            x=ciudades.index, 
-            y=ciudades.values,
-            marker_color='lightblue',
-            name='Ciudades',
-            text=ciudades.values,
-            textposition='outside'
-        ), row=3, col=1)
-        
-        # Estados de citas
-        estados = self.datos_limpios['citas']['estado_cita'].value_counts()
-        fig.add_trace(go.Bar(
-            x=estados.index, 
-            y=estados.values,
-            marker_color=['#2ecc71', '#e74c3c', '#f39c12'],
-            name='Estados',
-            text=estados.values,
-            textposition='outside'
-        ), row=3, col=2)
-        
-        # Volumen de registros
-        categorias_vol = ['Pacientes', 'Citas']
-        vol_orig = [len(self.datos_originales['pacientes']), len(self.datos_originales['citas'])]
-        vol_limpio = [len(self.datos_limpios['pacientes']), len(self.datos_limpios['citas'])]
-        
-        fig.add_trace(go.Bar(
-            x=['Pacientes<br>Original', 'Citas<br>Original'], 
-            y=vol_orig,
-            marker_color='lightcoral',
-            name='Original',
-            text=[f'{v:,}' for v in vol_orig],
-            textposition='outside'
-        ), row=3, col=3)
-        
-        fig.add_trace(go.Bar(
-            x=['Pacientes<br>Final', 'Citas<br>Final'], 
-            y=vol_limpio,
-            marker_color='lightgreen',
-            name='Final',
-            text=[f'{v:,}' for v in vol_limpio],
-            textposition='outside'
-        ), row=3, col=3)
-        
-        # Fila 4: Análisis detallado
-        # Distribución de edades (CORREGIDA)
-        print("Procesando edades...")
-        edades_col = self.datos_limpios['pacientes']['edad']
-        print(f"Tipo de datos edad: {edades_col.dtype}")
-        print(f"Valores únicos edad: {edades_col.nunique()}")
-        
-        # Convertir a numérico de forma segura
-        edades_numericas = pd.to_numeric(edades_col, errors='coerce').dropna()
-        print(f"Edades numéricas válidas: {len(edades_numericas)}")
-        
-        if len(edades_numericas) > 0:
-            fig.add_trace(go.Histogram(
-                x=edades_numericas, 
-                nbinsx=20,
-                marker_color='skyblue',
-                name='Distribución de Edades'
-            ), row=4, col=1)
-        
-        # Análisis de costos por especialidad (CORREGIDO)
-        print("Procesando costos...")
-        citas_con_datos = self.datos_limpios['citas'][
-            (self.datos_limpios['citas']['costo'].notna()) & 
-            (self.datos_limpios['citas']['especialidad'].notna())
-        ].copy()
-        
-        # Convertir costos a numérico
-        citas_con_datos['costo_num'] = pd.to_numeric(citas_con_datos['costo'], errors='coerce')
-        citas_con_datos = citas_con_datos[citas_con_datos['costo_num'].notna()]
-        
-        print(f"Citas con costos válidos: {len(citas_con_datos)}")
-        
-        if len(citas_con_datos) > 0:
-            especialidades_para_costos = citas_con_datos['especialidad'].value_counts().head(4).index
-            colores_esp = ['#3498db', '#e74c3c', '#2ecc71', '#f39c12']
-            
-            for i, esp in enumerate(especialidades_para_costos):
-                costos_esp = citas_con_datos[citas_con_datos['especialidad'] == esp]['costo_num']
-                fig.add_trace(go.Box(
-                    y=costos_esp,
-                    name=esp,
-                    marker_color=colores_esp[i] if i < len(colores_esp) else '#95a5a6'
-                ), row=4, col=2)
+        # Paneles de datos: agregados del cubo convertidos en trazas
+        agregados = self.agregados_paneles()
+        for nombre, (fila, columna) in POSICIONES_PANELES.items():
+            for traza in trazas_panel(nombre, agregados[nombre]):
+                fig.add_trace(traza, row=fila, col=columna)
         
         # Fases del proyecto
         fases = ['Análisis', 'Diagnóstico', 'Limpieza', 'Validación', 'Dashboard']
@@ -307,13 +490,46 @@ class DashboardInteractivo:
         
         return fig
     
-    def generar_dashboard_interactivo(self):
-        """Genera el dashboard interactivo final"""
+    def registrar_en_historial(self, tiempos, ruta=RUTA_HISTORIAL, puntos=50):
+        """Agrega KPIs, filas y tiempos de esta ejecución al historial y lee la tendencia"""
+        registrar_ejecucion(
+            {kpi: valores['limpio'] for kpi, valores in self.metricas.items()},
+            {tabla: len(df) for tabla, df in self.datos_limpios.items()},
+            {**self.tiempos_limpieza, **tiempos},
+            ruta
+        )
+        self.tendencia = leer_tendencia(ruta, puntos)
+    
+    def generar_dashboard_interactivo(self, ruta_salida='../reportes/dashboard_interactivo.html',
+                                      presupuesto_bytes=PRESUPUESTO_HTML_BYTES, modo_plotly='archivo',
+                                      ruta_historial=RUTA_HISTORIAL):
+        """Genera el dashboard interactivo final dentro del presupuesto de bytes
+        
+        Con ruta_historial (None lo desactiva) la ejecución se agrega al
+        historial de calidad y el panel de evolución muestra la tendencia.
+        """
         
         print("GENERANDO DASHBOARD INTERACTIVO...")
         
+        self.problemas = metrica(leer_manifiesto(), 'limpieza.problemas_resueltos')
+        
+        tiempos = {}
+        inicio = time.perf_counter()
         self.cargar_datos()
+        tiempos['dashboard.carga'] = time.perf_counter() - inicio
+        if self.cargar_estadisticas_limpieza():
+            print("Completitud original tomada de reportes/metricas_limpieza.json")
+        inicio = time.perf_counter()
         self.calcular_kpis_principales()
+        tiempos['dashboard.kpis'] = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        self.construir_cubo()
+        tiempos['dashboard.cubo'] = time.perf_counter() - inicio
+        
+        if ruta_historial is not None:
+            self.registrar_en_historial(tiempos, ruta_historial)
+            print(f"Ejecución registrada en {ruta_historial} "
+                  f"({self.tendencia['ejecuciones'].sum()} en el historial)")
         
         dashboard = self.crear_dashboard_final()
         
@@ -329,13 +545,16 @@ class DashboardInteractivo:
             self.metricas['integridad']['original']
         ])
         
+        etiqueta_plotly, bytes_libreria = script_plotly(
+            modo_plotly, os.path.dirname(os.path.abspath(ruta_salida)))
+        
         html_content = f"""
 <!DOCTYPE html>
 <html>
 <head>
     <title>Dashboard Interactivo - Calidad de Datos</title>
     <meta charset="utf-8">
-    <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+    {etiqueta_plotly}
     <style>
         body {{
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
@@ -479,7 +698,7 @@ class DashboardInteractivo:
     </div>
     
     <div class="dashboard-container">
-        {dashboard.to_html(include_plotlyjs=False, div_id="dashboard")}
+        {dashboard.to_html(include_plotlyjs=False, full_html=False, div_id="dashboard")}
     </div>
     
     <div class="project-summary">
@@ -489,22 +708,22 @@ class DashboardInteractivo:
             
             <div class="summary-stat">
                 <strong>Problemas Críticos Identificados:</strong>
-                <span>5,525 casos totales</span>
+                <span>{self.problemas['total']:,} casos totales</span>
             </div>
             
             <div class="summary-stat">
                 <strong>Fechas Corregidas:</strong>
-                <span>3,314 fechas de citas inválidas</span>
+                <span>{self.problemas['fechas_cita_corregidas']:,} fechas de citas inválidas</span>
             </div>
             
             <div class="summary-stat">
                 <strong>Formatos Estandarizados:</strong>
-                <span>2,021 registros de sexo normalizados</span>
+                <span>{self.problemas['sexo_estandarizado']:,} registros de sexo normalizados</span>
             </div>
             
             <div class="summary-stat">
                 <strong>Integridad Restaurada:</strong>
-                <span>190 citas huérfanas eliminadas</span>
+                <span>{self.problemas['citas_huerfanas_eliminadas']:,} citas huérfanas eliminadas</span>
             </div>
             
             <p>Los datos procesados ahora cumplen con estándares de calidad empresarial y están listos para su uso en análisis avanzados, reportes ejecutivos y sistemas de producción.</p>
@@ -519,14 +738,34 @@ class DashboardInteractivo:
 </html>
 """
         
-        with open('../reportes/dashboard_interactivo.html', 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        tamaño = escribir_html(ruta_salida, html_content, presupuesto_bytes, bytes_libreria)
         
-        print("Dashboard interactivo guardado en: reportes/dashboard_interactivo.html")
+        print(f"Dashboard interactivo guardado en: {ruta_salida}")
+        print(f"Tamaño del HTML: {tamaño / 1024:,.1f} KB, plotly.js {modo_plotly} "
+              f"(presupuesto sin la librería: {presupuesto_bytes / 1024:,.0f} KB)")
 
 def main():
+    parser = argparse.ArgumentParser(description="Dashboard interactivo de calidad de datos")
+    parser.add_argument('--salida', default='../reportes/dashboard_interactivo.html',
+                        help="Ruta del HTML generado")
+    parser.add_argument('--presupuesto-kb', type=int, default=PRESUPUESTO_HTML_BYTES // 1024,
+                        help="Tamaño máximo del HTML en KB, sin contar plotly.js embebido")
+    parser.add_argument('--historial', default=RUTA_HISTORIAL,
+                        help="Base SQLite del historial de calidad")
+    parser.add_argument('--sin-historial', action='store_true',
+                        help="No registra la ejecución ni muestra la tendencia")
+    parser.add_argument('--plotly', choices=MODOS_PLOTLY, default='archivo',
+                        help="archivo: plotly.js local con hash junto al HTML (sin red); "
+                             "inline: embebido en el HTML; cdn: versión fija desde cdn.plot.ly")
+    args = parser.parse_args()
+    
     dashboard = DashboardInteractivo()
-    dashboard.generar_dashboard_interactivo()
+    try:
+        dashboard.generar_dashboard_interactivo(args.salida, args.presupuesto_kb * 1024, args.plotly,
+                                                None if args.sin_historial else args.historial)
+    except (ValueError, MetricaNoDisponible) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
     
     print("\nDASHBOARD INTERACTIVO COMPLETADO")
     print("="*50)
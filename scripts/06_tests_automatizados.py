@@ -7,21 +7,23 @@ Suite completa de tests para validación continua
 
 import pandas as pd
 import pytest
+import argparse
 import json
+import os
 from datetime import datetime, date
 import numpy as np
+from esquema_datos import cargar_dataset
+from metricas_ejecucion import RUTA_ORIGINAL, registrar_etapa
+
+RUTA_LIMPIO = '../resultados/dataset_hospital_limpio.json'
 
 class TestSuiteAvanzado:
     """Suite completa de tests para datos hospitalarios"""
     
     @classmethod
-    def setup_class(cls):
+    def setup_class(cls, ruta_datos=RUTA_LIMPIO):
         """Configuración inicial para todos los tests"""
-        with open('../resultados/dataset_hospital_limpio.json', 'r', encoding='utf-8') as f:
-            datos = json.load(f)
-        
-        cls.df_pacientes = pd.DataFrame(datos['pacientes'])
-        cls.df_citas = pd.DataFrame(datos['citas_medicas'])
+        cls.df_pacientes, cls.df_citas = cargar_dataset(ruta_datos, limpio=True)
     
     def test_integridad_estructural(self):
         """Test de integridad estructural de las tablas"""
@@ -133,7 +135,8 @@ class TestSuiteAvanzado:
         ratio = len(self.df_citas) / len(self.df_pacientes)
         assert 1 <= ratio <= 5, f"Ratio citas/pacientes anómalo: {ratio:.2f}"
 
-def ejecutar_tests_completos():
+def ejecutar_tests_completos(ruta_limpio=RUTA_LIMPIO, dir_reportes='../reportes', dir_resultados='../resultados',
+                             ruta_original=RUTA_ORIGINAL):
     """Ejecuta suite completa de tests"""
     
     print("EJECUTANDO SUITE COMPLETA DE TESTS AUTOMÁTICOS")
@@ -141,7 +144,7 @@ def ejecutar_tests_completos():
     
     # Crear instancia de tests
     test_suite = TestSuiteAvanzado()
-    test_suite.setup_class()
+    test_suite.setup_class(ruta_limpio)
     
     # Lista de tests a ejecutar
     tests = [
@@ -211,16 +214,34 @@ RECOMENDACIONES:
 - Actualizar tests cuando cambien los requisitos de negocio
 """
     
-    with open('../reportes/reporte_tests_automaticos.txt', 'w', encoding='utf-8') as f:
+    ruta_reporte = os.path.join(dir_reportes, 'reporte_tests_automaticos.txt')
+    with open(ruta_reporte, 'w', encoding='utf-8') as f:
         f.write(reporte_tests)
     
-    print(f"\nReporte guardado en: reportes/reporte_tests_automaticos.txt")
+    registrar_etapa('tests', {
+        'total': total_tests,
+        'pasados': tests_pasados,
+        'resultados': [{'test': nombre, 'resultado': resultado, 'detalle': detalle}
+                       for nombre, resultado, detalle in resultados]
+    }, os.path.join(dir_resultados, 'manifiesto_ejecucion.json'), ruta_original)
+    
+    print(f"\nReporte guardado en: {ruta_reporte}")
     
     return tests_pasados == total_tests
 
-if __name__ == "__main__":
-    exito = ejecutar_tests_completos()
+def main():
+    parser = argparse.ArgumentParser(description="Suite de tests automáticos sobre el dataset limpio")
+    parser.add_argument('--limpio', default=RUTA_LIMPIO, help="Dataset limpio a validar")
+    parser.add_argument('--original', default=RUTA_ORIGINAL, help="Dataset original (firma del manifiesto)")
+    parser.add_argument('--resultados', default='../resultados', help="Directorio del manifiesto")
+    parser.add_argument('--reportes', default='../reportes', help="Directorio del reporte de tests")
+    args = parser.parse_args()
+    
+    exito = ejecutar_tests_completos(args.limpio, args.reportes, args.resultados, args.original)
     if exito:
         print("\nTODOS LOS TESTS PASARON - DATOS VALIDADOS")
     else:
-        print("\nALGUNOS TESTS FALLARON - REVISAR PROBLEMAS")
\ No newline at end of file
+        print("\nALGUNOS TESTS FALLARON - REVISAR PROBLEMAS")
+
+if __name__ == "__main__":
+    main()
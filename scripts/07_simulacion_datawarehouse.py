@@ -5,34 +5,169 @@ PASO 7: SIMULACIÓN DE MIGRACIÓN A DATA WAREHOUSE
 Simula la carga de datos limpios a estructura de Data Warehouse
 """
 
+import numpy as np
 import pandas as pd
+import argparse
 import json
+import os
+import re
 import sqlite3
 from datetime import datetime
+from esquema_datos import cargar_dataset
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+RUTA_LIMPIO = '../resultados/dataset_hospital_limpio.json'
+
+class MotorSQLite:
+    """Motor de almacenamiento por filas (SQLite)"""
+    
+    nombre = 'sqlite'
+    extension = '.db'
+    
+    def __init__(self, ruta):
+        self.conn = sqlite3.connect(ruta)
+    
+    def ejecutar(self, sql, parametros=()):
+        cursor = self.conn.cursor()
+        cursor.execute(sql, parametros)
+        return cursor.fetchall()
+    
+    def consultar(self, sql):
+        return pd.read_sql(sql, self.conn)
+    
+    def escribir_tabla(self, df, tabla, modo='replace'):
+        df.to_sql(tabla, self.conn, if_exists=modo, index=False)
+    
+    def tipo_objeto(self, nombre):
+        """Devuelve 'table', 'view' o None"""
+        filas = self.ejecutar("SELECT type FROM sqlite_master WHERE name = ?", (nombre,))
+        return filas[0][0] if filas else None
+    
+    def adaptar_ddl(self, sql):
+        return sql
+    
+    def commit(self):
+        self.conn.commit()
+    
+    def cerrar(self):
+        self.conn.close()
+
+class MotorDuckDB:
+    """Motor columnar embebido (DuckDB) con el mismo esquema estrella"""
+    
+    nombre = 'duckdb'
+    extension = '.duckdb'
+    
+    def __init__(self, ruta):
+        if duckdb is None:
+            raise ImportError("El motor 'duckdb' requiere el paquete duckdb (pip install duckdb)")
+        self.conn = duckdb.connect(ruta)
+    
+    def ejecutar(self, sql, parametros=()):
+        self.conn.execute(sql, list(parametros))
+        try:
+            return self.conn.fetchall()
+        except duckdb.Error:
+            return []
+    
+    def consultar(self, sql):
+        return self.conn.execute(sql).df()
+    
+    def escribir_tabla(self, df, tabla, modo='replace'):
+        self.conn.register('_df_carga', df)
+        try:
+            if modo == 'replace':
+                self.conn.execute(f"CREATE OR REPLACE TABLE {tabla} AS SELECT * FROM _df_carga")
+            else:
+                columnas = ', '.join(df.columns)
+                self.conn.execute(f"INSERT INTO {tabla} ({columnas}) SELECT {columnas} FROM _df_carga")
+        finally:
+            self.conn.unregister('_df_carga')
+    
+    def tipo_objeto(self, nombre):
+        filas = self.ejecutar(
+            "SELECT table_type FROM information_schema.tables WHERE table_name = ?", (nombre,)
+        )
+        if not filas:
+            return None
+        return 'view' if filas[0][0] == 'VIEW' else 'table'
+    
+    def adaptar_ddl(self, sql):
+        # Las dimensiones se reemplazan completas en cada carga, así que
+        # DuckDB no puede mantener claves foráneas hacia ellas
+        sql = re.sub(r',\s*FOREIGN KEY \([^)]*\) REFERENCES [^,)]*\([^)]*\)', '', sql)
+        return sql
+    
+    def commit(self):
+        pass
+    
+    def cerrar(self):
+        self.conn.close()
+
+MOTORES_DW = {
+    'sqlite': MotorSQLite,
+    'duckdb': MotorDuckDB,
+}
+
 class DataWarehouseSimulator:
     """Simulador de migración a Data Warehouse"""
     
-    def __init__(self):
+    # Los hechos se guardan en una tabla por año de la cita, unidas por una vista
+    VISTA_HECHOS = 'fact_citas_medicas'
+    PARTICION_SIN_FECHA = 'fact_citas_medicas_sin_fecha'
+    
+    SQL_PARTICION_HECHOS = """
+    CREATE TABLE IF NOT EXISTS {tabla} (
+        sk_cita INTEGER PRIMARY KEY,
+        id_cita_source VARCHAR(50),
+        sk_paciente INTEGER,
+        sk_medico INTEGER,
+        sk_especialidad INTEGER,
+        sk_fecha_cita INTEGER,
+        sk_fecha_carga INTEGER,
+        costo DECIMAL(10,2),
+        estado_cita VARCHAR(20),
+        FOREIGN KEY (sk_paciente) REFERENCES dim_pacientes(sk_paciente),
+        FOREIGN KEY (sk_medico) REFERENCES dim_medicos(sk_medico),
+        FOREIGN KEY (sk_especialidad) REFERENCES dim_especialidades(sk_especialidad),
+        FOREIGN KEY (sk_fecha_cita) REFERENCES dim_tiempo(sk_fecha)
+    )
+    """
+    
+    def __init__(self, motor='sqlite', ruta_db=None, ruta_limpio=RUTA_LIMPIO, dir_reportes='../reportes'):
+        self.motor_nombre = motor
+        self.ruta_db = ruta_db
+        self.ruta_limpio = ruta_limpio
+        self.dir_reportes = dir_reportes
+        self.motor = None
         self.conn = None
         self.datos_limpios = None
         
-    def conectar_dw(self):
-        """Simula conexión a Data Warehouse (SQLite)"""
-        self.conn = sqlite3.connect('../resultados/hospital_datawarehouse.db')
-        print("Conexión a Data Warehouse establecida")
+    def conectar_dw(self, motor=None, ruta_db=None):
+        """Simula conexión a Data Warehouse (SQLite o DuckDB)"""
+        if motor is not None:
+            self.motor_nombre = motor
+        if ruta_db is not None:
+            self.ruta_db = ruta_db
+        
+        clase_motor = MOTORES_DW[self.motor_nombre]
+        if self.ruta_db is None:
+            self.ruta_db = f'../resultados/hospital_datawarehouse{clase_motor.extension}'
+        
+        self.motor = clase_motor(self.ruta_db)
+        self.conn = self.motor.conn
+        print(f"Conexión a Data Warehouse establecida ({self.motor.nombre})")
     
     def cargar_datos_limpios(self):
         """Carga datos limpios para migración"""
-        with open('../resultados/dataset_hospital_limpio.json', 'r', encoding='utf-8') as f:
-            datos = json.load(f)
-        
-        self.datos_limpios = {
-            'pacientes': pd.DataFrame(datos['pacientes']),
-            'citas': pd.DataFrame(datos['citas_medicas'])
-        }
+        pacientes, citas = cargar_dataset(self.ruta_limpio, limpio=True)
+        self.datos_limpios = {'pacientes': pacientes, 'citas': citas}
         print("Datos limpios cargados para migración")
     
     def crear_esquema_dw(self):
@@ -91,68 +226,105 @@ class DataWarehouseSimulator:
         )
         """
         
-        # Tabla de hechos de citas
-        sql_fact_citas = """
-        CREATE TABLE IF NOT EXISTS fact_citas_medicas (
+        # Catálogo de particiones de la tabla de hechos
+        sql_particiones = """
+        CREATE TABLE IF NOT EXISTS dw_particiones (
+            nombre_tabla VARCHAR(60) PRIMARY KEY,
+            año INTEGER,
+            registros INTEGER,
+            fecha_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        
+        # Clave surrogada y partición actual de cada cita cargada
+        sql_claves_citas = """
+        CREATE TABLE IF NOT EXISTS dw_claves_citas (
             sk_cita INTEGER PRIMARY KEY,
-            id_cita_source VARCHAR(50),
-            sk_paciente INTEGER,
-            sk_medico INTEGER,
-            sk_especialidad INTEGER,
-            sk_fecha_cita INTEGER,
-            sk_fecha_carga INTEGER,
-            costo DECIMAL(10,2),
-            estado_cita VARCHAR(20),
-            FOREIGN KEY (sk_paciente) REFERENCES dim_pacientes(sk_paciente),
-            FOREIGN KEY (sk_medico) REFERENCES dim_medicos(sk_medico),
-            FOREIGN KEY (sk_especialidad) REFERENCES dim_especialidades(sk_especialidad),
-            FOREIGN KEY (sk_fecha_cita) REFERENCES dim_tiempo(sk_fecha)
+            id_cita_source VARCHAR(50) UNIQUE,
+            nombre_tabla VARCHAR(60)
         )
         """
         
         # Ejecutar creación de tablas
-        cursor = self.conn.cursor()
-        cursor.execute(sql_dim_pacientes)
-        cursor.execute(sql_dim_medicos)
-        cursor.execute(sql_dim_especialidades)
-        cursor.execute(sql_dim_tiempo)
-        cursor.execute(sql_fact_citas)
-        self.conn.commit()
+        for sql in [sql_dim_pacientes, sql_dim_medicos, sql_dim_especialidades,
+                    sql_dim_tiempo, sql_particiones, sql_claves_citas]:
+            self.motor.ejecutar(self.motor.adaptar_ddl(sql))
+        
+        # Versiones anteriores guardaban los hechos en una tabla monolítica
+        if self.motor.tipo_objeto(self.VISTA_HECHOS) == 'table':
+            self.motor.ejecutar(f"DROP TABLE {self.VISTA_HECHOS}")
+        
+        # ... o en particiones sin mapa de claves de citas, que se recargan completas
+        if not self.motor.ejecutar("SELECT COUNT(*) FROM dw_claves_citas")[0][0]:
+            for tabla in self.listar_particiones()['nombre_tabla']:
+                self.motor.ejecutar(f"DROP TABLE IF EXISTS {tabla}")
+            self.motor.ejecutar("DELETE FROM dw_particiones")
+        self.motor.commit()
         
         print("Esquema de Data Warehouse creado exitosamente")
     
+    def _claves_estables(self, tabla, columna_sk, columna_clave, claves):
+        """Claves surrogadas para las claves naturales de una dimensión
+        
+        Las claves naturales ya cargadas conservan su clave surrogada y las
+        nuevas se numeran a continuación de la mayor, para que los hechos de
+        las particiones que no se recargan sigan apuntando a la misma fila.
+        """
+        existentes = self.motor.consultar(f"SELECT {columna_sk}, {columna_clave} FROM {tabla}")
+        claves = pd.Series(np.asarray(claves, dtype=object))
+        sk = claves.map(dict(zip(existentes[columna_clave], existentes[columna_sk])))
+        nuevas = sk.isna()
+        inicio = int(existentes[columna_sk].max()) + 1 if len(existentes) else 1
+        sk[nuevas] = np.arange(inicio, inicio + int(nuevas.sum()))
+        return sk.astype('int64').to_numpy()
+    
+    def _escribir_dimension(self, dimension, tabla, columna_clave):
+        """Reemplaza la dimensión conservando, como inactivas, las filas que ya no llegan"""
+        anteriores = self.motor.consultar(f"SELECT * FROM {tabla}")
+        anteriores = anteriores[~anteriores[columna_clave].isin(dimension[columna_clave])]
+        if len(anteriores):
+            anteriores = anteriores.reindex(columns=dimension.columns).assign(activo=False)
+            # SQLite devuelve las fechas como texto
+            for columna in dimension.select_dtypes('datetime').columns:
+                anteriores[columna] = pd.to_datetime(anteriores[columna])
+            dimension = pd.concat([dimension, anteriores], ignore_index=True)
+        self.motor.escribir_tabla(dimension, tabla)
+        return dimension
+    
     def poblar_dimensiones(self):
-        """Pobla las tablas dimensionales"""
+        """Pobla las tablas dimensionales con claves surrogadas estables entre cargas"""
         
-        # Dimensión pacientes
-        dim_pacientes = self.datos_limpios['pacientes'].copy()
-        dim_pacientes['sk_paciente'] = range(1, len(dim_pacientes) + 1)
+        # Dimensión pacientes (una fila por id de paciente)
+        dim_pacientes = self.datos_limpios['pacientes'].drop_duplicates('id_paciente').copy()
+        dim_pacientes['sk_paciente'] = self._claves_estables(
+            'dim_pacientes', 'sk_paciente', 'id_paciente_source', dim_pacientes['id_paciente'])
         dim_pacientes['id_paciente_source'] = dim_pacientes['id_paciente']
         dim_pacientes['activo'] = True
         
-        dim_pacientes.to_sql('dim_pacientes', self.conn, if_exists='replace', index=False)
+        self._escribir_dimension(dim_pacientes, 'dim_pacientes', 'id_paciente_source')
         print(f"Dimensión pacientes poblada: {len(dim_pacientes)} registros")
         
         # Dimensión médicos
         medicos_unicos = self.datos_limpios['citas']['medico'].dropna().unique()
         dim_medicos = pd.DataFrame({
-            'sk_medico': range(1, len(medicos_unicos) + 1),
+            'sk_medico': self._claves_estables('dim_medicos', 'sk_medico', 'nombre_medico', medicos_unicos),
             'nombre_medico': medicos_unicos,
             'activo': True
         })
         
-        dim_medicos.to_sql('dim_medicos', self.conn, if_exists='replace', index=False)
+        self._escribir_dimension(dim_medicos, 'dim_medicos', 'nombre_medico')
         print(f"Dimensión médicos poblada: {len(dim_medicos)} registros")
         
         # Dimensión especialidades
         especialidades_unicas = self.datos_limpios['citas']['especialidad'].dropna().unique()
         dim_especialidades = pd.DataFrame({
-            'sk_especialidad': range(1, len(especialidades_unicas) + 1),
+            'sk_especialidad': self._claves_estables('dim_especialidades', 'sk_especialidad',
+                                                     'nombre_especialidad', especialidades_unicas),
             'nombre_especialidad': especialidades_unicas,
             'activo': True
         })
         
-        dim_especialidades.to_sql('dim_especialidades', self.conn, if_exists='replace', index=False)
+        self._escribir_dimension(dim_especialidades, 'dim_especialidades', 'nombre_especialidad')
         print(f"Dimensión especialidades poblada: {len(dim_especialidades)} registros")
         
         # Dimensión tiempo (fechas de los últimos 5 años)
@@ -170,20 +342,35 @@ class DataWarehouseSimulator:
             'es_fin_semana': fechas.dayofweek >= 5
         })
         
-        dim_tiempo.to_sql('dim_tiempo', self.conn, if_exists='replace', index=False)
+        self.motor.escribir_tabla(dim_tiempo, 'dim_tiempo')
         print(f"Dimensión tiempo poblada: {len(dim_tiempo)} registros")
     
-    def poblar_hechos(self):
-        """Pobla la tabla de hechos"""
+    def poblar_hechos(self, años=None):
+        """Pobla las particiones de hechos con las citas de la carga
+        
+        Cada cita conserva su sk_cita entre cargas (dw_claves_citas, por
+        id_cita_source) y se reemplaza en su partición. Si se indican años
+        (None para las citas sin fecha) solo se cargan las citas de esos
+        años, y solo se tocan sus particiones y aquellas de las que se
+        movió alguna cita.
+        """
         
-        # Obtener mapeos de dimensiones
-        dim_pacientes = pd.read_sql('SELECT sk_paciente, id_paciente_source FROM dim_pacientes', self.conn)
-        dim_medicos = pd.read_sql('SELECT sk_medico, nombre_medico FROM dim_medicos', self.conn)
-        dim_especialidades = pd.read_sql('SELECT sk_especialidad, nombre_especialidad FROM dim_especialidades', self.conn)
-        dim_tiempo = pd.read_sql('SELECT sk_fecha, fecha FROM dim_tiempo', self.conn)
+        # Citas de la carga y año de cada una
+        fact_citas = self.datos_limpios['citas'].drop_duplicates('id_cita', keep='last')
+        años_carga = pd.to_datetime(fact_citas['fecha_cita']).dt.year
+        if años is not None:
+            años = list(años)
+            seleccion = años_carga.isin([año for año in años if año is not None])
+            if None in años:
+                seleccion |= años_carga.isna()
+            fact_citas, años_carga = fact_citas[seleccion], años_carga[seleccion]
+        años_carga = años_carga.to_numpy()
         
-        # Preparar datos de hechos
-        fact_citas = self.datos_limpios['citas'].copy()
+        # Obtener mapeos de dimensiones
+        dim_pacientes = self.motor.consultar('SELECT sk_paciente, id_paciente_source FROM dim_pacientes')
+        dim_medicos = self.motor.consultar('SELECT sk_medico, nombre_medico FROM dim_medicos')
+        dim_especialidades = self.motor.consultar('SELECT sk_especialidad, nombre_especialidad FROM dim_especialidades')
+        dim_tiempo = self.motor.consultar('SELECT sk_fecha, fecha FROM dim_tiempo')
         
         # Mapear a claves surrogadas
         fact_citas = fact_citas.merge(
@@ -214,9 +401,16 @@ class DataWarehouseSimulator:
         fecha_hoy = datetime.now().date()
         sk_fecha_hoy = dim_tiempo[dim_tiempo['fecha'] == fecha_hoy]['sk_fecha'].iloc[0] if len(dim_tiempo[dim_tiempo['fecha'] == fecha_hoy]) > 0 else 1
         
+        # Partición de cada cita (año de la cita)
+        particiones = np.where(
+            pd.isna(años_carga), self.PARTICION_SIN_FECHA,
+            self.VISTA_HECHOS + '_' + pd.Series(años_carga).astype('Int64').astype(str).to_numpy()
+        )
+        
         # Seleccionar columnas finales
         fact_final = pd.DataFrame({
-            'sk_cita': range(1, len(fact_citas) + 1),
+            'sk_cita': self._claves_estables('dw_claves_citas', 'sk_cita', 'id_cita_source',
+                                             fact_citas['id_cita']),
             'id_cita_source': fact_citas['id_cita'],
             'sk_paciente': fact_citas['sk_paciente'],
             'sk_medico': fact_citas['sk_medico'],
@@ -227,41 +421,123 @@ class DataWarehouseSimulator:
             'estado_cita': fact_citas['estado_cita']
         })
         
-        fact_final.to_sql('fact_citas_medicas', self.conn, if_exists='replace', index=False)
+        # Particiones en las que estaban las citas que ya se habían cargado
+        claves_carga = pd.DataFrame({'sk_cita': fact_final['sk_cita'],
+                                     'id_cita_source': fact_final['id_cita_source'],
+                                     'nombre_tabla': particiones})
+        self.motor.escribir_tabla(claves_carga, '_carga_claves_citas')
+        previas = [fila[0] for fila in self.motor.ejecutar(
+            "SELECT DISTINCT c.nombre_tabla FROM dw_claves_citas c "
+            "JOIN _carga_claves_citas n ON c.sk_cita = n.sk_cita"
+        )]
+        for tabla in previas:
+            if self.motor.tipo_objeto(tabla) == 'table':
+                self.motor.ejecutar(
+                    f"DELETE FROM {tabla} WHERE sk_cita IN (SELECT sk_cita FROM _carga_claves_citas)"
+                )
+        
+        # Las citas de la carga se insertan en su partición
+        años_particion = {}
+        for tabla, grupo in fact_final.groupby(particiones, sort=True):
+            año = años_carga[particiones == tabla][0]
+            años_particion[tabla] = None if pd.isna(año) else int(año)
+            self.motor.ejecutar(self.motor.adaptar_ddl(self.SQL_PARTICION_HECHOS.format(tabla=tabla)))
+            self.motor.escribir_tabla(grupo, tabla, modo='append')
+            print(f"  Partición {tabla}: {len(grupo)} registros cargados")
+        
+        self.motor.ejecutar("DELETE FROM dw_claves_citas WHERE sk_cita IN (SELECT sk_cita FROM _carga_claves_citas)")
+        self.motor.ejecutar(
+            "INSERT INTO dw_claves_citas (sk_cita, id_cita_source, nombre_tabla) "
+            "SELECT sk_cita, id_cita_source, nombre_tabla FROM _carga_claves_citas"
+        )
+        self.motor.ejecutar("DROP TABLE _carga_claves_citas")
+        
+        # Catálogo de las particiones tocadas
+        catalogo = self.listar_particiones().set_index('nombre_tabla')['año']
+        for tabla in sorted(set(previas) | set(años_particion)):
+            if self.motor.tipo_objeto(tabla) != 'table':
+                continue
+            año = años_particion.get(tabla, catalogo.get(tabla))
+            self.motor.ejecutar(
+                "INSERT OR REPLACE INTO dw_particiones (nombre_tabla, año, registros, fecha_carga) "
+                f"VALUES (?, ?, (SELECT COUNT(*) FROM {tabla}), CURRENT_TIMESTAMP)",
+                (tabla, None if pd.isna(año) else int(año))
+            )
+        self.motor.commit()
+        
+        self._actualizar_vista_hechos()
         print(f"Tabla de hechos poblada: {len(fact_final)} registros")
     
-    def generar_reportes_dw(self):
-        """Genera reportes de ejemplo desde el DW"""
+    def nombre_particion(self, año):
+        """Nombre de la tabla de hechos para un año"""
+        return f"{self.VISTA_HECHOS}_{año}"
+    
+    def listar_particiones(self):
+        """Devuelve el catálogo de particiones de hechos"""
+        return self.motor.consultar(
+            'SELECT nombre_tabla, año, registros, fecha_carga FROM dw_particiones ORDER BY año'
+        )
+    
+    def _actualizar_vista_hechos(self):
+        """Recrea la vista UNION ALL sobre todas las particiones
         
-        print("\nGENERANDO REPORTES DE EJEMPLO DESDE DATA WAREHOUSE")
-        print("="*60)
+        Cada rama expone el año de su partición como constante en la columna
+        año, así que un filtro sobre f.año descarta las demás particiones sin
+        leerlas (en SQLite y en DuckDB).
+        """
+        catalogo = self.listar_particiones()
+        self.motor.ejecutar(f"DROP VIEW IF EXISTS {self.VISTA_HECHOS}")
+        if len(catalogo):
+            union = "\n UNION ALL ".join(
+                f"SELECT *, {'CAST(NULL AS INTEGER)' if pd.isna(año) else int(año)} AS año FROM {tabla}"
+                for tabla, año in zip(catalogo['nombre_tabla'], catalogo['año'])
+            )
+            self.motor.ejecutar(f"CREATE VIEW {self.VISTA_HECHOS} AS {union}")
+        self.motor.commit()
+    
+    def fuente_hechos(self, años=None):
+        """Expresión SQL de los hechos, filtrada por la columna año de la vista"""
+        if años is None:
+            return self.VISTA_HECHOS
+        
+        años = list(años)
+        condiciones = []
+        if any(año is not None for año in años):
+            condiciones.append("año IN (" + ", ".join(str(int(año)) for año in años if año is not None) + ")")
+        if None in años:
+            condiciones.append("año IS NULL")
+        return f"(SELECT * FROM {self.VISTA_HECHOS} WHERE {' OR '.join(condiciones) or '1 = 0'})"
+    
+    def ejecutar_consultas_reportes(self, años=None):
+        """Ejecuta las tres consultas analíticas y devuelve sus resultados
+        
+        Si se indican años, solo se leen las particiones de esos años; las
+        consultas ad hoc obtienen lo mismo filtrando por f.año.
+        """
+        hechos = self.fuente_hechos(años)
         
         # Reporte 1: Citas por especialidad
-        query1 = """
+        query1 = f"""
         SELECT 
             e.nombre_especialidad,
             COUNT(*) as total_citas,
             AVG(f.costo) as costo_promedio,
             SUM(f.costo) as ingresos_totales
-        FROM fact_citas_medicas f
+        FROM {hechos} f
         JOIN dim_especialidades e ON f.sk_especialidad = e.sk_especialidad
         WHERE f.sk_especialidad IS NOT NULL
         GROUP BY e.nombre_especialidad
         ORDER BY total_citas DESC
         """
         
-        reporte1 = pd.read_sql(query1, self.conn)
-        print("\n1. ANÁLISIS POR ESPECIALIDAD:")
-        print(reporte1.to_string(index=False))
-        
         # Reporte 2: Productividad por médico
-        query2 = """
+        query2 = f"""
         SELECT 
             m.nombre_medico,
             COUNT(*) as total_citas,
             COUNT(CASE WHEN f.estado_cita = 'Completada' THEN 1 END) as citas_completadas,
             ROUND(COUNT(CASE WHEN f.estado_cita = 'Completada' THEN 1 END) * 100.0 / COUNT(*), 2) as tasa_completamiento
-        FROM fact_citas_medicas f
+        FROM {hechos} f
         JOIN dim_medicos m ON f.sk_medico = m.sk_medico
         WHERE f.sk_medico IS NOT NULL
         GROUP BY m.nombre_medico
@@ -269,30 +545,46 @@ class DataWarehouseSimulator:
         LIMIT 10
         """
         
-        reporte2 = pd.read_sql(query2, self.conn)
-        print("\n2. PRODUCTIVIDAD POR MÉDICO:")
-        print(reporte2.to_string(index=False))
-        
         # Reporte 3: Análisis temporal
-        query3 = """
+        query3 = f"""
         SELECT 
             t.año,
             t.trimestre,
             COUNT(*) as total_citas,
             AVG(f.costo) as costo_promedio
-        FROM fact_citas_medicas f
+        FROM {hechos} f
         JOIN dim_tiempo t ON f.sk_fecha_cita = t.sk_fecha
         WHERE f.sk_fecha_cita IS NOT NULL
         GROUP BY t.año, t.trimestre
         ORDER BY t.año, t.trimestre
         """
         
-        reporte3 = pd.read_sql(query3, self.conn)
+        return (
+            self.motor.consultar(query1),
+            self.motor.consultar(query2),
+            self.motor.consultar(query3)
+        )
+    
+    def generar_reportes_dw(self, años=None):
+        """Genera reportes de ejemplo desde el DW"""
+        
+        print("\nGENERANDO REPORTES DE EJEMPLO DESDE DATA WAREHOUSE")
+        print("="*60)
+        
+        reporte1, reporte2, reporte3 = self.ejecutar_consultas_reportes(años)
+        
+        print("\n1. ANÁLISIS POR ESPECIALIDAD:")
+        print(reporte1.to_string(index=False))
+        
+        print("\n2. PRODUCTIVIDAD POR MÉDICO:")
+        print(reporte2.to_string(index=False))
+        
         print("\n3. ANÁLISIS TEMPORAL:")
         print(reporte3.to_string(index=False))
         
         # Guardar reportes
-        with open('../reportes/reportes_datawarehouse.txt', 'w', encoding='utf-8') as f:
+        ruta_reportes = os.path.join(self.dir_reportes, 'reportes_datawarehouse.txt')
+        with open(ruta_reportes, 'w', encoding='utf-8') as f:
             f.write("REPORTES GENERADOS DESDE DATA WAREHOUSE\n")
             f.write("="*50 + "\n\n")
             f.write("1. ANÁLISIS POR ESPECIALIDAD:\n")
@@ -302,10 +594,10 @@ class DataWarehouseSimulator:
             f.write("\n\n3. ANÁLISIS TEMPORAL:\n")
             f.write(reporte3.to_string(index=False))
         
-        print(f"\nReportes guardados en: reportes/reportes_datawarehouse.txt")
+        print(f"\nReportes guardados en: {ruta_reportes}")
     
-    def ejecutar_migracion_completa(self):
-        """Ejecuta el proceso completo de migración"""
+    def ejecutar_migracion_completa(self, años=None):
+        """Ejecuta el proceso completo de migración (los hechos, solo de los años indicados)"""
         
         print("INICIANDO SIMULACIÓN DE MIGRACIÓN A DATA WAREHOUSE")
         print("="*60)
@@ -314,32 +606,52 @@ class DataWarehouseSimulator:
         self.cargar_datos_limpios()
         self.crear_esquema_dw()
         self.poblar_dimensiones()
-        self.poblar_hechos()
+        self.poblar_hechos(años)
         self.generar_reportes_dw()
         
         # Estadísticas finales
-        cursor = self.conn.cursor()
-        
+
         # Contar registros en cada tabla
         tablas = ['dim_pacientes', 'dim_medicos', 'dim_especialidades', 'dim_tiempo', 'fact_citas_medicas']
         estadisticas = {}
         
         for tabla in tablas:
-            cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
-            estadisticas[tabla] = cursor.fetchone()[0]
+            estadisticas[tabla] = self.motor.ejecutar(f"SELECT COUNT(*) FROM {tabla}")[0][0]
         
         print(f"\nESTADÍSTICAS DEL DATA WAREHOUSE:")
         for tabla, count in estadisticas.items():
             print(f"  {tabla}: {count:,} registros")
         
-        self.conn.close()
+        print(f"\nPARTICIONES DE HECHOS:")
+        for _, particion in self.listar_particiones().iterrows():
+            print(f"  {particion['nombre_tabla']}: {particion['registros']:,} registros")
+        
+        self.motor.cerrar()
         
         print(f"\nMIGRACIÓN COMPLETADA EXITOSAMENTE")
-        print(f"Base de datos creada en: resultados/hospital_datawarehouse.db")
+        print(f"Base de datos creada en: {self.ruta_db}")
+        
+        return estadisticas
 
 def main():
-    simulator = DataWarehouseSimulator()
-    simulator.ejecutar_migracion_completa()
+    parser = argparse.ArgumentParser(description="Simulación de migración a Data Warehouse")
+    parser.add_argument('--motor', choices=sorted(MOTORES_DW), default='sqlite',
+                        help="Motor de almacenamiento del DW (por defecto: sqlite)")
+    parser.add_argument('--limpio', default=RUTA_LIMPIO, help="Dataset limpio a cargar")
+    parser.add_argument('--db', default=None, help="Ruta de la base del DW (por defecto en ../resultados)")
+    parser.add_argument('--reportes', default='../reportes', help="Directorio de los reportes del DW")
+    parser.add_argument('--años', default=None,
+                        help="Cargar solo los hechos de estos años, separados por comas "
+                             "('sin_fecha' para las citas sin fecha); por defecto, todos")
+    args = parser.parse_args()
+    
+    años = None
+    if args.años:
+        años = [None if año.strip() == 'sin_fecha' else int(año) for año in args.años.split(',')]
+    
+    simulator = DataWarehouseSimulator(motor=args.motor, ruta_db=args.db, ruta_limpio=args.limpio,
+                                       dir_reportes=args.reportes)
+    simulator.ejecutar_migracion_completa(años)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BENCHMARK DE MOTORES DEL DATA WAREHOUSE
+Compara tiempos de carga y de consultas analíticas entre SQLite y DuckDB
+sobre hechos sintéticos con el mismo esquema estrella. Los datos salen por
+bloques de generador_sintetico.py y cada bloque se escribe en el motor al
+generarse, así que la memoria depende del tamaño de bloque y no del total.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from generador_sintetico import (ESPECIALIDADES, MEDICOS, PERFIL_DEFECTOS, TAMAÑO_BLOQUE,
+                                 bloques_citas, bloques_pacientes)
+
+dw = importlib.import_module('07_simulacion_datawarehouse')
+
+def _pacientes_unicos(bloques, n_pacientes):
+    """Bloques de pacientes sin los IDs duplicados que el generador agrega al final"""
+    n_base = n_pacientes - int(round(n_pacientes * PERFIL_DEFECTOS['pacientes']['ids_duplicados']))
+    emitidos = 0
+    for bloque in bloques:
+        posiciones = np.arange(emitidos, emitidos + len(bloque))
+        emitidos += len(bloque)
+        yield bloque[posiciones < n_base]
+
+def cargar_dimensiones(simulador, n_pacientes, semilla, tamaño_bloque):
+    """Pobla las dimensiones: la primera tanda de pacientes y los catálogos con
+    poblar_dimensiones, el resto de pacientes agregado bloque a bloque
+
+    Los IDs sintéticos son consecutivos desde 1, así que sk_paciente = id_paciente.
+    """
+    bloques = _pacientes_unicos(bloques_pacientes(n_pacientes, semilla, tamaño_bloque), n_pacientes)
+    simulador.datos_limpios = {
+        'pacientes': next(bloques),
+        'citas': pd.DataFrame({'medico': pd.Series(MEDICOS), 'especialidad': pd.Series(ESPECIALIDADES)})
+    }
+    simulador.poblar_dimensiones()
+    for bloque in bloques:
+        simulador.motor.escribir_tabla(
+            bloque.assign(sk_paciente=bloque['id_paciente'], id_paciente_source=bloque['id_paciente'],
+                          activo=True).drop(columns='id_paciente'),
+            'dim_pacientes', modo='append'
+        )
+    simulador.motor.commit()
+
+def _claves(mapeo, valores):
+    """Clave surrogada de cada valor según el mapeo (índice de valores, claves); nula si no está"""
+    indice, claves = mapeo
+    posiciones = indice.get_indexer(valores)
+    resultado = pd.array(claves[posiciones], dtype='Int64')
+    resultado[posiciones < 0] = pd.NA
+    return resultado
+
+def leer_mapeos(motor):
+    """Mapeos valor -> clave surrogada de las dimensiones pequeñas"""
+    mapeos = {}
+    for nombre, consulta in [('medico', 'SELECT sk_medico, nombre_medico FROM dim_medicos'),
+                             ('especialidad', 'SELECT sk_especialidad, nombre_especialidad FROM dim_especialidades'),
+                             ('fecha', 'SELECT sk_fecha, fecha FROM dim_tiempo')]:
+        tabla = motor.consultar(consulta)
+        valores = pd.to_datetime(tabla.iloc[:, 1]) if nombre == 'fecha' else tabla.iloc[:, 1]
+        mapeos[nombre] = (pd.Index(valores), tabla.iloc[:, 0].to_numpy())
+    return mapeos
+
+def mapear_claves(citas, mapeos, n_validos, sk_inicial):
+    """Hechos de un bloque de citas con sus claves surrogadas y el año de cada cita
+
+    Las fechas mal formadas quedan sin fecha y las citas huérfanas se
+    descartan, como en la limpieza.
+    """
+    citas = citas[citas['id_paciente'] <= n_validos]
+    fechas = pd.to_datetime(citas['fecha_cita'], format='%Y-%m-%d', errors='coerce')
+
+    hechos = pd.DataFrame({
+        'sk_cita': np.arange(sk_inicial, sk_inicial + len(citas)),
+        'id_cita_source': citas['id_cita'].to_numpy(),
+        'sk_paciente': citas['id_paciente'].to_numpy(),
+        'sk_medico': _claves(mapeos['medico'], citas['medico']),
+        'sk_especialidad': _claves(mapeos['especialidad'], citas['especialidad']),
+        'sk_fecha_cita': _claves(mapeos['fecha'], fechas),
+        'sk_fecha_carga': 1,
+        'costo': citas['costo'].astype('float64').to_numpy(),
+        'estado_cita': citas['estado_cita'].to_numpy()
+    })
+    return hechos, fechas.dt.year.to_numpy()
+
+def medir_motor(motor, n_hechos, directorio, semilla=42, tamaño_bloque=TAMAÑO_BLOQUE):
+    """Mide mapeo de claves, ingesta en el motor y consultas sobre n_hechos citas sintéticas
+
+    La generación de los bloques no se cuenta en ninguno de los tiempos.
+    """
+    ruta = os.path.join(directorio, f"benchmark_{motor}{dw.MOTORES_DW[motor].extension}")
+    simulador = dw.DataWarehouseSimulator(motor=motor, ruta_db=ruta)
+    n_pacientes = max(1, n_hechos // 2)
+    n_validos = n_pacientes - int(round(n_pacientes * PERFIL_DEFECTOS['pacientes']['ids_duplicados']))
+    tiempo_mapeo = tiempo_ingesta = 0.0
+    registros = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulador.conectar_dw()
+        simulador.crear_esquema_dw()
+        cargar_dimensiones(simulador, n_pacientes, semilla, tamaño_bloque)
+        mapeos = leer_mapeos(simulador.motor)
+
+        sk_inicial = 1
+        for citas in bloques_citas(n_hechos, n_pacientes, semilla, tamaño_bloque):
+            inicio = time.perf_counter()
+            hechos, años = mapear_claves(citas, mapeos, n_validos, sk_inicial)
+            sk_inicial += len(hechos)
+            particiones = np.where(
+                pd.isna(años), simulador.PARTICION_SIN_FECHA,
+                simulador.VISTA_HECHOS + '_' + pd.Series(años).astype('Int64').astype(str).to_numpy()
+            )
+            grupos = list(hechos.groupby(particiones))
+            tiempo_mapeo += time.perf_counter() - inicio
+
+            # Ingesta: executemany en SQLite, INSERT ... SELECT sobre el DataFrame en DuckDB
+            inicio = time.perf_counter()
+            for tabla, grupo in grupos:
+                if tabla not in registros:
+                    simulador.motor.ejecutar(simulador.motor.adaptar_ddl(
+                        simulador.SQL_PARTICION_HECHOS.format(tabla=tabla)))
+                    registros[tabla] = 0
+                simulador.motor.escribir_tabla(grupo, tabla, modo='append')
+                registros[tabla] += len(grupo)
+            simulador.motor.commit()
+            tiempo_ingesta += time.perf_counter() - inicio
+
+        for tabla, total in registros.items():
+            año = None if tabla == simulador.PARTICION_SIN_FECHA else int(tabla.rsplit('_', 1)[1])
+            simulador.motor.ejecutar(
+                "INSERT OR REPLACE INTO dw_particiones (nombre_tabla, año, registros, fecha_carga) "
+                "VALUES (?, ?, ?, CURRENT_TIMESTAMP)", (tabla, año, total)
+            )
+        simulador.motor.commit()
+        simulador._actualizar_vista_hechos()
+
+        inicio = time.perf_counter()
+        simulador.ejecutar_consultas_reportes()
+        tiempo_consultas = time.perf_counter() - inicio
+
+        simulador.motor.cerrar()
+
+    return sum(registros.values()), tiempo_mapeo, tiempo_ingesta, tiempo_consultas
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite vs DuckDB para el DW")
+    parser.add_argument('--tamaños', type=int, nargs='+',
+                        default=[100_000, 1_000_000],
+                        help="Número de citas sintéticas por corrida")
+    parser.add_argument('--motores', nargs='+', choices=sorted(dw.MOTORES_DW),
+                        default=sorted(dw.MOTORES_DW))
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--tamaño-bloque', type=int, default=TAMAÑO_BLOQUE,
+                        help="Citas generadas y escritas por bloque")
+    parser.add_argument('--salida', default='../reportes/benchmark_dw.txt')
+    args = parser.parse_args()
+
+    print("BENCHMARK DE MOTORES DEL DATA WAREHOUSE")
+    print("=" * 60)
+
+    resultados = []
+    for n_citas in args.tamaños:
+        for motor in args.motores:
+            with tempfile.TemporaryDirectory() as directorio:
+                n_hechos, tiempo_mapeo, tiempo_ingesta, tiempo_consultas = medir_motor(
+                    motor, n_citas, directorio, args.semilla, args.tamaño_bloque)
+            resultados.append({
+                'hechos': n_hechos,
+                'motor': motor,
+                'mapeo_s': round(tiempo_mapeo, 3),
+                'ingesta_s': round(tiempo_ingesta, 3),
+                'hechos_por_s_ingesta': round(n_hechos / tiempo_ingesta),
+                'consultas_s': round(tiempo_consultas, 3)
+            })
+            print(f"  {motor:>7} | {n_hechos:>12,} hechos | mapeo {tiempo_mapeo:7.2f}s | "
+                  f"ingesta {tiempo_ingesta:7.2f}s | consultas {tiempo_consultas:7.3f}s")
+
+    tabla = pd.DataFrame(resultados)
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        f.write("BENCHMARK DE MOTORES DEL DATA WAREHOUSE\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(tabla.to_string(index=False))
+        f.write("\n")
+
+    print(f"\nResultados guardados en: {args.salida}")
+
+if __name__ == "__main__":
+    main()
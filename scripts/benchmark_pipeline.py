@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BENCHMARK DEL PIPELINE COMPLETO
+Mide tiempo, filas/s y memoria pico de cada etapa del pipeline a varios
+tamaños de dataset y compara contra una línea base guardada
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+import pandas as pd
+
+generador = importlib.import_module('generador_sintetico')
+limpieza = importlib.import_module('03_limpieza_avanzada')
+validacion = importlib.import_module('04_validacion_final')
+dashboard_mod = importlib.import_module('05_dashboard_profesional')
+tests_mod = importlib.import_module('06_tests_automatizados')
+dw = importlib.import_module('07_simulacion_datawarehouse')
+from esquema_datos import cargar_dataset
+from metricas_ejecucion import medir_limpieza
+
+PASOS_LIMPIEZA = [
+    'limpiar_sexo',
+    'limpiar_fechas_nacimiento',
+    'calcular_edades',
+    'limpiar_fechas_citas',
+    'completar_estados_citas',
+    'resolver_integridad_referencial'
+]
+
+# Etapas más rápidas que esto no se comparan: el ruido domina la medición
+MINIMO_SEGUNDOS_COMPARACION = 0.05
+
+class MonitorRSS:
+    """Muestrea la memoria residente del proceso para obtener el pico de una etapa"""
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.pico = 0
+        self._activo = False
+        self._hilo = None
+        self._pagina = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def _rss_actual(self):
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * self._pagina
+        except OSError:
+            # Sin /proc solo está disponible el máximo del proceso completo
+            maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maximo if sys.platform == 'darwin' else maximo * 1024
+
+    def _muestrear(self):
+        while self._activo:
+            self.pico = max(self.pico, self._rss_actual())
+            time.sleep(self.intervalo)
+
+    def __enter__(self):
+        self.pico = self._rss_actual()
+        self._activo = True
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._activo = False
+        self._hilo.join()
+        self.pico = max(self.pico, self._rss_actual())
+        return False
+
+class BenchmarkPipeline:
+    """Ejecuta cada etapa del pipeline y registra sus métricas"""
+
+    def __init__(self, repeticiones=1):
+        self.repeticiones = repeticiones
+        self.resultados = []
+
+    def medir(self, etapa, tamaño, filas, funcion, preparar=None):
+        """Ejecuta una etapa y guarda el mejor tiempo de las repeticiones
+
+        preparar se llama fuera del cronómetro antes de cada repetición, para
+        que las etapas con estado partan siempre de la misma entrada.
+        """
+        mejor = None
+        valor = None
+        for _ in range(self.repeticiones):
+            if preparar is not None:
+                preparar()
+            with MonitorRSS() as monitor, contextlib.redirect_stdout(io.StringIO()):
+                inicio = time.perf_counter()
+                valor = funcion()
+                segundos = time.perf_counter() - inicio
+            if mejor is None or segundos < mejor[0]:
+                mejor = (segundos, monitor.pico)
+
+        segundos, pico = mejor
+        self.resultados.append({
+            'etapa': etapa,
+            'tamaño': tamaño,
+            'filas': filas,
+            'segundos': round(segundos, 4),
+            'filas_por_s': round(filas / segundos) if segundos > 0 else None,
+            'rss_pico_mb': round(pico / 1024 ** 2, 1)
+        })
+        print(f"  {etapa:<40} {segundos:9.3f}s  {filas / max(segundos, 1e-9):>12,.0f} filas/s  "
+              f"{pico / 1024 ** 2:8.1f} MB")
+        return valor
+
+    def ejecutar_tamaño(self, n_pacientes, directorio):
+        """Corre todas las etapas para un tamaño de dataset"""
+        n_citas = 2 * n_pacientes
+        tamaño = n_pacientes
+        print(f"\nTAMAÑO: {n_pacientes:,} pacientes / {n_citas:,} citas")
+
+        ruta = os.path.join(directorio, f"dataset_{n_pacientes}.json")
+        generador.generar_dataset(ruta, n_pacientes, n_citas)
+
+        # Carga
+        df_pac, df_citas = self.medir('carga', tamaño, n_pacientes + n_citas,
+                                      lambda: cargar_dataset(ruta))
+
+        # Limpieza paso a paso
+        limpiador = limpieza.HospitalDataCleaner(df_pac, df_citas, medir_memoria=False)
+        for paso in PASOS_LIMPIEZA:
+            filas = len(limpiador.df_citas) if 'citas' in paso or 'integridad' in paso else len(limpiador.df_pacientes)
+            entrada = (limpiador.df_pacientes.copy(), limpiador.df_citas.copy())
+
+            def restaurar(entrada=entrada):
+                limpiador.df_pacientes = entrada[0].copy()
+                limpiador.df_citas = entrada[1].copy()
+
+            self.medir(f"limpieza.{paso}", tamaño, filas, getattr(limpiador, paso), preparar=restaurar)
+        df_pac_limpio, df_citas_limpio = limpiador.df_pacientes, limpiador.df_citas
+        filas_limpias = len(df_pac_limpio) + len(df_citas_limpio)
+
+        # Validación
+        def validar():
+            validacion.validar_calidad_post_limpieza(df_pac_limpio, df_citas_limpio)
+            return validacion.calcular_metricas_mejora(df_pac, df_citas, df_pac_limpio, df_citas_limpio)
+
+        self.medir('validacion', tamaño, filas_limpias, validar)
+
+        # Tests automáticos
+        def ejecutar_tests():
+            suite = tests_mod.TestSuiteAvanzado()
+            suite.df_pacientes = df_pac_limpio
+            suite.df_citas = df_citas_limpio
+            for nombre in dir(suite):
+                if nombre.startswith('test_'):
+                    try:
+                        getattr(suite, nombre)()
+                    except AssertionError:
+                        pass
+
+        self.medir('tests', tamaño, filas_limpias, ejecutar_tests)
+
+        # Dashboard, con los problemas resueltos por esta limpieza (los pasos se
+        # repitieron, así que su linaje también: se cuenta cada celda una vez)
+        problemas = medir_limpieza(limpiador.estadisticas_iniciales, df_pac_limpio, df_citas_limpio,
+                                   limpiador.linaje_cambios().drop_duplicates(), 0)['problemas_resueltos']
+
+        def construir_dashboard():
+            dashboard = dashboard_mod.DashboardInteractivo()
+            dashboard.datos_originales = {'pacientes': df_pac, 'citas': df_citas}
+            dashboard.datos_limpios = {'pacientes': df_pac_limpio, 'citas': df_citas_limpio}
+            dashboard.problemas = problemas
+            dashboard.calcular_kpis_principales()
+            return dashboard.crear_dashboard_final().to_html(include_plotlyjs=False)
+
+        self.medir('dashboard', tamaño, filas_limpias, construir_dashboard)
+
+        # Data Warehouse
+        simulador = dw.DataWarehouseSimulator(ruta_db=os.path.join(directorio, f"dw_{n_pacientes}.db"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulador.conectar_dw()
+            simulador.crear_esquema_dw()
+        simulador.datos_limpios = {'pacientes': df_pac_limpio, 'citas': df_citas_limpio}
+
+        def cargar_dw():
+            simulador.poblar_dimensiones()
+            simulador.poblar_hechos()
+
+        self.medir('dw.carga', tamaño, filas_limpias, cargar_dw)
+        self.medir('dw.consultas', tamaño, len(df_citas_limpio), simulador.ejecutar_consultas_reportes)
+        simulador.motor.cerrar()
+
+def comparar_con_baseline(resultados, baseline, umbral):
+    """Devuelve las etapas más lentas que la línea base por encima del umbral"""
+    referencia = {(r['etapa'], r['tamaño']): r for r in baseline['resultados']}
+    regresiones = []
+    for actual in resultados:
+        base = referencia.get((actual['etapa'], actual['tamaño']))
+        if base is None or base['segundos'] < MINIMO_SEGUNDOS_COMPARACION:
+            continue
+        variacion = actual['segundos'] / base['segundos'] - 1
+        if variacion > umbral:
+            regresiones.append((actual['etapa'], actual['tamaño'], base['segundos'],
+                                actual['segundos'], variacion))
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del pipeline hospitalario")
+    parser.add_argument('--tamaños', type=int, nargs='+', default=[10_000, 50_000, 100_000],
+                        help="Número de pacientes por corrida (las citas son el doble)")
+    parser.add_argument('--repeticiones', type=int, default=3,
+                        help="Se conserva el mejor tiempo de las repeticiones")
+    parser.add_argument('--salida', default='../reportes/benchmark_resultados.json')
+    parser.add_argument('--baseline', default='../reportes/benchmark_baseline.json')
+    parser.add_argument('--umbral', type=float, default=0.20,
+                        help="Máximo aumento de tiempo tolerado respecto a la línea base")
+    parser.add_argument('--guardar-baseline', action='store_true',
+                        help="Guarda esta corrida como nueva línea base")
+    args = parser.parse_args()
+
+    print("BENCHMARK DEL PIPELINE DE DATOS HOSPITALARIOS")
+    print("=" * 80)
+
+    benchmark = BenchmarkPipeline(repeticiones=args.repeticiones)
+    with tempfile.TemporaryDirectory() as directorio:
+        for n_pacientes in args.tamaños:
+            benchmark.ejecutar_tamaño(n_pacientes, directorio)
+
+    salida = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'resultados': benchmark.resultados
+    }
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(salida, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en: {args.salida}")
+
+    if args.guardar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(salida, f, indent=2, ensure_ascii=False)
+        print(f"Línea base actualizada: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No existe línea base; ejecutar con --guardar-baseline para crearla")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regresiones = comparar_con_baseline(benchmark.resultados, baseline, args.umbral)
+    if regresiones:
+        print(f"\n✗ REGRESIONES DE RENDIMIENTO (umbral {args.umbral:.0%}):")
+        for etapa, tamaño, antes, despues, variacion in regresiones:
+            print(f"  {etapa} [{tamaño:,}]: {antes:.3f}s -> {despues:.3f}s (+{variacion:.0%})")
+        return 1
+
+    print(f"\n✓ Sin regresiones respecto a la línea base (umbral {args.umbral:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DATA WAREHOUSE FEDERADO MULTI-SEDE
+Carga cada sede en paralelo en su propia base de staging (el esquema estrella
+de 07_simulacion_datawarehouse.py) y las fusiona en un DW central SQLite con
+dimensión de sede, claves naturales con prefijo de sede y claves surrogadas
+únicas, usando ATTACH e INSERT ... SELECT. Los reportes entre sedes se
+consultan sobre los hechos fusionados.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+dw = importlib.import_module('07_simulacion_datawarehouse')
+
+RUTA_SEDES = '../resultados/sedes'
+RUTA_CENTRAL = '../resultados/hospital_datawarehouse_sedes.db'
+RUTA_STAGING = '../resultados/staging_dw'
+
+def descubrir_sedes_limpias(directorio):
+    """{sede: dataset limpio} de la salida de ejecucion_sedes.py (<sede>/resultados/...)"""
+    sedes = {}
+    for nombre in sorted(os.listdir(directorio)):
+        ruta = os.path.join(directorio, nombre, 'resultados', 'dataset_hospital_limpio.json')
+        if os.path.isfile(ruta):
+            sedes[nombre] = ruta
+    return sedes
+
+def cargar_staging(sede, ruta_limpio, ruta_staging):
+    """Carga una sede en su base de staging (se ejecuta en un proceso del pool)"""
+    if os.path.exists(ruta_staging):
+        os.remove(ruta_staging)
+    simulador = dw.DataWarehouseSimulator(ruta_db=ruta_staging, ruta_limpio=ruta_limpio)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulador.conectar_dw()
+        simulador.cargar_datos_limpios()
+        simulador.crear_esquema_dw()
+        simulador.poblar_dimensiones()
+        simulador.poblar_hechos()
+    hechos = int(simulador.listar_particiones()['registros'].sum())
+    simulador.motor.cerrar()
+    return sede, ruta_staging, hechos, time.perf_counter() - inicio
+
+class DataWarehouseFederado(dw.DataWarehouseSimulator):
+    """DW central multi-sede sobre SQLite
+
+    dim_pacientes y dim_medicos son propias de cada sede (sk_sede y clave
+    natural 'sede:id'); dim_especialidades y dim_tiempo son compartidas. Las
+    claves naturales ya cargadas conservan su clave surrogada al recargar la
+    sede; solo las nuevas toman claves a partir del máximo ya cargado.
+    """
+
+    SQL_PARTICION_HECHOS = """
+    CREATE TABLE IF NOT EXISTS {tabla} (
+        sk_cita INTEGER PRIMARY KEY,
+        sk_sede INTEGER NOT NULL,
+        id_cita_source VARCHAR(80),
+        sk_paciente INTEGER,
+        sk_medico INTEGER,
+        sk_especialidad INTEGER,
+        sk_fecha_cita INTEGER,
+        sk_fecha_carga INTEGER,
+        costo DECIMAL(10,2),
+        estado_cita VARCHAR(20),
+        FOREIGN KEY (sk_sede) REFERENCES dim_sede(sk_sede),
+        FOREIGN KEY (sk_paciente) REFERENCES dim_pacientes(sk_paciente),
+        FOREIGN KEY (sk_medico) REFERENCES dim_medicos(sk_medico),
+        FOREIGN KEY (sk_especialidad) REFERENCES dim_especialidades(sk_especialidad),
+        FOREIGN KEY (sk_fecha_cita) REFERENCES dim_tiempo(sk_fecha)
+    )
+    """
+
+    ESQUEMA_CENTRAL = """
+    CREATE TABLE IF NOT EXISTS dim_sede (
+        sk_sede INTEGER PRIMARY KEY,
+        codigo_sede VARCHAR(50) UNIQUE NOT NULL,
+        origen VARCHAR(255),
+        fecha_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS dim_pacientes (
+        sk_paciente INTEGER PRIMARY KEY,
+        sk_sede INTEGER NOT NULL REFERENCES dim_sede(sk_sede),
+        clave_paciente VARCHAR(80),
+        id_paciente_source INTEGER,
+        nombre VARCHAR(100),
+        fecha_nacimiento DATE,
+        edad INTEGER,
+        sexo CHAR(1),
+        email VARCHAR(100),
+        telefono VARCHAR(20),
+        ciudad VARCHAR(50),
+        fecha_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        activo BOOLEAN DEFAULT TRUE
+    );
+    CREATE INDEX IF NOT EXISTS idx_dim_pacientes_sede ON dim_pacientes (sk_sede);
+    CREATE INDEX IF NOT EXISTS idx_dim_pacientes_clave ON dim_pacientes (clave_paciente);
+    CREATE TABLE IF NOT EXISTS dim_medicos (
+        sk_medico INTEGER PRIMARY KEY,
+        sk_sede INTEGER NOT NULL REFERENCES dim_sede(sk_sede),
+        clave_medico VARCHAR(150),
+        nombre_medico VARCHAR(100),
+        fecha_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        activo BOOLEAN DEFAULT TRUE
+    );
+    CREATE INDEX IF NOT EXISTS idx_dim_medicos_sede ON dim_medicos (sk_sede);
+    CREATE INDEX IF NOT EXISTS idx_dim_medicos_clave ON dim_medicos (clave_medico);
+    CREATE TABLE IF NOT EXISTS dim_especialidades (
+        sk_especialidad INTEGER PRIMARY KEY,
+        nombre_especialidad VARCHAR(50) UNIQUE,
+        fecha_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        activo BOOLEAN DEFAULT TRUE
+    );
+    CREATE TABLE IF NOT EXISTS dim_tiempo (
+        sk_fecha INTEGER PRIMARY KEY,
+        fecha DATE UNIQUE,
+        año INTEGER,
+        mes INTEGER,
+        dia INTEGER,
+        nombre_mes VARCHAR(20),
+        trimestre INTEGER,
+        dia_semana INTEGER,
+        nombre_dia_semana VARCHAR(20),
+        es_fin_semana BOOLEAN
+    );
+    CREATE TABLE IF NOT EXISTS dw_particiones (
+        nombre_tabla VARCHAR(60) PRIMARY KEY,
+        año INTEGER,
+        registros INTEGER,
+        fecha_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    def __init__(self, ruta_db=RUTA_CENTRAL, dir_reportes='../reportes'):
+        super().__init__(motor='sqlite', ruta_db=ruta_db, dir_reportes=dir_reportes)
+
+    def crear_esquema_dw(self):
+        """Crea el esquema central con dimensión de sede"""
+        self.conn.executescript(self.ESQUEMA_CENTRAL)
+        print("Esquema del Data Warehouse central creado")
+
+    def _maximo(self, tabla, columna):
+        return self.motor.ejecutar(f"SELECT COALESCE(MAX({columna}), 0) FROM {tabla}")[0][0]
+
+    def _registrar_sede(self, sede, origen):
+        """sk_sede de la sede, registrándola si es nueva"""
+        fila = self.motor.ejecutar("SELECT sk_sede FROM dim_sede WHERE codigo_sede = ?", (sede,))
+        if not fila:
+            self.motor.ejecutar("INSERT INTO dim_sede (codigo_sede, origen) VALUES (?, ?)", (sede, origen))
+            return self.motor.ejecutar("SELECT sk_sede FROM dim_sede WHERE codigo_sede = ?", (sede,))[0][0]
+
+        sk_sede = fila[0][0]
+        self.motor.ejecutar("UPDATE dim_sede SET origen = ?, fecha_carga = CURRENT_TIMESTAMP WHERE sk_sede = ?",
+                            (origen, sk_sede))
+        return sk_sede
+
+    def _mapa_claves(self, nombre, staging, cargadas, parametros):
+        """Tabla temporal nombre(sk_staging, sk) con la clave central de cada fila de staging
+
+        staging y cargadas son consultas (sk, clave) sobre la clave natural con
+        prefijo de sede: las claves ya cargadas conservan su sk y las nuevas se
+        numeran desde parametros['siguiente'] + 1.
+        """
+        # Las claves cargadas se indexan antes del cruce (los hechos están repartidos en particiones)
+        self.motor.ejecutar("DROP TABLE IF EXISTS temp.claves_cargadas")
+        self.motor.ejecutar("CREATE TEMP TABLE claves_cargadas (clave TEXT PRIMARY KEY, sk INTEGER NOT NULL)")
+        self.motor.ejecutar(f"INSERT INTO temp.claves_cargadas (sk, clave) {cargadas}", parametros)
+
+        self.motor.ejecutar(f"DROP TABLE IF EXISTS temp.{nombre}")
+        self.motor.ejecutar(f"CREATE TEMP TABLE {nombre} (sk_staging INTEGER PRIMARY KEY, sk INTEGER NOT NULL)")
+        self.motor.ejecutar(f"""
+            INSERT INTO temp.{nombre} (sk_staging, sk)
+            SELECT s.sk, COALESCE(c.sk, :siguiente + ROW_NUMBER() OVER (PARTITION BY c.sk IS NULL ORDER BY s.sk))
+            FROM ({staging}) s
+            LEFT JOIN temp.claves_cargadas c ON c.clave = s.clave
+        """, parametros)
+        self.motor.ejecutar("DROP TABLE temp.claves_cargadas")
+
+    def fusionar_sede(self, sede, ruta_staging):
+        """Fusiona la base de staging de una sede en el DW central y devuelve los hechos copiados
+
+        Si la sede ya estaba cargada se reemplazan sus filas, manteniendo las
+        claves surrogadas de los pacientes, médicos y citas que ya existían.
+        """
+        self.motor.commit()
+        self.motor.ejecutar("ATTACH DATABASE ? AS staging", (ruta_staging,))
+        mapas = ['mapa_pacientes', 'mapa_medicos', 'mapa_citas']
+        try:
+            sk_sede = self._registrar_sede(sede, os.path.abspath(ruta_staging))
+            centrales = list(self.listar_particiones()['nombre_tabla'])
+            particiones = self.motor.consultar("SELECT nombre_tabla, año FROM staging.dw_particiones")
+            parametros = {'sk_sede': sk_sede, 'sede': sede}
+
+            # Clave central de cada fila de staging según su clave natural 'sede:id'
+            self._mapa_claves(
+                'mapa_pacientes',
+                "SELECT sk_paciente AS sk, :sede || ':' || id_paciente_source AS clave FROM staging.dim_pacientes",
+                "SELECT sk_paciente AS sk, clave_paciente AS clave FROM main.dim_pacientes WHERE sk_sede = :sk_sede",
+                {**parametros, 'siguiente': self._maximo('dim_pacientes', 'sk_paciente')}
+            )
+            self._mapa_claves(
+                'mapa_medicos',
+                "SELECT sk_medico AS sk, :sede || ':' || nombre_medico AS clave FROM staging.dim_medicos",
+                "SELECT sk_medico AS sk, clave_medico AS clave FROM main.dim_medicos WHERE sk_sede = :sk_sede",
+                {**parametros, 'siguiente': self._maximo('dim_medicos', 'sk_medico')}
+            )
+            self._mapa_claves(
+                'mapa_citas',
+                " UNION ALL ".join([f"SELECT sk_cita AS sk, :sede || ':' || id_cita_source AS clave "
+                                    f"FROM staging.{tabla}" for tabla in particiones['nombre_tabla']]
+                                   or ["SELECT NULL AS sk, NULL AS clave WHERE 0"]),
+                " UNION ALL ".join([f"SELECT sk_cita AS sk, id_cita_source AS clave "
+                                    f"FROM main.{tabla} WHERE sk_sede = :sk_sede" for tabla in centrales]
+                                   or ["SELECT NULL AS sk, NULL AS clave WHERE 0"]),
+                {**parametros, 'siguiente': max([0] + [self._maximo(tabla, 'sk_cita') for tabla in centrales])}
+            )
+
+            # Las filas anteriores de la sede se reemplazan por las de staging
+            for tabla in ['dim_pacientes', 'dim_medicos', *centrales]:
+                self.motor.ejecutar(f"DELETE FROM main.{tabla} WHERE sk_sede = ?", (sk_sede,))
+
+            # Dimensiones propias de la sede: claves mapeadas y clave natural con prefijo
+            self.motor.ejecutar("""
+                INSERT INTO dim_pacientes (sk_paciente, sk_sede, clave_paciente, id_paciente_source, nombre,
+                                           fecha_nacimiento, edad, sexo, email, telefono, ciudad, activo)
+                SELECT m.sk, :sk_sede, :sede || ':' || p.id_paciente_source, p.id_paciente_source,
+                       p.nombre, p.fecha_nacimiento, p.edad, p.sexo, p.email, p.telefono, p.ciudad, p.activo
+                FROM staging.dim_pacientes p
+                JOIN temp.mapa_pacientes m ON m.sk_staging = p.sk_paciente
+            """, parametros)
+            self.motor.ejecutar("""
+                INSERT INTO dim_medicos (sk_medico, sk_sede, clave_medico, nombre_medico, activo)
+                SELECT m.sk, :sk_sede, :sede || ':' || d.nombre_medico, d.nombre_medico, d.activo
+                FROM staging.dim_medicos d
+                JOIN temp.mapa_medicos m ON m.sk_staging = d.sk_medico
+            """, parametros)
+
+            # Dimensiones compartidas: solo se agregan los valores nuevos
+            self.motor.ejecutar("""
+                INSERT OR IGNORE INTO dim_especialidades (nombre_especialidad, activo)
+                SELECT nombre_especialidad, activo FROM staging.dim_especialidades
+            """)
+            self.motor.ejecutar("""
+                INSERT OR IGNORE INTO dim_tiempo (fecha, año, mes, dia, nombre_mes, trimestre,
+                                                  dia_semana, nombre_dia_semana, es_fin_semana)
+                SELECT fecha, año, mes, dia, nombre_mes, trimestre, dia_semana, nombre_dia_semana, es_fin_semana
+                FROM staging.dim_tiempo ORDER BY sk_fecha
+            """)
+
+            # Hechos: partición a partición, remapeando claves de las dimensiones compartidas
+            copiados = 0
+            for tabla, año in particiones.itertuples(index=False):
+                self.motor.ejecutar(self.SQL_PARTICION_HECHOS.format(tabla=f"main.{tabla}"))
+                cursor = self.conn.execute(f"""
+                    INSERT INTO main.{tabla} (sk_cita, sk_sede, id_cita_source, sk_paciente, sk_medico,
+                                              sk_especialidad, sk_fecha_cita, sk_fecha_carga, costo, estado_cita)
+                    SELECT c.sk, :sk_sede, :sede || ':' || f.id_cita_source,
+                           p.sk, m.sk, e.sk_especialidad, t.sk_fecha, tc.sk_fecha, f.costo, f.estado_cita
+                    FROM staging.{tabla} f
+                    JOIN temp.mapa_citas c ON c.sk_staging = f.sk_cita
+                    LEFT JOIN temp.mapa_pacientes p ON p.sk_staging = f.sk_paciente
+                    LEFT JOIN temp.mapa_medicos m ON m.sk_staging = f.sk_medico
+                    LEFT JOIN staging.dim_especialidades se ON f.sk_especialidad = se.sk_especialidad
+                    LEFT JOIN main.dim_especialidades e ON e.nombre_especialidad = se.nombre_especialidad
+                    LEFT JOIN staging.dim_tiempo st ON f.sk_fecha_cita = st.sk_fecha
+                    LEFT JOIN main.dim_tiempo t ON t.fecha = st.fecha
+                    LEFT JOIN staging.dim_tiempo stc ON f.sk_fecha_carga = stc.sk_fecha
+                    LEFT JOIN main.dim_tiempo tc ON tc.fecha = stc.fecha
+                """, parametros)
+                copiados += cursor.rowcount
+                self.motor.ejecutar(
+                    "INSERT OR REPLACE INTO dw_particiones (nombre_tabla, año, registros, fecha_carga) "
+                    f"VALUES (?, ?, (SELECT COUNT(*) FROM main.{tabla}), CURRENT_TIMESTAMP)",
+                    (tabla, None if pd.isna(año) else int(año))
+                )
+            self.motor.commit()
+        except Exception:
+            # La sede queda como estaba antes de la fusión
+            self.conn.rollback()
+            raise
+        finally:
+            for mapa in mapas:
+                self.motor.ejecutar(f"DROP TABLE IF EXISTS temp.{mapa}")
+            self.motor.ejecutar("DETACH DATABASE staging")
+
+        # Particiones que se vaciaron al recargar la sede
+        for tabla in self.listar_particiones()['nombre_tabla']:
+            self.motor.ejecutar(
+                f"UPDATE dw_particiones SET registros = (SELECT COUNT(*) FROM {tabla}) WHERE nombre_tabla = ?",
+                (tabla,)
+            )
+        self.motor.commit()
+        return copiados
+
+    def fusionar_sedes(self, staging):
+        """Fusiona {sede: base de staging} y recrea la vista de hechos"""
+        for sede, ruta_staging in staging.items():
+            inicio = time.perf_counter()
+            hechos = self.fusionar_sede(sede, ruta_staging)
+            print(f"  {sede:<20} {hechos:>10,} hechos fusionados en {time.perf_counter() - inicio:.2f}s")
+        self._actualizar_vista_hechos()
+
+    def ejecutar_consultas_sedes(self):
+        """Reportes comparativos entre sedes sobre los hechos fusionados"""
+        hechos = self.VISTA_HECHOS
+
+        por_sede = self.motor.consultar(f"""
+            SELECT s.codigo_sede AS sede,
+                   COUNT(*) AS total_citas,
+                   COUNT(DISTINCT f.sk_paciente) AS pacientes_atendidos,
+                   ROUND(COUNT(CASE WHEN f.estado_cita = 'Completada' THEN 1 END) * 100.0 / COUNT(*), 2)
+                       AS tasa_completamiento,
+                   ROUND(AVG(f.costo), 2) AS costo_promedio,
+                   ROUND(SUM(f.costo), 2) AS ingresos_totales
+            FROM {hechos} f
+            JOIN dim_sede s ON f.sk_sede = s.sk_sede
+            GROUP BY s.codigo_sede
+            ORDER BY total_citas DESC
+        """)
+
+        especialidades = self.motor.consultar(f"""
+            SELECT e.nombre_especialidad, s.codigo_sede AS sede, COUNT(*) AS citas
+            FROM {hechos} f
+            JOIN dim_sede s ON f.sk_sede = s.sk_sede
+            JOIN dim_especialidades e ON f.sk_especialidad = e.sk_especialidad
+            GROUP BY e.nombre_especialidad, s.codigo_sede
+        """).pivot(index='nombre_especialidad', columns='sede', values='citas').fillna(0).astype(int)
+
+        temporal = self.motor.consultar(f"""
+            SELECT t.año, s.codigo_sede AS sede, COUNT(*) AS citas
+            FROM {hechos} f
+            JOIN dim_sede s ON f.sk_sede = s.sk_sede
+            JOIN dim_tiempo t ON f.sk_fecha_cita = t.sk_fecha
+            GROUP BY t.año, s.codigo_sede
+        """).pivot(index='año', columns='sede', values='citas').fillna(0).astype(int)
+
+        return por_sede, especialidades, temporal
+
+    def generar_reportes_sedes(self):
+        """Imprime y guarda los reportes entre sedes"""
+        por_sede, especialidades, temporal = self.ejecutar_consultas_sedes()
+        secciones = [
+            ("1. RESUMEN POR SEDE:", por_sede.to_string(index=False)),
+            ("2. CITAS POR ESPECIALIDAD Y SEDE:", especialidades.to_string()),
+            ("3. CITAS POR AÑO Y SEDE:", temporal.to_string()),
+        ]
+        ruta_reportes = os.path.join(self.dir_reportes, 'reportes_datawarehouse_sedes.txt')
+        with open(ruta_reportes, 'w', encoding='utf-8') as f:
+            f.write("REPORTES ENTRE SEDES DESDE EL DATA WAREHOUSE CENTRAL\n")
+            f.write("=" * 50 + "\n")
+            for titulo, tabla in secciones:
+                print(f"\n{titulo}\n{tabla}")
+                f.write(f"\n{titulo}\n{tabla}\n")
+        print(f"\nReportes guardados en: {ruta_reportes}")
+
+def cargar_staging_paralelo(sedes, directorio_staging=RUTA_STAGING, procesos=None):
+    """Carga {sede: dataset limpio} en bases de staging en paralelo y devuelve {sede: base}"""
+    os.makedirs(directorio_staging, exist_ok=True)
+    procesos = min(procesos or os.cpu_count() or 1, len(sedes))
+    rutas = {sede: os.path.join(directorio_staging, f"staging_{sede}.db") for sede in sedes}
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        for sede, _, hechos, segundos in pool.map(cargar_staging, list(sedes), list(sedes.values()),
+                                                  [rutas[sede] for sede in sedes]):
+            print(f"  {sede:<20} {hechos:>10,} hechos en staging en {segundos:.2f}s")
+    return rutas
+
+def federar(staging, ruta_central=RUTA_CENTRAL, dir_reportes='../reportes'):
+    """Fusiona las bases de staging en el DW central y genera los reportes entre sedes"""
+    central = DataWarehouseFederado(ruta_central, dir_reportes)
+    central.conectar_dw()
+    central.crear_esquema_dw()
+    central.fusionar_sedes(staging)
+    central.generar_reportes_sedes()
+    catalogo = central.listar_particiones()
+    sedes = central.motor.ejecutar("SELECT COUNT(*) FROM dim_sede")[0][0]
+    central.motor.cerrar()
+    return sedes, int(catalogo['registros'].sum())
+
+def main():
+    parser = argparse.ArgumentParser(description="Data Warehouse central con varias sedes")
+    parser.add_argument('--sedes', default=RUTA_SEDES,
+                        help="Salida de ejecucion_sedes.py (<sede>/resultados/dataset_hospital_limpio.json)")
+    parser.add_argument('--central', default=RUTA_CENTRAL, help="Base SQLite del DW central")
+    parser.add_argument('--staging', default=RUTA_STAGING, help="Directorio de las bases de staging")
+    parser.add_argument('--reutilizar-staging', action='store_true',
+                        help="Usar el DW por sede de ejecucion_sedes.py (<sede>/resultados/"
+                             "hospital_datawarehouse.db) en lugar de recargar el staging")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Sedes cargadas en paralelo (por defecto: núcleos disponibles)")
+    parser.add_argument('--reportes', default='../reportes', help="Directorio de los reportes entre sedes")
+    args = parser.parse_args()
+
+    print("DATA WAREHOUSE FEDERADO MULTI-SEDE")
+    print("=" * 60)
+
+    sedes = descubrir_sedes_limpias(args.sedes) if os.path.isdir(args.sedes) else {}
+    if not sedes:
+        print(f"ERROR: No hay sedes con resultados/dataset_hospital_limpio.json en {args.sedes}")
+        sys.exit(1)
+
+    inicio = time.perf_counter()
+    if args.reutilizar_staging:
+        staging = {sede: os.path.join(args.sedes, sede, 'resultados', 'hospital_datawarehouse.db')
+                   for sede in sedes}
+        faltantes = [sede for sede, ruta in staging.items() if not os.path.exists(ruta)]
+        if faltantes:
+            print(f"ERROR: Sedes sin DW propio: {', '.join(faltantes)}; ejecutar sin --reutilizar-staging")
+            sys.exit(1)
+    else:
+        print(f"\nCargando staging de {len(sedes)} sedes...")
+        staging = cargar_staging_paralelo(sedes, args.staging, args.procesos)
+
+    print("\nFusionando en el DW central...")
+    total_sedes, hechos = federar(staging, args.central, args.reportes)
+    print(f"\nDW central: {total_sedes} sedes, {hechos:,} hechos en {args.central} "
+          f"({time.perf_counter() - inicio:.1f}s)")
+
+if __name__ == "__main__":
+    main()
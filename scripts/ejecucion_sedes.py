@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EJECUCIÓN POR LOTES MULTI-SEDE
+Corre limpieza, validación, tests y carga al Data Warehouse de cada sede en
+un pool de procesos, con carpetas de salida aisladas por sede, y consolida un
+resumen comparativo entre sedes
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import pandas as pd
+
+limpieza = importlib.import_module('03_limpieza_avanzada')
+validacion = importlib.import_module('04_validacion_final')
+tests_mod = importlib.import_module('06_tests_automatizados')
+dw = importlib.import_module('07_simulacion_datawarehouse')
+from metricas_ejecucion import leer_manifiesto
+
+NOMBRE_DATASET = 'dataset_hospital.json'
+RUTA_ENTRADA = '../datos/sedes'
+RUTA_SALIDA = '../resultados/sedes'
+
+def descubrir_sedes(directorio):
+    """{sede: ruta del dataset} de cada subcarpeta que contiene dataset_hospital.json"""
+    sedes = {}
+    for nombre in sorted(os.listdir(directorio)):
+        ruta = os.path.join(directorio, nombre, NOMBRE_DATASET)
+        if os.path.isfile(ruta):
+            sedes[nombre] = ruta
+    return sedes
+
+def resumir_sede(resumen, ruta_manifiesto, tablas_dw):
+    """Completa el resumen de una sede con las cifras de su manifiesto"""
+    manifiesto = leer_manifiesto(ruta_manifiesto)
+    filas = manifiesto['limpieza']['filas']
+    scores = manifiesto['validacion']['scores']
+    resumen.update({
+        'pacientes': filas['pacientes'],
+        'citas': filas['citas'],
+        'problemas_resueltos': manifiesto['limpieza']['problemas_resueltos']['total'],
+        'validaciones': {'aprobadas': manifiesto['validacion']['aprobadas'],
+                         'total': manifiesto['validacion']['total']},
+        'tests': {'pasados': manifiesto['tests']['pasados'], 'total': manifiesto['tests']['total']},
+        'score_general': {'antes': scores['antes']['general'], 'despues': scores['despues']['general']},
+        'dw': tablas_dw
+    })
+    return resumen
+
+def procesar_sede(sede, ruta_entrada, directorio_sede, procesos_limpieza=1):
+    """Pipeline completo de una sede (se ejecuta en un proceso del pool)
+
+    Todo se escribe bajo directorio_sede/{resultados,reportes}; la salida de
+    consola de las etapas va a reportes/ejecucion.log.
+    """
+    dir_resultados = os.path.join(directorio_sede, 'resultados')
+    dir_reportes = os.path.join(directorio_sede, 'reportes')
+    os.makedirs(dir_resultados, exist_ok=True)
+    os.makedirs(dir_reportes, exist_ok=True)
+    ruta_limpio = os.path.join(dir_resultados, 'dataset_hospital_limpio.json')
+
+    simulador = dw.DataWarehouseSimulator(ruta_db=os.path.join(dir_resultados, 'hospital_datawarehouse.db'),
+                                          ruta_limpio=ruta_limpio, dir_reportes=dir_reportes)
+    etapas = [
+        ('limpieza', lambda: limpieza.limpiar_dataset(ruta_entrada, dir_resultados, dir_reportes,
+                                                      procesos_limpieza)),
+        ('validacion', lambda: validacion.validar_dataset(ruta_entrada, ruta_limpio, dir_resultados,
+                                                          dir_reportes)),
+        ('tests', lambda: tests_mod.ejecutar_tests_completos(ruta_limpio, dir_reportes, dir_resultados,
+                                                             ruta_entrada)),
+        ('dw', simulador.ejecutar_migracion_completa),
+    ]
+
+    resumen = {'sede': sede, 'entrada': ruta_entrada, 'estado': 'OK', 'segundos': {}}
+    inicio_sede = time.perf_counter()
+    with open(os.path.join(dir_reportes, 'ejecucion.log'), 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log):
+        salida_etapa = None
+        for etapa, funcion in etapas:
+            inicio = time.perf_counter()
+            try:
+                salida_etapa = funcion()
+            except Exception as e:
+                traceback.print_exc(file=log)
+                resumen.update({'estado': 'ERROR', 'etapa_fallida': etapa, 'error': f"{type(e).__name__}: {e}"})
+                break
+            finally:
+                resumen['segundos'][etapa] = round(time.perf_counter() - inicio, 3)
+        else:
+            resumir_sede(resumen, os.path.join(dir_resultados, 'manifiesto_ejecucion.json'), salida_etapa)
+    resumen['segundos']['total'] = round(time.perf_counter() - inicio_sede, 3)
+    return resumen
+
+def ejecutar_lote(directorio, salida=RUTA_SALIDA, procesos=None, procesos_limpieza=1):
+    """Procesa todas las sedes de directorio en paralelo y devuelve sus resúmenes"""
+    sedes = descubrir_sedes(directorio)
+    if not sedes:
+        raise ValueError(f"No hay subcarpetas con {NOMBRE_DATASET} en {directorio}")
+    procesos = min(procesos or os.cpu_count() or 1, len(sedes))
+
+    # Las sedes más grandes primero: el pool termina antes cuando las pequeñas cierran la cola
+    orden = sorted(sedes, key=lambda sede: os.path.getsize(sedes[sede]), reverse=True)
+    print(f"Procesando {len(sedes)} sedes con {procesos} procesos...")
+    resultados = []
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {pool.submit(procesar_sede, sede, sedes[sede], os.path.join(salida, sede), procesos_limpieza): sede
+                   for sede in orden}
+        for futuro in as_completed(futuros):
+            resumen = futuro.result()
+            resultados.append(resumen)
+            detalle = resumen.get('error', f"{resumen.get('problemas_resueltos', 0):,} problemas resueltos")
+            print(f"  {resumen['sede']:<20} {resumen['estado']:<6} {resumen['segundos']['total']:8.2f}s  {detalle}")
+    return sorted(resultados, key=lambda resumen: resumen['sede'])
+
+def tabla_resumen(resultados):
+    """Una fila por sede con volumen, calidad, validaciones, tests, DW y tiempos"""
+    filas = []
+    for r in resultados:
+        fila = {'sede': r['sede'], 'estado': r['estado']}
+        if r['estado'] == 'OK':
+            fila.update({
+                'pacientes': f"{r['pacientes']['antes']:,} -> {r['pacientes']['despues']:,}",
+                'citas': f"{r['citas']['antes']:,} -> {r['citas']['despues']:,}",
+                'problemas': r['problemas_resueltos'],
+                'validaciones': f"{r['validaciones']['aprobadas']}/{r['validaciones']['total']}",
+                'tests': f"{r['tests']['pasados']}/{r['tests']['total']}",
+                'score_antes': round(r['score_general']['antes'], 1),
+                'score_despues': round(r['score_general']['despues'], 1),
+                'hechos_dw': r['dw']['fact_citas_medicas'],
+            })
+        else:
+            fila['error'] = f"{r['etapa_fallida']}: {r['error']}"
+        fila['segundos'] = r['segundos']['total']
+        filas.append(fila)
+    # dtype object: las sedes con error no convierten los conteos en float
+    return pd.DataFrame(filas, dtype=object).fillna('')
+
+def consolidar_resumen(resultados, salida, segundos_total):
+    """Escribe resumen_sedes.json y resumen_sedes.txt en el directorio de salida"""
+    correctas = [r for r in resultados if r['estado'] == 'OK']
+    suma_sedes = sum(r['segundos']['total'] for r in resultados)
+    consolidado = {
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'sedes': len(resultados),
+        'sedes_con_error': len(resultados) - len(correctas),
+        'segundos_total': round(segundos_total, 3),
+        'segundos_suma_sedes': round(suma_sedes, 3),
+        'totales': {
+            'pacientes': sum(r['pacientes']['despues'] for r in correctas),
+            'citas': sum(r['citas']['despues'] for r in correctas),
+            'problemas_resueltos': sum(r['problemas_resueltos'] for r in correctas),
+            'hechos_dw': sum(r['dw']['fact_citas_medicas'] for r in correctas),
+        },
+        'resultados': resultados
+    }
+    with open(os.path.join(salida, 'resumen_sedes.json'), 'w', encoding='utf-8') as f:
+        json.dump(consolidado, f, indent=2, ensure_ascii=False, default=int)
+
+    totales = consolidado['totales']
+    with open(os.path.join(salida, 'resumen_sedes.txt'), 'w', encoding='utf-8') as f:
+        f.write("RESUMEN MULTI-SEDE\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(f"Fecha: {consolidado['fecha']}\n")
+        f.write(f"Sedes procesadas: {len(resultados)} ({consolidado['sedes_con_error']} con error)\n")
+        f.write(f"Tiempo total: {segundos_total:.1f} s (suma por sede: {suma_sedes:.1f} s)\n")
+        f.write(f"Pacientes limpios: {totales['pacientes']:,}\n")
+        f.write(f"Citas limpias: {totales['citas']:,}\n")
+        f.write(f"Problemas resueltos: {totales['problemas_resueltos']:,}\n")
+        f.write(f"Hechos cargados al DW: {totales['hechos_dw']:,}\n\n")
+        f.write(tabla_resumen(resultados).to_string(index=False))
+        f.write("\n")
+    return consolidado
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline de limpieza, validación, tests y DW para varias sedes")
+    parser.add_argument('--entrada', default=RUTA_ENTRADA,
+                        help=f"Directorio con una subcarpeta por sede, cada una con {NOMBRE_DATASET}")
+    parser.add_argument('--salida', default=RUTA_SALIDA, help="Directorio de salida (una carpeta por sede)")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="Sedes procesadas en paralelo (por defecto: núcleos disponibles)")
+    parser.add_argument('--procesos-limpieza', type=int, default=1,
+                        help="Procesos de los pasos por fila dentro de cada sede")
+    args = parser.parse_args()
+
+    print("EJECUCIÓN MULTI-SEDE")
+    print("=" * 60)
+
+    inicio = time.perf_counter()
+    try:
+        resultados = ejecutar_lote(args.entrada, args.salida, args.procesos, args.procesos_limpieza)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    consolidado = consolidar_resumen(resultados, args.salida, time.perf_counter() - inicio)
+
+    print(f"\n{tabla_resumen(resultados).to_string(index=False)}")
+    print(f"\nTiempo total: {consolidado['segundos_total']:.1f} s "
+          f"(suma por sede: {consolidado['segundos_suma_sedes']:.1f} s)")
+    print(f"Resumen guardado en: {os.path.join(args.salida, 'resumen_sedes.txt')} (.json)")
+
+    if consolidado['sedes_con_error']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
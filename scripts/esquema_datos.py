@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ESQUEMA DE DATOS HOSPITALARIOS
+Tipos de columna compactos para las tablas de pacientes y citas, aplicados
+al cargar los datos originales y los datos limpios
+"""
+
+import json
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TEXTO = 'string[pyarrow]'
+except ImportError:
+    TEXTO = 'object'
+
+SEXO_LIMPIO = pd.CategoricalDtype(['M', 'F'])
+ESTADOS_CITA = pd.CategoricalDtype(['Completada', 'Cancelada', 'Reprogramada'])
+
+# Datos originales: las fechas se mantienen como texto porque traen formatos
+# inválidos que corrige la limpieza (fecha_cita se repite mucho, por eso es
+# categórica); sexo conserva Male/Female. Las columnas de texto libre (nombre,
+# email, teléfono) usan cadenas de Arrow cuando pyarrow está instalado.
+# estado_cita es una categórica abierta para que un estado desconocido llegue
+# a la limpieza; el tipo cerrado ESTADOS_CITA solo se aplica a datos limpios.
+ESQUEMA_ORIGINAL = {
+    'pacientes': {
+        'id_paciente': 'Int32',
+        'nombre': TEXTO,
+        'fecha_nacimiento': TEXTO,
+        'edad': 'Int32',
+        'sexo': 'category',
+        'email': TEXTO,
+        'telefono': TEXTO,
+        'ciudad': 'category',
+    },
+    'citas': {
+        'id_cita': TEXTO,
+        'id_paciente': 'Int32',
+        'fecha_cita': 'category',
+        'especialidad': 'category',
+        'medico': 'category',
+        'costo': 'float32',
+        'estado_cita': 'category',
+    }
+}
+
+ESQUEMA_LIMPIO = {
+    'pacientes': {
+        **ESQUEMA_ORIGINAL['pacientes'],
+        'fecha_nacimiento': 'datetime64[ns]',
+        'sexo': SEXO_LIMPIO,
+    },
+    'citas': {
+        **ESQUEMA_ORIGINAL['citas'],
+        'fecha_cita': 'datetime64[ns]',
+        'estado_cita': ESTADOS_CITA,
+    }
+}
+
+def aplicar_esquema(df, tabla, limpio=False):
+    """Convierte las columnas conocidas de una tabla a sus tipos compactos"""
+    esquema = (ESQUEMA_LIMPIO if limpio else ESQUEMA_ORIGINAL)[tabla]
+    columnas = {}
+    for columna, tipo in esquema.items():
+        if columna not in df.columns:
+            continue
+        if tipo == 'datetime64[ns]':
+            columnas[columna] = pd.to_datetime(df[columna], errors='coerce')
+        elif tipo in ('Int32', 'float32'):
+            columnas[columna] = pd.to_numeric(df[columna], errors='coerce').astype(tipo)
+        elif tipo != 'object':
+            columnas[columna] = df[columna].astype(tipo)
+    return df.assign(**columnas)
+
+def cargar_dataset(ruta, limpio=False):
+    """Carga un dataset JSON y devuelve (pacientes, citas) con el esquema aplicado"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+
+    df_pacientes = aplicar_esquema(pd.DataFrame(datos['pacientes']), 'pacientes', limpio)
+    df_citas = aplicar_esquema(pd.DataFrame(datos['citas_medicas']), 'citas', limpio)
+    return df_pacientes, df_citas
+
+def a_registros_json(df):
+    """Convierte una tabla a registros serializables en JSON
+
+    Las fechas se escriben en formato ISO (YYYY-MM-DD) y los nulos como None.
+    """
+    fechas = {
+        columna: df[columna].dt.strftime('%Y-%m-%d')
+        for columna in df.columns
+        if pd.api.types.is_datetime64_any_dtype(df[columna])
+    }
+    salida = df.assign(**fechas).astype(object)
+    return salida.where(salida.notna(), None).to_dict('records')
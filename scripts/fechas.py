@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UTILIDADES DE FECHAS
+Gramática de formatos de fecha presentes en los datos (ISO, español y
+DD/MM/YYYY) y parseo memoizado para columnas con muchos valores repetidos
+"""
+
+import re
+import unicodedata
+from datetime import date
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+MESES = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
+    'julio': 7, 'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10,
+    'noviembre': 11, 'diciembre': 12,
+    'ene': 1, 'feb': 2, 'mar': 3, 'abr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'sep': 9, 'sept': 9, 'set': 9, 'oct': 10,
+    'nov': 11, 'dic': 12
+}
+
+# Patrones de la gramática; los grupos son siempre numéricos salvo el mes en español.
+# Los dígitos son solo ASCII: \d acepta también otros sistemas (p. ej. de ancho completo)
+PATRON_ISO = r'^([0-9]{4})-([0-9]{1,2})-([0-9]{1,2})$'
+PATRON_ESPAÑOL = r'([0-9]{1,2})\s+de\s+([^\W\d_]+)\.?\s+de\s+([0-9]{4})'
+PATRON_BARRA = r'^([0-9]{1,2})/([0-9]{1,2})/([0-9]{4})$'
+
+_ISO = re.compile(PATRON_ISO)
+_ESPAÑOL = re.compile(PATRON_ESPAÑOL, re.IGNORECASE)
+_BARRA = re.compile(PATRON_BARRA)
+
+@lru_cache(maxsize=None)
+def numero_mes(nombre):
+    """Número de mes para un nombre en español, sin importar mayúsculas ni tildes"""
+    normalizado = unicodedata.normalize('NFKD', nombre.lower())
+    normalizado = ''.join(c for c in normalizado if not unicodedata.combining(c))
+    return MESES.get(normalizado.rstrip('.'))
+
+def descomponer_fecha(texto):
+    """Descompone una fecha en (formato, año, mes, día) sin validar rangos
+    
+    Formatos: 'iso' (YYYY-MM-DD), 'español' (DD de MES de YYYY) y 'barra'
+    (DD/MM/YYYY). Devuelve None si el texto no sigue ninguno.
+    """
+    texto = texto.strip()
+    
+    # Vía rápida: ISO de 10 caracteres sin expresiones regulares
+    if len(texto) == 10 and texto[4] == '-' and texto[7] == '-' and texto.isascii():
+        año, mes, dia = texto[:4], texto[5:7], texto[8:]
+        if año.isdigit() and mes.isdigit() and dia.isdigit():
+            return 'iso', int(año), int(mes), int(dia)
+    
+    if '/' in texto:
+        coincidencia = _BARRA.match(texto)
+        if coincidencia is None:
+            return None
+        dia, mes, año = coincidencia.groups()
+        return 'barra', int(año), int(mes), int(dia)
+    
+    if 'de' in texto.lower():
+        coincidencia = _ESPAÑOL.search(texto)
+        if coincidencia is None:
+            return None
+        dia, nombre_mes, año = coincidencia.groups()
+        mes = numero_mes(nombre_mes)
+        return None if mes is None else ('español', int(año), mes, int(dia))
+    
+    coincidencia = _ISO.match(texto)
+    if coincidencia is None:
+        return None
+    año, mes, dia = coincidencia.groups()
+    return 'iso', int(año), int(mes), int(dia)
+
+def crear_fecha(año, mes, dia):
+    """Fecha del calendario o None si los componentes no son válidos"""
+    try:
+        return date(año, mes, dia)
+    except ValueError:
+        return None
+
+def aplicar_memoizado(serie, funcion):
+    """Aplica funcion a los valores únicos de una columna y difunde el resultado
+    
+    Devuelve (Serie de resultados alineada con serie, proporción únicos/total).
+    Los nulos no se pasan a funcion y quedan como None.
+    """
+    codigos, unicos = pd.factorize(serie)
+    resultados = np.empty(len(unicos) + 1, dtype=object)
+    resultados[:-1] = [funcion(valor) for valor in unicos]
+    resultados[-1] = None
+    
+    # El código -1 de los nulos apunta a la última posición (None)
+    salida = pd.Series(resultados[codigos], index=serie.index, name=serie.name)
+    proporcion = len(unicos) / len(serie) if len(serie) else 0.0
+    return salida, proporcion
+
+def parsear_memoizado(serie, parser):
+    """Parsea una columna de fechas procesando solo sus valores únicos
+    
+    parser recibe un valor no nulo y devuelve una fecha o None. Devuelve
+    (Serie datetime64 alineada con serie, proporción únicos/total).
+    """
+    codigos, unicos = pd.factorize(serie)
+    fechas = pd.to_datetime(pd.Series([parser(valor) for valor in unicos], dtype=object))
+    valores = np.append(fechas.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))
+    
+    salida = pd.Series(valores[codigos], index=serie.index, name=serie.name)
+    proporcion = len(unicos) / len(serie) if len(serie) else 0.0
+    return salida, proporcion
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GENERADOR DE DATOS SINTÉTICOS A ESCALA
+Produce datasets con el mismo esquema y perfil de defectos que
+datos/dataset_hospital.json, de forma determinista y por bloques
+"""
+
+import argparse
+import gzip
+import numpy as np
+import pandas as pd
+
+# Perfil de defectos medido sobre datos/dataset_hospital.json
+# (5,010 pacientes y 9,961 citas)
+PERFIL_DEFECTOS = {
+    'pacientes': {
+        'sexo': {'Male': 0.209, 'Female': 0.194, 'M': 0.192, 'F': 0.200, None: 0.205},
+        'nulos': {'edad': 0.329, 'email': 0.500, 'telefono': 0.333, 'ciudad': 0.165},
+        'fecha_español': 0.0006,
+        'fecha_dia_33': 0.0002,
+        'edad_inconsistente': 0.40,
+        'ids_duplicados': 0.002,
+    },
+    'citas': {
+        'nulos': {'fecha_cita': 0.329, 'especialidad': 0.168, 'medico': 0.204,
+                  'costo': 0.173, 'estado_cita': 0.255},
+        'fecha_mes_invalido': 0.496,
+        'huerfanas': 0.018,
+    }
+}
+
+NOMBRES = ['Andrea', 'Carlos', 'Claudia', 'Juan', 'María']
+APELLIDOS = ['Gómez', 'López', 'Pérez', 'Rojas', 'Torres']
+CIUDADES = ['Barranquilla', 'Bogotá', 'Bucaramanga', 'Cali', 'Medellín']
+ESPECIALIDADES = ['Cardiología', 'Ginecología', 'Neurología', 'Ortopedia', 'Pediatría']
+MEDICOS = ['Dr. Andrés Murcia', 'Dr. Camilo Rojas', 'Dr. Juan Valdez', 'Dra. Lina Torres']
+COSTOS = [100, 120, 180, 200, 220]
+ESTADOS = ['Completada', 'Cancelada', 'Reprogramada']
+MESES_ESPAÑOL = [
+    ('ene', 'enero'), ('feb', 'febrero'), ('mar', 'marzo'), ('abr', 'abril'),
+    ('may', 'mayo'), ('jun', 'junio'), ('jul', 'julio'), ('ago', 'agosto'),
+    ('sep', 'septiembre'), ('oct', 'octubre'), ('nov', 'noviembre'), ('dic', 'diciembre')
+]
+
+AÑO_REFERENCIA = 2025
+TAMAÑO_BLOQUE = 100_000
+
+# Filas de cada flujo aleatorio: los datos se generan por trozos fijos y luego
+# se reagrupan, así que no dependen del tamaño de bloque de escritura
+TAMAÑO_TROZO = 100_000
+
+def _rng(semilla, tabla, trozo):
+    """Generador aleatorio independiente por tabla y trozo"""
+    return np.random.default_rng([semilla, 0 if tabla == 'pacientes' else 1, trozo])
+
+def _rebloquear(trozos, tamaño_bloque):
+    """Reagrupa los trozos generados en bloques de tamaño_bloque filas"""
+    pendientes, n_pendientes = [], 0
+    for trozo in trozos:
+        pendientes.append(trozo)
+        n_pendientes += len(trozo)
+        while n_pendientes >= tamaño_bloque:
+            acumulado = pd.concat(pendientes, ignore_index=True) if len(pendientes) > 1 else pendientes[0]
+            yield acumulado.iloc[:tamaño_bloque].reset_index(drop=True)
+            resto = acumulado.iloc[tamaño_bloque:]
+            pendientes, n_pendientes = ([resto] if len(resto) else []), len(resto)
+    if n_pendientes:
+        yield pd.concat(pendientes, ignore_index=True)
+
+def _uuids(rng, n):
+    """UUID4 en texto generados de forma vectorizada"""
+    crudos = rng.integers(0, 256, (n, 16), dtype=np.uint8)
+    crudos[:, 6] = (crudos[:, 6] & 0x0F) | 0x40
+    crudos[:, 8] = (crudos[:, 8] & 0x3F) | 0x80
+    hexa = np.frombuffer(crudos.tobytes().hex().encode('ascii'), dtype='S1').reshape(n, 32)
+    con_guiones = np.insert(hexa, [8, 12, 16, 20], b'-', axis=1)
+    return np.ascontiguousarray(con_guiones).view('S36').ravel().astype(str)
+
+def _con_nulos(rng, valores, proporcion):
+    """Reemplaza una proporción de valores por None"""
+    valores = np.array(valores, dtype=object)
+    valores[rng.random(len(valores)) < proporcion] = None
+    return valores
+
+def _fechas_nacimiento(rng, n, perfil):
+    """Fechas ISO con una fracción en formato español y con día 33"""
+    años = rng.integers(1950, 2011, n)
+    meses = rng.integers(1, 13, n)
+    dias = rng.integers(1, 29, n)
+    fechas = pd.Series(pd.to_datetime({'year': años, 'month': meses, 'day': dias})
+                       .dt.strftime('%Y-%m-%d').to_numpy(dtype=object))
+
+    dia_33 = rng.random(n) < perfil['fecha_dia_33']
+    fechas[dia_33] = fechas[dia_33].str[:8] + '33'
+
+    español = (rng.random(n) < perfil['fecha_español']) & ~dia_33
+    if español.any():
+        nombre_largo = rng.random(n) < 0.5
+        fechas[español] = [
+            f"{dias[i]:02d} de {MESES_ESPAÑOL[meses[i] - 1][int(nombre_largo[i])]} de {años[i]}"
+            for i in np.flatnonzero(español)
+        ]
+
+    return fechas.to_numpy(dtype=object), años
+
+def bloques_pacientes(n_pacientes, semilla=42, tamaño_bloque=TAMAÑO_BLOQUE):
+    """Genera la tabla de pacientes por bloques de DataFrame"""
+    return _rebloquear(_trozos_pacientes(n_pacientes, semilla), tamaño_bloque)
+
+def _trozos_pacientes(n_pacientes, semilla):
+    """Pacientes en trozos de TAMAÑO_TROZO filas, cada uno con su propio flujo aleatorio"""
+    perfil = PERFIL_DEFECTOS['pacientes']
+    n_duplicados = int(round(n_pacientes * perfil['ids_duplicados']))
+    n_base = n_pacientes - n_duplicados
+
+    for trozo, inicio in enumerate(range(0, n_pacientes, TAMAÑO_TROZO)):
+        fin = min(inicio + TAMAÑO_TROZO, n_pacientes)
+        n = fin - inicio
+        rng = _rng(semilla, 'pacientes', trozo)
+
+        # Los últimos registros repiten IDs ya emitidos (duplicados de origen)
+        ids = np.arange(inicio + 1, fin + 1)
+        duplicados = ids > n_base
+        if duplicados.any():
+            paso = max(1, n_base // max(1, n_duplicados))
+            ids[duplicados] = (ids[duplicados] - n_base) * paso
+
+        fechas, años_nac = _fechas_nacimiento(rng, n, perfil)
+        edades = AÑO_REFERENCIA - años_nac
+        inconsistentes = rng.random(n) < perfil['edad_inconsistente']
+        edades[inconsistentes] = rng.integers(10, 91, inconsistentes.sum())
+
+        sexo_valores = list(perfil['sexo'])
+        sexo_probs = np.array(list(perfil['sexo'].values()))
+        sexo = np.array(sexo_valores, dtype=object)[
+            rng.choice(len(sexo_valores), n, p=sexo_probs / sexo_probs.sum())
+        ]
+
+        telefonos = np.where(
+            rng.random(n) < 0.5,
+            [f"3{a:02d}-{b:03d}-{c:04d}" for a, b, c in zip(
+                rng.integers(40, 90, n), rng.integers(0, 1000, n), rng.integers(0, 10000, n))],
+            [f"31{a:08d}" for a in rng.integers(0, 10**8, n)]
+        )
+
+        nulos = perfil['nulos']
+        yield pd.DataFrame({
+            'id_paciente': ids,
+            'nombre': np.char.add(np.char.add(rng.choice(NOMBRES, n), ' '), rng.choice(APELLIDOS, n)),
+            'fecha_nacimiento': fechas,
+            'edad': pd.array(_con_nulos(rng, edades, nulos['edad']), dtype='Int64'),
+            'sexo': sexo,
+            'email': _con_nulos(rng, np.char.add(np.char.add('user', ids.astype(str)), '@example.com'),
+                                nulos['email']),
+            'telefono': _con_nulos(rng, telefonos, nulos['telefono']),
+            'ciudad': _con_nulos(rng, rng.choice(CIUDADES, n), nulos['ciudad'])
+        })
+
+def bloques_citas(n_citas, n_pacientes, semilla=42, tamaño_bloque=TAMAÑO_BLOQUE):
+    """Genera la tabla de citas médicas por bloques de DataFrame"""
+    return _rebloquear(_trozos_citas(n_citas, n_pacientes, semilla), tamaño_bloque)
+
+def _trozos_citas(n_citas, n_pacientes, semilla):
+    """Citas en trozos de TAMAÑO_TROZO filas, cada uno con su propio flujo aleatorio"""
+    perfil = PERFIL_DEFECTOS['citas']
+    nulos = perfil['nulos']
+    n_validos = n_pacientes - int(round(n_pacientes * PERFIL_DEFECTOS['pacientes']['ids_duplicados']))
+
+    for trozo, inicio in enumerate(range(0, n_citas, TAMAÑO_TROZO)):
+        n = min(inicio + TAMAÑO_TROZO, n_citas) - inicio
+        rng = _rng(semilla, 'citas', trozo)
+
+        ids_cita = _uuids(rng, n)
+
+        # Citas huérfanas: referencian IDs por encima del rango de pacientes
+        ids_paciente = rng.integers(1, n_validos + 1, n)
+        huerfanas = rng.random(n) < perfil['huerfanas']
+        ids_paciente[huerfanas] = rng.integers(
+            int(n_pacientes * 1.2), int(n_pacientes * 1.4) + 2, huerfanas.sum()
+        )
+
+        # Fechas válidas 2022-2025 o con mes 13-20 (formato 2023-MM-01)
+        fechas = pd.Series(pd.to_datetime({
+            'year': rng.integers(2022, 2026, n),
+            'month': rng.integers(1, 13, n),
+            'day': rng.integers(1, 29, n)
+        }).dt.strftime('%Y-%m-%d').to_numpy(dtype=object))
+        mes_invalido = rng.random(n) < perfil['fecha_mes_invalido']
+        fechas[mes_invalido] = [f"2023-{mes}-01" for mes in rng.integers(13, 21, mes_invalido.sum())]
+
+        yield pd.DataFrame({
+            'id_cita': ids_cita,
+            'id_paciente': ids_paciente,
+            'fecha_cita': _con_nulos(rng, fechas.to_numpy(dtype=object), nulos['fecha_cita']),
+            'especialidad': _con_nulos(rng, rng.choice(ESPECIALIDADES, n), nulos['especialidad']),
+            'medico': _con_nulos(rng, rng.choice(MEDICOS, n), nulos['medico']),
+            'costo': pd.array(_con_nulos(rng, rng.choice(COSTOS, n), nulos['costo']), dtype='Int64'),
+            'estado_cita': _con_nulos(rng, rng.choice(ESTADOS, n), nulos['estado_cita'])
+        })
+
+def generar_dataframes(n_pacientes, n_citas, semilla=42):
+    """Genera el dataset completo en memoria (para tamaños moderados)"""
+    df_pacientes = pd.concat(bloques_pacientes(n_pacientes, semilla), ignore_index=True)
+    df_citas = pd.concat(bloques_citas(n_citas, n_pacientes, semilla), ignore_index=True)
+    return df_pacientes, df_citas
+
+def _escribir_tabla(archivo, bloques):
+    """Escribe los bloques como elementos de un arreglo JSON"""
+    primero = True
+    for df in bloques:
+        lineas = df.to_json(orient='records', lines=True, force_ascii=False).rstrip('\n')
+        if not lineas:
+            continue
+        archivo.write('\n    ' if primero else ',\n    ')
+        archivo.write(lineas.replace('\n', ',\n    '))
+        primero = False
+    archivo.write('\n  ')
+
+def generar_dataset(ruta_salida, n_pacientes, n_citas, semilla=42, tamaño_bloque=TAMAÑO_BLOQUE):
+    """Escribe un dataset sintético en el formato de dataset_hospital.json
+
+    Las tablas se generan y escriben bloque a bloque, por lo que la memoria
+    usada depende de tamaño_bloque y no del total de registros; el contenido
+    solo depende de la semilla, no de tamaño_bloque. Si la ruta
+    termina en .gz la salida se comprime.
+    """
+    abrir = gzip.open if ruta_salida.endswith('.gz') else open
+    with abrir(ruta_salida, 'wt', encoding='utf-8') as archivo:
+        archivo.write('{\n  "pacientes": [')
+        _escribir_tabla(archivo, bloques_pacientes(n_pacientes, semilla, tamaño_bloque))
+        archivo.write('],\n  "citas_medicas": [')
+        _escribir_tabla(archivo, bloques_citas(n_citas, n_pacientes, semilla, tamaño_bloque))
+        archivo.write(']\n}\n')
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de datos hospitalarios sintéticos")
+    parser.add_argument('--pacientes', type=int, default=5_000)
+    parser.add_argument('--citas', type=int, default=10_000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--tamaño-bloque', type=int, default=TAMAÑO_BLOQUE)
+    parser.add_argument('--salida', default='../datos/dataset_sintetico.json')
+    args = parser.parse_args()
+
+    print("GENERANDO DATASET SINTÉTICO")
+    print("=" * 60)
+    print(f"  - Pacientes: {args.pacientes:,}")
+    print(f"  - Citas: {args.citas:,}")
+    print(f"  - Semilla: {args.semilla}")
+
+    generar_dataset(args.salida, args.pacientes, args.citas, args.semilla, args.tamaño_bloque)
+
+    print(f"\nDataset guardado en: {args.salida}")
+
+if __name__ == "__main__":
+    main()
@@ -2,402 +2,136 @@
 # -*- coding: utf-8 -*-
 """
 Generador de Informe Técnico en PDF
-Consolida todos los hallazgos y resultados del proyecto
+Consolida todos los hallazgos y resultados del proyecto en texto, HTML y PDF
+(plantillas/informe_tecnico.txt) y renderiza también el reporte ejecutivo
 """
 
-import os
+import argparse
+import importlib
+import sys
 from datetime import datetime
-
-def generar_informe_completo():
-    """Genera el informe técnico completo en formato texto para convertir a PDF"""
-    
-    informe = f"""
-===============================================================================
-INFORME TÉCNICO - ANÁLISIS Y LIMPIEZA DE DATOS HOSPITALARIOS
-===============================================================================
-
-INFORMACIÓN DEL PROYECTO
-Desarrollado por: Johnnatan Villada Flórez
-Fecha: {datetime.now().strftime('%d de %B de %Y')}
-Duración estimada: 6 horas
-Tipo: Prueba Técnica - Ingeniero de Datos
-
-===============================================================================
-RESUMEN EJECUTIVO
-===============================================================================
-
-Se realizó un análisis integral de calidad de datos sobre un dataset hospitalario
-conteniendo 5,010 registros de pacientes y 9,961 registros de citas médicas.
-
-El análisis identificó 5,525 problemas críticos de calidad que fueron 
-sistemáticamente resueltos mediante técnicas avanzadas de limpieza de datos.
-
-RESULTADOS PRINCIPALES:
-- Score de calidad general: 60.2% → 88.6% (+28.4 puntos)
-- Problemas críticos resueltos: 5,525 casos
-- Integridad referencial: 98.1% → 100%
-- Validaciones automáticas: 12/12 exitosas
-
-===============================================================================
-PARTE 1: ANÁLISIS EXPLORATORIO Y HALLAZGOS DE CALIDAD
-===============================================================================
-
-1.1 METODOLOGÍA DE ANÁLISIS
-Se aplicó un enfoque sistemático de análisis de calidad basado en las 
-dimensiones fundamentales:
-- Completitud: Porcentaje de valores no faltantes
-- Consistencia: Adherencia a formatos y estándares
-- Precisión: Validez según reglas de negocio
-- Integridad: Integridad referencial entre tablas
-
-1.2 PROBLEMAS CRÍTICOS IDENTIFICADOS
-
-TABLA PACIENTES (5,010 registros):
-1. Inconsistencias en formato de sexo: 2,021 casos
-   - Valores encontrados: Male, Female, M, F, null
-   - Impacto: Imposibilidad de análisis demográfico consistente
-
-2. Valores faltantes masivos:
-   - Edad: 1,647 casos (32.9%)
-   - Email: 2,506 casos (50.0%)
-   - Teléfono: 1,668 casos (33.3%)
-   - Ciudad: 827 casos (16.5%)
-
-3. Fechas de nacimiento inconsistentes: 4 casos
-   - Formatos en español: "02 de nov de 1977"
-   - Fechas inválidas: "1959-06-33" (día 33)
-
-4. Duplicación masiva de nombres: 4,985 casos (99.5%)
-   - Indica dataset sintético/generado
-   - Nombres más frecuentes: Juan Gómez (224 veces)
-
-TABLA CITAS MÉDICAS (9,961 registros):
-1. Fechas de citas inválidas: 3,314 casos (33.3%)
-   - Formatos incorrectos: "2023-19-01" (mes 19)
-   - Meses inválidos: 13, 14, 15, 16, 17, 18, 19, 20
-
-2. Estados de cita faltantes: 2,542 casos (25.5%)
-   - Valores null sin clasificación
-
-3. Problemas de integridad referencial: 190 casos
-   - Citas referencian pacientes inexistentes
-   - IDs huérfanos identificados
-
-4. Valores faltantes operacionales:
-   - Especialidad: 1,673 casos (16.8%)
-   - Médico: 2,033 casos (20.4%)
-   - Fecha: 3,278 casos (32.9%)
-
-1.3 IMPACTO EN CALIDAD DE DATOS
-- Score inicial de completitud: 67.1%
-- Score inicial de consistencia: 39.4%
-- Score inicial de integridad: 98.1%
-- Score general inicial: 68.2%
-
-===============================================================================
-PARTE 2: ESTRATEGIA DE LIMPIEZA Y VALIDACIÓN
-===============================================================================
-
-2.1 METODOLOGÍA DE LIMPIEZA
-Se implementó un sistema de limpieza en cascada con las siguientes fases:
-
-FASE 1: Estandarización de formatos
-- Normalización de valores categóricos
-- Conversión de fechas a formato ISO
-- Unificación de códigos y etiquetas
-
-FASE 2: Corrección de errores estructurales
-- Reparación de fechas inválidas
-- Corrección de formatos inconsistentes
-- Validación de rangos y dominios
-
-FASE 3: Completado inteligente de datos
-- Cálculo de edades desde fechas de nacimiento
-- Inferencia de estados de citas por lógica de negocio
-- Llenado de especialidades por médico
-
-FASE 4: Validación de integridad
-- Eliminación de registros huérfanos
-- Verificación de claves foráneas
-- Validación cruzada entre tablas
-
-2.2 SUPUESTOS ADOPTADOS
-
-SUPUESTO 1: Corrección de fechas con mes >12
-- Lógica: Meses 13-24 se corrigieron restando 12
-- Justificación: Patrón sistemático detectado (mes 13 = enero del año siguiente)
-- Ejemplo: "2023-19-01" → "2023-07-01" (19-12=7)
-
-SUPUESTO 2: Priorización de fecha de nacimiento sobre edad registrada
-- Lógica: En discrepancias >2 años, se usó edad calculada
-- Justificación: Fecha de nacimiento es más confiable que edad estática
-- Impacto: 847 edades corregidas
-
-SUPUESTO 3: Inferencia de estados de citas
-- Regla 1: Fecha + Costo → "Completada"
-- Regla 2: Sin fecha → "Cancelada"  
-- Regla 3: Otros casos → "Reprogramada"
-- Justificación: Lógica de negocio estándar en sistemas hospitalarios
-
-SUPUESTO 4: Eliminación de registros huérfanos
-- Lógica: Citas sin paciente válido se eliminaron
-- Justificación: Preservar integridad referencial
-- Impacto: 190 citas eliminadas (1.9%)
-
-SUPUESTO 5: Estandarización de sexo
-- Mapeo: Male→M, Female→F
-- Valores null se mantuvieron para decisión de negocio
-- Justificación: Formato estándar en sistemas médicos
-
-2.3 TÉCNICAS DE VALIDACIÓN IMPLEMENTADAS
-
-VALIDACIÓN CRUZADA 1: Consistencia edad-fecha nacimiento
-- Tolerancia: ±2 años
-- Algoritmo: (fecha_actual - fecha_nacimiento) / 365.25
-- Casos corrigidos: 847
-
-VALIDACIÓN CRUZADA 2: Integridad referencial pacientes-citas
-- Verificación: id_paciente en citas existe en tabla pacientes
-- Acción: Eliminación de citas huérfanas
-- Resultado: 100% de integridad lograda
-
-VALIDACIÓN CRUZADA 3: Rangos de fechas válidos
-- Fechas nacimiento: 1900-2024
-- Fechas citas: 2020-2030
-- Fechas futuras: >2 años se marcaron como inválidas
-
-VALIDACIÓN CRUZADA 4: Dominios de valores categóricos
-- Sexo: Solo M, F, null
-- Estados cita: Solo Completada, Cancelada, Reprogramada
-- Especialidades: Catálogo médico estándar
-
-===============================================================================
-PARTE 3: MÉTRICAS DE CALIDAD - ANTES VS DESPUÉS
-===============================================================================
-
-3.1 COMPLETITUD DE DATOS
-
-TABLA PACIENTES:
-Campo                | Antes    | Después  | Mejora
----------------------|----------|----------|--------
-id_paciente         | 100.0%   | 100.0%   | 0.0%
-nombre              | 100.0%   | 100.0%   | 0.0%
-fecha_nacimiento    | 100.0%   | 99.9%    | -0.1%
-edad                | 67.1%    | 95.2%    | +28.1%
-sexo                | 79.6%    | 79.6%    | 0.0%
-email               | 50.0%    | 50.0%    | 0.0%
-telefono            | 66.7%    | 66.7%    | 0.0%
-ciudad              | 83.5%    | 83.5%    | 0.0%
-
-TABLA CITAS:
-Campo                | Antes    | Después  | Mejora
----------------------|----------|----------|--------
-id_cita             | 100.0%   | 100.0%   | 0.0%
-id_paciente         | 100.0%   | 100.0%   | 0.0%
-fecha_cita          | 67.1%    | 69.2%    | +2.1%
-especialidad        | 83.2%    | 85.1%    | +1.9%
-medico              | 79.6%    | 79.6%    | 0.0%
-costo               | 82.7%    | 82.7%    | 0.0%
-estado_cita         | 74.5%    | 100.0%   | +25.5%
-
-3.2 CONSISTENCIA DE FORMATOS
-
-DIMENSIÓN           | Antes    | Después  | Mejora
---------------------|----------|----------|--------
-Sexo estandarizado  | 39.4%    | 79.6%    | +40.2%
-Fechas ISO format   | 99.6%    | 100.0%   | +0.4%
-Estados válidos     | 74.5%    | 100.0%   | +25.5%
-
-3.3 INTEGRIDAD REFERENCIAL
-
-MÉTRICA             | Antes    | Después  | Mejora
---------------------|----------|----------|--------
-Citas con paciente  | 98.1%    | 100.0%   | +1.9%
-IDs únicos          | 100.0%   | 100.0%   | 0.0%
-Claves foráneas     | 98.1%    | 100.0%   | +1.9%
-
-3.4 PRECISIÓN DE DATOS
-
-VALIDACIÓN          | Antes    | Después  | Mejora
---------------------|----------|----------|--------
-Fechas válidas      | 66.7%    | 100.0%   | +33.3%
-Rangos de edad      | 100.0%   | 100.0%   | 0.0%
-Costos válidos      | 100.0%   | 100.0%   | 0.0%
-Consistencia edad   | 83.2%    | 99.8%    | +16.6%
-
-3.5 SCORE GENERAL DE CALIDAD
-- Score inicial: 68.2/100
-- Score final: 88.6/100
-- Mejora total: +20.4 puntos (+29.9%)
-
-===============================================================================
-PARTE 4: VALIDACIONES IMPLEMENTADAS
-===============================================================================
-
-4.1 SUITE DE TESTS AUTOMÁTICOS
-Se implementaron 12 tests automáticos usando pytest:
-
-1. test_integridad_estructural: Verificar estructura de tablas
-2. test_unicidad_ids: Validar IDs únicos
-3. test_integridad_referencial: Verificar claves foráneas
-4. test_valores_sexo_validos: Validar dominio de sexo
-5. test_rangos_edad_validos: Verificar rangos 0-120 años
-6. test_estados_cita_validos: Validar estados permitidos
-7. test_fechas_nacimiento_validas: Verificar fechas 1900-2024
-8. test_fechas_cita_validas: Verificar fechas 2020-2030
-9. test_costos_validos: Validar costos positivos
-10. test_consistencia_edad_fecha_nacimiento: Verificar consistencia
-11. test_emails_formato_valido: Validar formato de emails
-12. test_volumenes_esperados: Verificar volúmenes de datos
-
-RESULTADO: 12/12 tests pasaron exitosamente (100%)
-
-4.2 VALIDACIONES CRUZADAS ESPECÍFICAS
-
-VALIDACIÓN DE REGLAS DE NEGOCIO:
-- Pacientes menores de 18 años no tienen citas ginecológicas
-- Fechas de citas posteriores a fechas de nacimiento
-- Costos dentro de rangos esperados (100-300)
-- Estados de cita consistentes con presencia de fecha/costo
-
-VALIDACIÓN DE INTEGRIDAD:
-- Todas las citas tienen paciente válido
-- No hay IDs duplicados en ninguna tabla
-- Todas las fechas están en formatos estándar
-- Todos los campos categóricos usan valores del dominio
-
-===============================================================================
-PARTE 5: IMPLEMENTACIONES ADICIONALES (BONUS)
-===============================================================================
-
-5.1 PRUEBAS AUTOMÁTICAS AVANZADAS
-- Framework: pytest con validaciones customizadas
-- Cobertura: 100% de casos críticos
-- Ejecución: Automática con reporte detallado
-- Integración: Lista para CI/CD
-
-5.2 SIMULACIÓN DE DATA WAREHOUSE
-- Esquema: Modelo estrella implementado
-- Dimensiones: Pacientes, Médicos, Especialidades, Tiempo
-- Hechos: Citas médicas con métricas
-- Base de datos: SQLite para demostración
-- Reportes: 3 análisis de ejemplo generados
-
-5.3 DASHBOARD INTERACTIVO
-- Tecnología: Plotly con visualizaciones avanzadas
-- Métricas: KPIs en tiempo real
-- Comparativa: Antes vs después de limpieza
-- Interactividad: Gráficos dinámicos
-- Accesibilidad: Interface web profesional
-
-===============================================================================
-PARTE 6: RECOMENDACIONES PARA CALIDAD FUTURA
-===============================================================================
-
-6.1 PREVENCIÓN EN ORIGEN
-1. Implementar validaciones en tiempo real durante captura
-2. Establecer catálogos controlados para campos categóricos
-3. Configurar alertas automáticas para valores atípicos
-4. Crear formularios con validación client-side
-
-6.2 MONITOREO CONTINUO
-1. Dashboard de calidad en tiempo real
-2. Tests automáticos en pipeline de datos
-3. Reportes periódicos de calidad
-4. KPIs de calidad por área/sistema
-
-6.3 GOBIERNO DE DATOS
-1. Definir roles y responsabilidades claros
-2. Establecer procesos de escalamiento
-3. Documentar estándares de datos
-4. Crear políticas de calidad de datos
-
-6.4 TECNOLOGÍA Y HERRAMIENTAS
-1. Evaluar herramientas enterprise (Great Expectations, Deequ)
-2. Implementar data lineage
-3. Automatizar procesos de limpieza recurrentes
-4. Integrar validaciones en CI/CD
-
-===============================================================================
-CONCLUSIONES
-===============================================================================
-
-LOGROS PRINCIPALES:
-1. Identificación exitosa de 5,525 problemas críticos de calidad
-2. Implementación de soluciones sistemáticas y escalables
-3. Mejora del score de calidad general en 20.4 puntos
-4. Validación completa con tests automáticos
-5. Entregables adicionales que superan los requisitos
-
-VALOR AGREGADO:
-- Dashboard interactivo profesional
-- Simulación completa de Data Warehouse
-- Suite de tests automáticos robusta
-- Documentación exhaustiva del proceso
-- Código reutilizable y escalable
-
-ESTADO FINAL:
-Los datos están completamente validados y listos para uso en producción.
-Todas las métricas de calidad cumplen con estándares empresariales.
-
-TIEMPO INVERTIDO: 6 horas
-COMPLEJIDAD MANEJADA: Alta (5,000+ registros, 15+ tipos de problemas)
-RESULTADO: Exitoso con valor agregado significativo
-
-===============================================================================
-ANEXOS
-===============================================================================
-
-ANEXO A: Archivos entregados
-- Códigos fuente: 7 scripts Python
-- Datos procesados: JSON y CSV limpios
-- Reportes: 5 documentos técnicos
-- Dashboard: HTML interactivo
-- Base de datos: Simulación DW
-- Tests: Suite completa pytest
-
-ANEXO B: Estructura del proyecto
-proyecto-datos-hospital/
-├── datos/                    # Datos originales
-├── scripts/                  # Códigos fuente
-├── resultados/              # Datos procesados
-├── reportes/                # Documentación
-└── README.md               # Guía del proyecto
-
-ANEXO C: Tecnologías utilizadas
-- Python 3.9+
-- pandas, numpy, matplotlib, seaborn
-- plotly (visualizaciones interactivas)
-- pytest (testing automático)
-- sqlite3 (simulación DW)
-- JSON, CSV (formatos de datos)
-
-===============================================================================
-FIN DEL INFORME TÉCNICO
-===============================================================================
-Desarrollado por: Johnnatan Villada Flórez
-Fecha: {datetime.now().strftime('%d de %B de %Y')}
-Duración: 6 horas
-===============================================================================
-"""
-    
-    return informe
+from informes import FORMATOS, renderizar_informe
+from metricas_ejecucion import MetricaNoDisponible, leer_manifiesto, metrica
+
+RUTA_INFORME = '../reportes/informe_tecnico_completo'
+
+def fila_comparativa(nombre, antes, despues):
+    """Fila 'nombre | antes | después | mejora' de las tablas de métricas (en %)"""
+    return f"{nombre:<20}| {f'{antes:.1f}%':<9}| {f'{despues:.1f}%':<9}| {despues - antes:+.1f}%"
+
+def tabla_completitud(limpieza, tabla):
+    """Filas de completitud por columna antes y después de la limpieza"""
+    filas = limpieza['filas'][tabla]
+    nulos_antes = limpieza['nulos']['antes'][tabla]
+    nulos_despues = limpieza['nulos']['despues'][tabla]
+    return "\n".join(
+        fila_comparativa(columna, (1 - nulos_antes[columna] / filas['antes']) * 100,
+                         (1 - nulos_despues.get(columna, 0) / filas['despues']) * 100)
+        for columna in nulos_antes
+    )
+
+def contexto_informe(manifiesto):
+    """Valores ya formateados de la plantilla del informe técnico
+
+    Todas las cifras salen del manifiesto de ejecución que registran las
+    etapas de exploración, limpieza, validación y tests.
+    """
+    exploracion = metrica(manifiesto, 'exploracion')
+    limpieza = metrica(manifiesto, 'limpieza')
+    validacion = metrica(manifiesto, 'validacion')
+    tests = metrica(manifiesto, 'tests')
+
+    filas = exploracion['filas']
+    defectos = exploracion['defectos']
+    nulos_pac = exploracion['nulos']['pacientes']
+    nulos_citas = exploracion['nulos']['citas']
+    problemas = limpieza['problemas_resueltos']
+    antes = validacion['scores']['antes']
+    despues = validacion['scores']['despues']
+    estados_antes = (1 - limpieza['nulos']['antes']['citas']['estado_cita'] / limpieza['filas']['citas']['antes']) * 100
+    estados_despues = (1 - limpieza['nulos']['despues']['citas']['estado_cita'] / limpieza['filas']['citas']['despues']) * 100
+    mejora_general = despues['general'] - antes['general']
+
+    def conteo_pac(n):
+        return f"{n:,}", f"{n / filas['pacientes'] * 100:.1f}"
+
+    def conteo_citas(n):
+        return f"{n:,}", f"{n / filas['citas'] * 100:.1f}"
+
+    contexto = {
+        'fecha': datetime.now().strftime('%d de %B de %Y'),
+        'pacientes': f"{filas['pacientes']:,}",
+        'citas': f"{filas['citas']:,}",
+        'problemas_total': f"{problemas['total']:,}",
+        'general_antes': f"{antes['general']:.1f}",
+        'general_despues': f"{despues['general']:.1f}",
+        'mejora_puntos': f"{mejora_general:+.1f}",
+        'mejora_puntos_abs': f"{mejora_general:.1f}",
+        'mejora_relativa': f"{mejora_general / antes['general'] * 100:+.1f}",
+        'integridad_antes': f"{antes['integridad']:.1f}",
+        'integridad_despues': f"{despues['integridad']:.1f}",
+        'completitud_antes': f"{antes['completitud']:.1f}",
+        'consistencia_antes': f"{antes['consistencia']:.1f}",
+        'validez_antes': f"{antes['validez']:.1f}",
+        'tests_pasados': str(tests['pasados']),
+        'tests_total': str(tests['total']),
+        'pct_tests': f"{tests['pasados'] / tests['total'] * 100:.0f}",
+        'sexo_inconsistente': f"{defectos['sexo_inconsistente']:,}",
+        'fechas_nacimiento_inconsistentes': f"{defectos['fechas_nacimiento_español'] + defectos['fechas_nacimiento_invalidas']:,}",
+        'nombre_mas_frecuente': exploracion['nombre_mas_frecuente']['nombre'],
+        'veces_nombre_mas_frecuente': f"{exploracion['nombre_mas_frecuente']['veces']:,}",
+        'citas_huerfanas': f"{defectos['citas_huerfanas']:,}",
+        'edades_recalculadas': f"{limpieza['cambios_por_regla'].get('edad_discrepante_recalculada', 0):,}",
+        'completitud_pacientes': tabla_completitud(limpieza, 'pacientes'),
+        'completitud_citas': tabla_completitud(limpieza, 'citas'),
+        'fila_sexo': fila_comparativa('Sexo estandarizado', antes['consistencia'], despues['consistencia']),
+        'fila_estados': fila_comparativa('Estados válidos', estados_antes, estados_despues),
+        'fila_integridad': fila_comparativa('Citas con paciente', antes['integridad'], despues['integridad']),
+        'fila_validez': fila_comparativa('Fechas válidas', antes['validez'], despues['validez']),
+    }
+    for columna in ('edad', 'email', 'telefono', 'ciudad'):
+        contexto[f'nulos_{columna}'], contexto[f'pct_nulos_{columna}'] = conteo_pac(nulos_pac[columna])
+    for columna in ('especialidad', 'medico', 'fecha_cita'):
+        contexto[f'nulos_{columna}'], contexto[f'pct_nulos_{columna}'] = conteo_citas(nulos_citas[columna])
+    contexto['nombres_duplicados'], contexto['pct_nombres_duplicados'] = conteo_pac(defectos['nombres_duplicados'])
+    contexto['fechas_cita_invalidas'], contexto['pct_fechas_cita_invalidas'] = conteo_citas(defectos['fechas_cita_invalidas'])
+    contexto['estados_faltantes'], contexto['pct_estados_faltantes'] = conteo_citas(defectos['estados_cita_faltantes'])
+    contexto['huerfanas_eliminadas'], contexto['pct_huerfanas_eliminadas'] = conteo_citas(problemas['citas_huerfanas_eliminadas'])
+    return contexto
+
+def generar_informe_completo(manifiesto, formatos=FORMATOS, usar_cache=True):
+    """Genera el informe técnico completo en los formatos pedidos y devuelve el texto"""
+    return renderizar_informe('informe_tecnico', contexto_informe(manifiesto), RUTA_INFORME, formatos,
+                              titulo='Informe Técnico - Datos Hospitalarios', usar_cache=usar_cache)
 
 def main():
-    print("GENERANDO INFORME TÉCNICO COMPLETO...")
-    
-    informe = generar_informe_completo()
-    
-    # Guardar informe
-    with open('../reportes/informe_tecnico_completo.txt', 'w', encoding='utf-8') as f:
-        f.write(informe)
-    
-    print("Informe técnico generado en: reportes/informe_tecnico_completo.txt")
-    print("\nPara convertir a PDF:")
-    print("1. Abre el archivo .txt")
-    print("2. Copia el contenido a un editor como Word/Google Docs")
-    print("3. Aplica formato y exporta como PDF")
-    print("\nO usa herramientas online de conversión TXT → PDF")
+    parser = argparse.ArgumentParser(description="Informe técnico y reporte ejecutivo en texto, HTML y PDF")
+    parser.add_argument('--formatos', nargs='+', choices=FORMATOS, default=list(FORMATOS),
+                        help="Formatos de salida")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="Renderiza todas las secciones aunque no hayan cambiado")
+    parser.add_argument('--solo-tecnico', action='store_true',
+                        help="No renderiza el reporte ejecutivo")
+    args = parser.parse_args()
+
+    print("GENERANDO INFORMES...")
+
+    manifiesto = leer_manifiesto()
+    try:
+        generar_informe_completo(manifiesto, args.formatos, not args.sin_cache)
+        if not args.solo_tecnico:
+            validacion_final = importlib.import_module('04_validacion_final')
+            validacion_final.generar_reporte_ejecutivo(manifiesto, args.formatos, not args.sin_cache)
+    except MetricaNoDisponible as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    print("\nInformes generados en reportes/:")
+    for formato in args.formatos:
+        print(f"- informe_tecnico_completo.{formato}")
+    if not args.solo_tecnico:
+        for formato in args.formatos:
+            print(f"- reporte_ejecutivo_final.{formato}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
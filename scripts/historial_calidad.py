@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HISTORIAL DE CALIDAD
+Serie temporal de solo inserción (SQLite) con los KPIs de calidad, las filas
+y los tiempos por etapa de cada ejecución del pipeline
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from contextlib import closing
+import pandas as pd
+
+RUTA_HISTORIAL = '../resultados/historial_calidad.db'
+
+KPIS = ('completitud', 'consistencia', 'integridad')
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id_ejecucion INTEGER PRIMARY KEY AUTOINCREMENT,
+    marca REAL NOT NULL,
+    completitud REAL,
+    consistencia REAL,
+    integridad REAL,
+    filas_pacientes INTEGER,
+    filas_citas INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_ejecuciones_marca ON ejecuciones (marca);
+CREATE TABLE IF NOT EXISTS tiempos_etapas (
+    id_ejecucion INTEGER NOT NULL REFERENCES ejecuciones (id_ejecucion),
+    etapa TEXT NOT NULL,
+    segundos REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tiempos_etapa ON tiempos_etapas (etapa, id_ejecucion);
+"""
+
+def conectar(ruta=RUTA_HISTORIAL):
+    """Abre el historial y crea las tablas si no existen"""
+    conn = sqlite3.connect(ruta)
+    conn.executescript(ESQUEMA)
+    return conn
+
+def registrar_ejecucion(kpis, filas, tiempos=None, ruta=RUTA_HISTORIAL, marca=None):
+    """Agrega una ejecución al historial y devuelve su id
+
+    kpis: {'completitud': %, 'consistencia': %, 'integridad': %}
+    filas: {'pacientes': n, 'citas': n}
+    tiempos: {etapa: segundos}
+    """
+    with closing(conectar(ruta)) as conn, conn:
+        cursor = conn.execute(
+            "INSERT INTO ejecuciones (marca, completitud, consistencia, integridad, "
+            "filas_pacientes, filas_citas) VALUES (?, ?, ?, ?, ?, ?)",
+            (time.time() if marca is None else marca, *(kpis[kpi] for kpi in KPIS),
+             filas['pacientes'], filas['citas'])
+        )
+        id_ejecucion = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO tiempos_etapas (id_ejecucion, etapa, segundos) VALUES (?, ?, ?)",
+            [(id_ejecucion, etapa, float(segundos)) for etapa, segundos in (tiempos or {}).items()]
+        )
+    return id_ejecucion
+
+def consultar_submuestreado(ruta, sql, puntos, desde=None):
+    """Ejecuta sql agrupando las ejecuciones en hasta `puntos` intervalos de tiempo iguales
+
+    sql recibe `desde` como único parámetro y el marcador {intervalo}, la
+    expresión que asigna cada e.marca a su intervalo.
+    """
+    if not os.path.exists(ruta):
+        return pd.DataFrame()
+    desde = 0.0 if desde is None else desde
+    with closing(conectar(ruta)) as conn:
+        inicio, fin = conn.execute(
+            "SELECT MIN(marca), MAX(marca) FROM ejecuciones WHERE marca >= ?", (desde,)).fetchone()
+        if inicio is None:
+            return pd.DataFrame()
+        intervalo = (f"MIN({int(puntos) - 1}, "
+                     f"CAST((e.marca - {inicio!r}) * {int(puntos)} / ({fin!r} - {inicio!r} + 1e-9) AS INTEGER))")
+        df = pd.read_sql(sql.format(intervalo=intervalo), conn, params=(desde,))
+    df['fecha'] = pd.to_datetime(df['marca'], unit='s')
+    return df
+
+def leer_tendencia(ruta=RUTA_HISTORIAL, puntos=50, desde=None):
+    """Promedio de KPIs y filas por intervalo de tiempo (como mucho `puntos` filas)"""
+    return consultar_submuestreado(ruta, """
+        SELECT AVG(e.marca) AS marca,
+               AVG(e.completitud) AS completitud,
+               AVG(e.consistencia) AS consistencia,
+               AVG(e.integridad) AS integridad,
+               AVG(e.filas_pacientes) AS filas_pacientes,
+               AVG(e.filas_citas) AS filas_citas,
+               COUNT(*) AS ejecuciones
+        FROM ejecuciones e
+        WHERE e.marca >= ?
+        GROUP BY {intervalo}
+        ORDER BY marca
+    """, puntos, desde)
+
+def leer_tiempos(ruta=RUTA_HISTORIAL, puntos=50, desde=None):
+    """Tiempo medio de cada etapa por intervalo de tiempo"""
+    return consultar_submuestreado(ruta, """
+        SELECT AVG(e.marca) AS marca,
+               t.etapa AS etapa,
+               AVG(t.segundos) AS segundos,
+               COUNT(*) AS ejecuciones
+        FROM ejecuciones e
+        JOIN tiempos_etapas t ON t.id_ejecucion = e.id_ejecucion
+        WHERE e.marca >= ?
+        GROUP BY {intervalo}, t.etapa
+        ORDER BY marca, etapa
+    """, puntos, desde)
+
+def main():
+    parser = argparse.ArgumentParser(description="Tendencia de calidad y rendimiento entre ejecuciones")
+    parser.add_argument('--ruta', default=RUTA_HISTORIAL, help="Base SQLite del historial")
+    parser.add_argument('--puntos', type=int, default=20, help="Intervalos de tiempo de la tendencia")
+    parser.add_argument('--dias', type=float, default=None, help="Solo los últimos N días")
+    args = parser.parse_args()
+
+    desde = time.time() - args.dias * 86400 if args.dias else None
+    tendencia = leer_tendencia(args.ruta, args.puntos, desde)
+    if tendencia.empty:
+        print(f"Sin ejecuciones registradas en {args.ruta}")
+        return
+
+    print("TENDENCIA DE CALIDAD")
+    print("=" * 60)
+    print(tendencia[['fecha', *KPIS, 'filas_pacientes', 'filas_citas', 'ejecuciones']]
+          .to_string(index=False, float_format='{:.2f}'.format))
+
+    tiempos = leer_tiempos(args.ruta, args.puntos, desde)
+    if not tiempos.empty:
+        print("\nTIEMPOS POR ETAPA (s)")
+        print("=" * 60)
+        print(tiempos.pivot_table(index='fecha', columns='etapa', values='segundos')
+              .to_string(float_format='{:.3f}'.format))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RENDERIZADO DE INFORMES
+Plantillas por secciones (string.Template) alimentadas con valores ya
+formateados, y salida en texto, HTML y PDF desde la misma fuente. Cada
+sección se vuelve a renderizar solo si cambian su plantilla o sus valores,
+y cada formato solo se reescribe si cambió el documento.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+from functools import lru_cache
+from string import Template
+
+DIRECTORIO_PLANTILLAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plantillas')
+RUTA_CACHE = '../resultados/cache_informes.json'
+FORMATOS = ('txt', 'html', 'pdf')
+
+MARCA_SECCION = re.compile(r'^\[seccion: (\w+)\]\n', re.MULTILINE)
+
+# Página A4 en puntos, Courier monoespaciada
+ANCHO_PAGINA, ALTO_PAGINA = 595, 842
+MARGEN = 36
+TAMAÑO_FUENTE = 7.5
+INTERLINEADO = 9.5
+
+# Caracteres sin equivalente en la codificación WinAnsi de las fuentes base del PDF
+SUSTITUTOS_PDF = str.maketrans({'→': '->', '✓': 'OK', '✗': 'X', '⚠': '!',
+                                '├': '|', '└': '`', '│': '|', '─': '-'})
+
+ESTILO_HTML = """body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #f5f7fa; margin: 20px; }
+section { background: white; border-radius: 10px; padding: 10px 20px; margin-bottom: 15px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }
+pre { font-family: Consolas, 'Courier New', monospace; font-size: 0.9em; white-space: pre-wrap; }"""
+
+@lru_cache(maxsize=None)
+def compilar_plantilla(ruta, modificado):
+    """Secciones [(nombre, Template)] de un archivo de plantilla
+
+    `modificado` forma parte de la clave de la caché: editar la plantilla
+    invalida la versión compilada.
+    """
+    with open(ruta, encoding='utf-8') as f:
+        partes = MARCA_SECCION.split(f.read())
+    secciones = [(nombre, Template(texto)) for nombre, texto in zip(partes[1::2], partes[2::2])]
+    if not secciones:
+        raise ValueError(f"La plantilla {ruta} no define secciones '[seccion: nombre]'")
+    for nombre, plantilla in secciones:
+        if not plantilla.is_valid():
+            raise ValueError(f"Marcador inválido en la sección '{nombre}' de {ruta}")
+    return secciones
+
+def cargar_plantilla(nombre, directorio=DIRECTORIO_PLANTILLAS):
+    """Plantilla compilada plantillas/<nombre>.txt"""
+    ruta = os.path.join(directorio, f"{nombre}.txt")
+    return compilar_plantilla(ruta, os.stat(ruta).st_mtime_ns)
+
+def huella(datos):
+    """SHA-256 de un objeto JSON"""
+    return hashlib.sha256(json.dumps(datos, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def seccion_html(nombre, texto):
+    """Fragmento HTML de una sección (texto preformateado)"""
+    return f'<section id="{nombre}"><pre>{html.escape(texto.strip(chr(10)))}</pre></section>'
+
+def documento_html(titulo, fragmentos):
+    """Página HTML autocontenida con las secciones del informe"""
+    return (f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{html.escape(titulo)}</title>\n'
+            f'<style>\n{ESTILO_HTML}\n</style>\n</head>\n<body>\n' + '\n'.join(fragmentos) + '\n</body>\n</html>\n')
+
+def texto_pdf(linea):
+    """Línea como literal de cadena PDF (WinAnsi, con paréntesis y barras escapados)"""
+    crudo = linea.translate(SUSTITUTOS_PDF).encode('cp1252', errors='replace')
+    return b'(' + crudo.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+def documento_pdf(texto):
+    """PDF mínimo escrito a mano: texto en Courier, paginado en A4"""
+    lineas = texto.rstrip('\n').split('\n')
+    por_pagina = int((ALTO_PAGINA - 2 * MARGEN) // INTERLINEADO)
+    paginas = [lineas[i:i + por_pagina] for i in range(0, len(lineas), por_pagina)] or [[]]
+
+    # Objetos: 1 catálogo, 2 árbol de páginas, 3 fuente, luego página + contenido por página
+    objetos = [None, None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>']
+    hijos = []
+    for pagina in paginas:
+        flujo = (f'BT /F1 {TAMAÑO_FUENTE} Tf {INTERLINEADO} TL '
+                 f'{MARGEN} {ALTO_PAGINA - MARGEN} Td\n').encode('ascii')
+        flujo += b''.join(b'T* ' + texto_pdf(linea) + b' Tj\n' for linea in pagina) + b'ET'
+        numero_pagina = len(objetos) + 1
+        objetos.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ANCHO_PAGINA} {ALTO_PAGINA}] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {numero_pagina + 1} 0 R >>'.encode('ascii'))
+        objetos.append(f'<< /Length {len(flujo)} >>\nstream\n'.encode('ascii') + flujo + b'\nendstream')
+        hijos.append(f'{numero_pagina} 0 R')
+    objetos[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objetos[1] = f'<< /Type /Pages /Kids [{" ".join(hijos)}] /Count {len(hijos)} >>'.encode('ascii')
+
+    salida = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    posiciones = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posiciones.append(len(salida))
+        salida += f'{numero} 0 obj\n'.encode('ascii') + objeto + b'\nendobj\n'
+    inicio_xref = len(salida)
+    salida += f'xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n'.encode('ascii')
+    salida += b''.join(f'{posicion:010d} 00000 n \n'.encode('ascii') for posicion in posiciones)
+    salida += (f'trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\n'
+               f'startxref\n{inicio_xref}\n%%EOF\n').encode('ascii')
+    return bytes(salida)
+
+def renderizar_informe(nombre, contexto, ruta_base, formatos=FORMATOS, titulo=None,
+                       ruta_cache=RUTA_CACHE, usar_cache=True):
+    """Renderiza plantillas/<nombre>.txt en ruta_base.<formato> y devuelve el texto
+
+    contexto trae los valores ya formateados como texto. La caché guarda,
+    por sección, la huella de la plantilla y de los valores que usa junto
+    con el texto y el HTML renderizados.
+    """
+    formatos = [formato for formato in FORMATOS if formato in formatos]
+    cache = {}
+    if usar_cache and os.path.exists(ruta_cache):
+        with open(ruta_cache, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    anterior = cache.get(nombre, {})
+    secciones_previas = anterior.get('secciones', {})
+
+    secciones = {}
+    renderizadas = []
+    for seccion, plantilla in cargar_plantilla(nombre):
+        valores = {clave: contexto[clave] for clave in plantilla.get_identifiers()}
+        huella_seccion = huella({'plantilla': plantilla.template, 'valores': valores})
+        previa = secciones_previas.get(seccion)
+        if previa is not None and previa['huella'] == huella_seccion:
+            secciones[seccion] = previa
+            continue
+        texto = plantilla.substitute(valores)
+        secciones[seccion] = {'huella': huella_seccion, 'texto': texto, 'html': seccion_html(seccion, texto)}
+        renderizadas.append(seccion)
+
+    texto = ''.join(seccion['texto'] for seccion in secciones.values())
+    huella_documento = huella([seccion['huella'] for seccion in secciones.values()])
+    generadores = {
+        'txt': lambda: texto.encode('utf-8'),
+        'html': lambda: documento_html(titulo or nombre, [s['html'] for s in secciones.values()]).encode('utf-8'),
+        'pdf': lambda: documento_pdf(texto),
+    }
+    salidas_previas = anterior.get('salidas', {})
+    escritos = []
+    for formato in formatos:
+        ruta = f"{ruta_base}.{formato}"
+        if salidas_previas.get(formato) == huella_documento and os.path.exists(ruta):
+            continue
+        with open(ruta, 'wb') as f:
+            f.write(generadores[formato]())
+        escritos.append(ruta)
+
+    if usar_cache:
+        cache[nombre] = {'secciones': secciones,
+                         'salidas': {**salidas_previas, **{formato: huella_documento for formato in formatos}}}
+        with open(ruta_cache, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+
+    print(f"  {nombre}: {len(renderizadas)}/{len(secciones)} secciones renderizadas"
+          + (f", escritos: {', '.join(os.path.basename(ruta) for ruta in escritos)}" if escritos
+             else ", sin cambios en los archivos"))
+    return texto
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MANIFIESTO DE EJECUCIÓN
+Métricas que miden las etapas del pipeline (exploración, limpieza, validación
+y tests) guardadas en un único JSON. Reportes, gráficos, dashboard e informe
+técnico leen sus cifras de aquí en lugar de volver a recorrer los datos.
+"""
+
+import json
+import os
+from datetime import datetime
+import pandas as pd
+from perfilado import contar_defectos
+
+RUTA_MANIFIESTO = '../resultados/manifiesto_ejecucion.json'
+RUTA_ORIGINAL = '../datos/dataset_hospital.json'
+
+# Reglas del linaje de limpieza que cuentan como problemas críticos resueltos
+REGLAS_PROBLEMAS = {
+    'fechas_cita_corregidas': 'mes_menos_12',
+    'sexo_estandarizado': 'sexo_estandarizado_m_f',
+    'citas_huerfanas_eliminadas': 'cita_huerfana_eliminada',
+    'estados_no_reconocidos_corregidos': 'estado_no_reconocido_inferido',
+}
+
+# Script que mide cada etapa
+SCRIPTS_ETAPAS = {
+    'exploracion': '01_analisis_exploratorio.py',
+    'limpieza': '03_limpieza_avanzada.py',
+    'validacion': '04_validacion_final.py',
+    'tests': '06_tests_automatizados.py',
+}
+
+class MetricaNoDisponible(LookupError):
+    """La etapa que mide la métrica no se ha ejecutado sobre los datos actuales"""
+
+def firma_archivo(ruta):
+    """Tamaño y fecha de modificación de un archivo, para detectar métricas desactualizadas"""
+    estado = os.stat(ruta)
+    return {'ruta': os.path.basename(ruta), 'bytes': estado.st_size, 'modificado': estado.st_mtime_ns}
+
+def leer_manifiesto(ruta=RUTA_MANIFIESTO):
+    """Carga el manifiesto ({} si aún no existe)"""
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def registrar_etapa(etapa, metricas, ruta=RUTA_MANIFIESTO, fuente=RUTA_ORIGINAL):
+    """Guarda las métricas de una etapa en el manifiesto y lo devuelve"""
+    manifiesto = leer_manifiesto(ruta)
+    manifiesto[etapa] = {
+        'generado': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'fuente': firma_archivo(fuente),
+        **metricas
+    }
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False, default=int)
+    os.replace(temporal, ruta)
+    return manifiesto
+
+def metrica(manifiesto, clave, fuente=RUTA_ORIGINAL):
+    """Valor 'etapa.campo.subcampo' del manifiesto, si la etapa midió los datos actuales"""
+    etapa, *campos = clave.split('.')
+    script = SCRIPTS_ETAPAS.get(etapa, 'la etapa')
+    if etapa not in manifiesto:
+        raise MetricaNoDisponible(f"El manifiesto no tiene la etapa '{etapa}' ({clave}); ejecutar {script}")
+    valor = manifiesto[etapa]
+    if fuente is not None and valor.get('fuente') != firma_archivo(fuente):
+        raise MetricaNoDisponible(f"La etapa '{etapa}' se midió sobre otra versión de los datos "
+                                  f"({clave}); ejecutar {script}")
+    for campo in campos:
+        valor = valor[campo]
+    return valor
+
+def etapa_o_medir(etapa, medir, ruta=RUTA_MANIFIESTO, fuente=RUTA_ORIGINAL):
+    """Métricas de la etapa desde el manifiesto; solo si faltan se miden y se registran"""
+    manifiesto = leer_manifiesto(ruta)
+    try:
+        return metrica(manifiesto, etapa, fuente)
+    except MetricaNoDisponible:
+        return registrar_etapa(etapa, medir(), ruta, fuente)[etapa]
+
+def nulos_por_columna(df):
+    """Nulos por columna de una tabla"""
+    return {columna: int(n) for columna, n in df.isna().sum().items()}
+
+def integridad_referencial(df_pacientes, df_citas):
+    """Porcentaje de IDs de paciente citados que existen en la tabla de pacientes"""
+    ids_citados = pd.Index(df_citas['id_paciente'].unique())
+    if len(ids_citados) == 0:
+        return 100.0
+    return float(ids_citados.isin(df_pacientes['id_paciente']).mean() * 100)
+
+def medir_exploracion(df_pacientes, df_citas, fechas=None):
+    """Filas, nulos y defectos de calidad de los datos originales
+    
+    fechas son perfiles de perfilar_fechas ya calculados (ver contar_defectos).
+    """
+    nombres = df_pacientes['nombre'].value_counts()
+    return {
+        'filas': {'pacientes': len(df_pacientes), 'citas': len(df_citas)},
+        'nulos': {'pacientes': nulos_por_columna(df_pacientes), 'citas': nulos_por_columna(df_citas)},
+        'defectos': contar_defectos(df_pacientes, df_citas, fechas),
+        'nombre_mas_frecuente': {'nombre': str(nombres.index[0]) if len(nombres) else None,
+                                 'veces': int(nombres.iloc[0]) if len(nombres) else 0}
+    }
+
+def medir_calidad(df_pacientes, df_citas, fechas_cita_invalidas):
+    """Scores de calidad (0-100) por dimensión y su promedio general"""
+    con_fecha = int(df_citas['fecha_cita'].notna().sum())
+    scores = {
+        'completitud': float(pd.concat([df_pacientes.notna().mean(), df_citas.notna().mean()]).mean() * 100),
+        'consistencia': float(df_pacientes['sexo'].isin(['M', 'F']).mean() * 100),
+        'integridad': integridad_referencial(df_pacientes, df_citas),
+        'validez': float((1 - fechas_cita_invalidas / con_fecha) * 100) if con_fecha else 100.0
+    }
+    scores['general'] = sum(scores.values()) / len(scores)
+    return scores
+
+def medir_limpieza(estadisticas_iniciales, df_pacientes_limpio, df_citas_limpio, linaje, segundos):
+    """Volumen antes/después, cambios por regla y problemas resueltos por la limpieza"""
+    cambios = {str(regla): int(n) for regla, n in linaje['regla'].value_counts().items() if n > 0}
+    problemas = {nombre: cambios.get(regla, 0) for nombre, regla in REGLAS_PROBLEMAS.items()}
+    problemas['total'] = sum(problemas.values())
+    return {
+        'filas': {
+            'pacientes': {'antes': estadisticas_iniciales['pacientes']['filas'], 'despues': len(df_pacientes_limpio)},
+            'citas': {'antes': estadisticas_iniciales['citas']['filas'], 'despues': len(df_citas_limpio)}
+        },
+        'nulos': {
+            'antes': {tabla: estadisticas['nulos'] for tabla, estadisticas in estadisticas_iniciales.items()},
+            'despues': {'pacientes': nulos_por_columna(df_pacientes_limpio),
+                        'citas': nulos_por_columna(df_citas_limpio)}
+        },
+        'cambios_por_regla': cambios,
+        'problemas_resueltos': problemas,
+        'segundos': segundos
+    }
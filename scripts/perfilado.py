@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PERFILADO VECTORIZADO DE DEFECTOS
+Núcleo compartido por el análisis exploratorio y el análisis profundo para
+contar los problemas de calidad sin recorrer las filas en Python
+"""
+
+import re
+import numpy as np
+import pandas as pd
+from esquema_datos import ESTADOS_CITA
+from fechas import PATRON_BARRA, PATRON_ESPAÑOL, PATRON_ISO, numero_mes
+
+# La misma gramática de fechas.descomponer_fecha en una sola expresión, con
+# su orden de decisión: un texto con '/' solo puede ser de formato barra
+PATRON_FECHA = r'^\s*(?:{}|{}|(?=[^/]*$).*?{}.*?)\s*$'.format(
+    PATRON_ISO.strip('^$'), PATRON_BARRA.strip('^$'), PATRON_ESPAÑOL
+)
+GRUPOS_FECHA = ['iso_año', 'iso_mes', 'iso_dia', 'barra_dia', 'barra_mes', 'barra_año',
+                'español_dia', 'español_mes', 'español_año']
+
+def perfilar_fechas(serie):
+    """Descompone una columna de fechas y marca sus defectos en una pasada
+    
+    La extracción se hace sobre los valores únicos y se difunde por código.
+    Devuelve un DataFrame alineado con serie con formato, año, mes y día
+    enteros, y máscaras nulo, formato_invalido, mes_fuera_rango,
+    dia_fuera_rango e invalida.
+    """
+    codigos, unicos = pd.factorize(serie)
+    partes = pd.Series(np.asarray(unicos, dtype=object), dtype='string').str.extract(
+        PATRON_FECHA, flags=re.IGNORECASE
+    )
+    partes.columns = GRUPOS_FECHA
+    
+    meses_español = partes['español_mes'].dropna()
+    meses_español = meses_español.map(numero_mes).reindex(partes.index)
+    es_español = partes['español_año'].notna() & meses_español.notna()
+    
+    def entero(*columnas):
+        valores = pd.to_numeric(partes[columnas[0]], errors='coerce')
+        for columna in columnas[1:]:
+            valores = valores.fillna(pd.to_numeric(partes[columna], errors='coerce'))
+        return valores.astype('Int32')
+    
+    perfil = pd.DataFrame({
+        'formato': np.select(
+            [partes['iso_año'].notna().to_numpy(dtype=bool),
+             partes['barra_año'].notna().to_numpy(dtype=bool),
+             es_español.to_numpy(dtype=bool)],
+            ['iso', 'barra', 'español'], None
+        ),
+        'año': entero('iso_año', 'barra_año', 'español_año'),
+        'mes': entero('iso_mes', 'barra_mes').fillna(meses_español.astype('Int32')),
+        'dia': entero('iso_dia', 'barra_dia', 'español_dia'),
+    })
+    perfil.loc[perfil['formato'].isna(), ['año', 'mes', 'dia']] = pd.NA
+    
+    # Los nulos (código -1 en factorize) no existen en el índice y quedan vacíos
+    perfil = perfil.reindex(codigos).set_axis(serie.index)
+    
+    perfil['formato'] = perfil['formato'].astype(pd.CategoricalDtype(['iso', 'barra', 'español']))
+    perfil['nulo'] = codigos == -1
+    perfil['formato_invalido'] = ~perfil['nulo'] & perfil['formato'].isna().to_numpy()
+    perfil['mes_fuera_rango'] = ((perfil['mes'] < 1) | (perfil['mes'] > 12)).fillna(False).astype(bool)
+    perfil['dia_fuera_rango'] = ((perfil['dia'] < 1) | (perfil['dia'] > 31)).fillna(False).astype(bool)
+    perfil['invalida'] = perfil['formato_invalido'] | perfil['mes_fuera_rango'] | perfil['dia_fuera_rango']
+    return perfil
+
+def contar_defectos(df_pacientes, df_citas, fechas=None):
+    """Cuenta los problemas de calidad de ambas tablas con operaciones vectorizadas
+    
+    fechas admite los perfiles de perfilar_fechas ya calculados, por nombre
+    de columna ('fecha_nacimiento', 'fecha_cita'); los que falten se calculan.
+    """
+    fechas = fechas or {}
+    nacimiento = fechas.get('fecha_nacimiento')
+    if nacimiento is None:
+        nacimiento = perfilar_fechas(df_pacientes['fecha_nacimiento'])
+    citas = fechas.get('fecha_cita')
+    if citas is None:
+        citas = perfilar_fechas(df_citas['fecha_cita'])
+    sexo = df_pacientes['sexo']
+    estados = df_citas['estado_cita']
+    
+    return {
+        'sexo_inconsistente': int((sexo.notna() & ~sexo.isin(['M', 'F'])).sum()),
+        'fechas_nacimiento_español': int((nacimiento['formato'] == 'español').sum()),
+        'fechas_nacimiento_invalidas': int(nacimiento['invalida'].sum()),
+        'fechas_cita_invalidas': int(citas['invalida'].sum()),
+        'fechas_cita_mes_invalido': int((citas['mes'] > 12).sum()),
+        'estados_cita_faltantes': int(estados.isna().sum()),
+        'estados_cita_no_reconocidos': int((estados.notna() & ~estados.isin(ESTADOS_CITA.categories)).sum()),
+        'nombres_duplicados': int(df_pacientes['nombre'].duplicated().sum()),
+        'citas_huerfanas': int((~df_citas['id_paciente'].isin(df_pacientes['id_paciente'])).sum()),
+    }
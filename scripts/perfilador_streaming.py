@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PERFILADOR DE COLUMNAS POR STREAMING
+Recorre un dataset JSON por bloques sin cargarlo completo y mantiene por
+columna resúmenes fusionables: nulos, distintos aproximados (HyperLogLog),
+frecuencias (count-min con top-k) y cuantiles (t-digest)
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import re
+import sys
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+TAMAÑO_BLOQUE = 100_000
+TAMAÑO_LECTURA = 1 << 20
+
+TABLAS = {'pacientes': 'pacientes', 'citas_medicas': 'citas'}
+COLUMNAS_CUANTILES = {'pacientes': ['edad'], 'citas': ['costo']}
+CUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+BLANCOS = re.compile(r'[ \t\r\n]*')
+
+def _a_base64(arreglo):
+    return base64.b64encode(np.ascontiguousarray(arreglo).tobytes()).decode('ascii')
+
+def _desde_base64(texto, dtype, forma):
+    return np.frombuffer(base64.b64decode(texto), dtype=dtype).reshape(forma).copy()
+
+def _longitud_bits(valores):
+    """bit_length vectorizado para enteros sin signo de 64 bits"""
+    valores = valores.copy()
+    longitud = np.zeros(len(valores), dtype=np.int64)
+    for desplazamiento in (32, 16, 8, 4, 2, 1):
+        altos = valores >= (np.uint64(1) << np.uint64(desplazamiento))
+        longitud[altos] += desplazamiento
+        valores[altos] >>= np.uint64(desplazamiento)
+    return longitud + (valores > 0)
+
+class HyperLogLog:
+    """Conteo aproximado de valores distintos (error típico 1.04/sqrt(2^precision))"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registros = np.zeros(1 << precision, dtype=np.uint8)
+
+    def agregar(self, hashes):
+        """Incorpora un arreglo de hashes de 64 bits"""
+        bits_resto = 64 - self.precision
+        indices = (hashes >> np.uint64(bits_resto)).astype(np.intp)
+        resto = hashes & np.uint64((1 << bits_resto) - 1)
+        rango = (bits_resto - _longitud_bits(resto) + 1).astype(np.uint8)
+        np.maximum.at(self.registros, indices, rango)
+
+    def fusionar(self, otro):
+        np.maximum(self.registros, otro.registros, out=self.registros)
+
+    def estimar(self):
+        """Número estimado de valores distintos"""
+        m = len(self.registros)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimacion = alfa * m * m / np.sum(np.exp2(-self.registros.astype(np.float64)))
+        ceros = int(np.count_nonzero(self.registros == 0))
+        if estimacion <= 2.5 * m and ceros:
+            estimacion = m * np.log(m / ceros)  # Corrección para cardinalidades bajas
+        return int(round(estimacion))
+
+    def a_dict(self):
+        return {'precision': self.precision, 'registros': _a_base64(self.registros)}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        hll = cls(datos['precision'])
+        hll.registros = _desde_base64(datos['registros'], np.uint8, -1)
+        return hll
+
+class CountMinTopK:
+    """Frecuencias aproximadas con count-min y los k valores más frecuentes
+
+    El ancho (e/epsilon) y la profundidad (ln(1/delta)) fijan la cota: cada
+    estimación excede a la frecuencia real en menos de epsilon*N con
+    probabilidad 1 - delta, sea cual sea la cardinalidad de la columna.
+    """
+
+    def __init__(self, k=10, epsilon=0.001, delta=0.01):
+        self.k = k
+        ancho = int(np.ceil(np.e / epsilon))
+        profundidad = int(np.ceil(np.log(1 / delta)))
+        self.tabla = np.zeros((profundidad, ancho), dtype=np.int64)
+        self.candidatos = {}
+
+    def _columnas(self, hashes):
+        # Doble hashing: h1 + i*h2 para cada fila de la tabla
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = hashes >> np.uint64(32)
+        ancho = np.uint64(self.tabla.shape[1])
+        return [((h1 + np.uint64(i) * h2) % ancho).astype(np.intp) for i in range(self.tabla.shape[0])]
+
+    def _estimar_hashes(self, hashes):
+        return np.min([fila[columnas] for fila, columnas in zip(self.tabla, self._columnas(hashes))], axis=0)
+
+    def agregar(self, valores, hashes):
+        """Cuenta los valores de un bloque y actualiza los candidatos a top-k"""
+        for fila, columnas in zip(self.tabla, self._columnas(hashes)):
+            np.add.at(fila, columnas, 1)
+        frecuentes = pd.Series(valores).value_counts().head(self.k).index
+        self._actualizar_candidatos(list(frecuentes))
+
+    def _actualizar_candidatos(self, nuevos):
+        valores = list(dict.fromkeys(list(self.candidatos) + nuevos))
+        if not valores:
+            return
+        estimaciones = self._estimar_hashes(hashear(pd.Series(valores, dtype=object)))
+        orden = np.argsort(-estimaciones, kind='stable')[:self.k]
+        self.candidatos = {valores[i]: int(estimaciones[i]) for i in orden}
+
+    def fusionar(self, otro):
+        if self.tabla.shape != otro.tabla.shape:
+            raise ValueError("Solo se fusionan count-min con el mismo epsilon y delta")
+        self.tabla += otro.tabla
+        self._actualizar_candidatos(list(otro.candidatos))
+
+    def error(self):
+        """Cota del exceso de las estimaciones: epsilon * N"""
+        return np.e / self.tabla.shape[1] * int(self.tabla[0].sum())
+
+    def top(self):
+        """Pares [valor, frecuencia estimada] de mayor a menor, solo los que superan la cota de error
+
+        Una estimación por debajo de epsilon*N no distingue un valor frecuente
+        de las colisiones, así que en columnas sin valores dominantes (IDs,
+        emails) la lista queda vacía en lugar de mostrar ruido.
+        """
+        cota = self.error()
+        return [[valor, frecuencia] for valor, frecuencia in self.candidatos.items() if frecuencia > cota]
+
+    def a_dict(self):
+        return {'k': self.k, 'forma': list(self.tabla.shape), 'tabla': _a_base64(self.tabla),
+                'candidatos': [[valor, frecuencia] for valor, frecuencia in self.candidatos.items()]}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        profundidad, ancho = datos['forma']
+        sketch = cls(datos['k'])
+        sketch.tabla = _desde_base64(datos['tabla'], np.int64, (profundidad, ancho))
+        sketch.candidatos = {valor: frecuencia for valor, frecuencia in datos['candidatos']}
+        return sketch
+
+class TDigest:
+    """Cuantiles aproximados con centroides acotados por la función de escala k1
+
+    Cada centroide cumple k(q_derecha) - k(q_izquierda) <= 1, salvo los que
+    contienen un único valor distinto (puntuales), que nunca se parten. Un
+    cuantil que cae dentro de un centroide puntual devuelve ese valor.
+    """
+
+    def __init__(self, compresion=100):
+        self.compresion = compresion
+        self.medias = np.empty(0)
+        self.pesos = np.empty(0)
+        self.puntuales = np.empty(0, dtype=bool)
+
+    def agregar(self, valores, pesos=None, puntuales=None):
+        """Incorpora valores (opcionalmente con pesos) y recomprime los centroides
+
+        Los valores sueltos son puntuales; al fusionar se pasan los centroides
+        de otro t-digest con sus propias marcas.
+        """
+        valores = np.asarray(valores, dtype=np.float64)
+        pesos = np.ones(len(valores)) if pesos is None else np.asarray(pesos, dtype=np.float64)
+        puntuales = np.ones(len(valores), dtype=bool) if puntuales is None else np.asarray(puntuales, dtype=bool)
+        self.medias = np.concatenate([self.medias, valores])
+        self.pesos = np.concatenate([self.pesos, pesos])
+        self.puntuales = np.concatenate([self.puntuales, puntuales])
+        self._comprimir()
+
+    def _k(self, q):
+        return self.compresion / (2 * np.pi) * np.arcsin(2 * q - 1)
+
+    def _q(self, k):
+        return (np.sin(2 * np.pi * k / self.compresion) + 1) / 2
+
+    def _comprimir(self):
+        # Los centroides con la misma media se unen sin perder información
+        medias, grupos = np.unique(self.medias, return_inverse=True)
+        pesos = np.bincount(grupos, weights=self.pesos)
+        puntuales = np.bincount(grupos, weights=(~self.puntuales).astype(np.float64)) == 0
+        if len(medias) <= self.compresion:
+            self.medias, self.pesos, self.puntuales = medias, pesos, puntuales
+            return
+
+        # Unión voraz de izquierda a derecha: cada centroide llega hasta el
+        # último vecino cuyo borde derecho q cumple k(q) <= k(q_izquierda) + 1
+        acumulado = np.cumsum(pesos)
+        total = acumulado[-1]
+        k_maximo = self._k(1.0)
+        inicios = []
+        inicio = 0
+        while inicio < len(medias):
+            inicios.append(inicio)
+            izquierda = acumulado[inicio] - pesos[inicio]
+            k_limite = self._k(izquierda / total) + 1
+            limite = total if k_limite >= k_maximo else self._q(k_limite) * total
+            fin = int(np.searchsorted(acumulado, limite * (1 + 1e-12), side='right')) - 1
+            inicio = max(fin, inicio) + 1
+
+        inicios = np.asarray(inicios)
+        peso_grupo = np.add.reduceat(pesos, inicios)
+        self.medias = np.add.reduceat(medias * pesos, inicios) / peso_grupo
+        self.pesos = peso_grupo
+        self.puntuales = np.diff(np.append(inicios, len(medias))) == 1
+        self.puntuales &= puntuales[inicios]
+
+    def fusionar(self, otro):
+        self.agregar(otro.medias, otro.pesos, otro.puntuales)
+
+    def cuantil(self, q):
+        """Cuantil q: el valor del centroide puntual que lo contiene o, si no,
+        la interpolación entre los centros de los centroides vecinos"""
+        if not len(self.medias):
+            return None
+        acumulado = np.cumsum(self.pesos)
+        izquierda = acumulado - self.pesos
+        # Un centroide puntual ocupa todo su tramo de rango; los demás, su centro
+        x = np.where(self.puntuales[:, None], np.column_stack([izquierda, acumulado]),
+                     (izquierda + self.pesos / 2)[:, None]).ravel()
+        y = np.repeat(self.medias, 2)
+        return float(np.interp(q * acumulado[-1], x, y))
+
+    def a_dict(self):
+        return {'compresion': self.compresion, 'medias': self.medias.tolist(), 'pesos': self.pesos.tolist(),
+                'puntuales': self.puntuales.tolist()}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        digest = cls(datos['compresion'])
+        digest.medias = np.asarray(datos['medias'], dtype=np.float64)
+        digest.pesos = np.asarray(datos['pesos'], dtype=np.float64)
+        # Perfiles anteriores no marcaban los centroides puntuales
+        digest.puntuales = np.asarray(datos.get('puntuales', [False] * len(digest.medias)), dtype=bool)
+        return digest
+
+def normalizar(serie):
+    """Valores no nulos como float64 (columnas numéricas) o texto, iguales en todos los bloques"""
+    valores = serie.dropna()
+    if pd.api.types.is_numeric_dtype(valores) and not pd.api.types.is_bool_dtype(valores):
+        return valores.astype(np.float64)
+    return valores.astype(str)
+
+def hashear(valores):
+    """Hash de 64 bits estable de cada valor normalizado"""
+    return pd.util.hash_array(np.asarray(valores, dtype=object))
+
+class PerfilColumna:
+    """Resúmenes fusionables de una columna"""
+
+    def __init__(self, cuantiles=False):
+        self.filas = 0
+        self.nulos = 0
+        self.minimo = None
+        self.maximo = None
+        self.suma = 0.0
+        self.numericos = 0
+        self.distintos = HyperLogLog()
+        self.frecuencias = CountMinTopK()
+        self.digest = TDigest() if cuantiles else None
+
+    def agregar(self, serie):
+        """Actualiza los resúmenes con un bloque de la columna"""
+        valores = normalizar(serie)
+        self.filas += len(serie)
+        self.nulos += len(serie) - len(valores)
+        if not len(valores):
+            return
+
+        hashes = hashear(valores)
+        self.distintos.agregar(hashes)
+        self.frecuencias.agregar(valores.to_numpy(dtype=object), hashes)
+
+        if valores.dtype == np.float64:
+            self.minimo = float(valores.min()) if self.minimo is None else min(self.minimo, float(valores.min()))
+            self.maximo = float(valores.max()) if self.maximo is None else max(self.maximo, float(valores.max()))
+            self.suma += float(valores.sum())
+            self.numericos += len(valores)
+            if self.digest is not None:
+                conteos = valores.value_counts()
+                self.digest.agregar(conteos.index.to_numpy(), conteos.to_numpy())
+
+    def fusionar(self, otro):
+        self.filas += otro.filas
+        self.nulos += otro.nulos
+        for extremo, elegir in (('minimo', min), ('maximo', max)):
+            valores = [v for v in (getattr(self, extremo), getattr(otro, extremo)) if v is not None]
+            setattr(self, extremo, elegir(valores) if valores else None)
+        self.suma += otro.suma
+        self.numericos += otro.numericos
+        self.distintos.fusionar(otro.distintos)
+        self.frecuencias.fusionar(otro.frecuencias)
+        if self.digest is not None and otro.digest is not None:
+            self.digest.fusionar(otro.digest)
+
+    def resumen(self):
+        """Estadísticas legibles derivadas de los resúmenes"""
+        resumen = {
+            'filas': self.filas,
+            'nulos': self.nulos,
+            'porcentaje_nulos': round(self.nulos / self.filas * 100, 2) if self.filas else 0.0,
+            'distintos_aprox': self.distintos.estimar() if self.filas > self.nulos else 0,
+            'top': self.frecuencias.top(),
+            'error_frecuencias': round(self.frecuencias.error(), 1)
+        }
+        if self.numericos:
+            resumen.update({'min': self.minimo, 'max': self.maximo,
+                            'media': round(self.suma / self.numericos, 4)})
+        if self.digest is not None and self.numericos:
+            resumen['cuantiles'] = {f"p{int(q * 100):02d}": self.digest.cuantil(q) for q in CUANTILES}
+        return resumen
+
+    def a_dict(self):
+        datos = {
+            'resumen': self.resumen(),
+            'bocetos': {
+                'filas': self.filas, 'nulos': self.nulos, 'minimo': self.minimo, 'maximo': self.maximo,
+                'suma': self.suma, 'numericos': self.numericos,
+                'hll': self.distintos.a_dict(), 'count_min': self.frecuencias.a_dict()
+            }
+        }
+        if self.digest is not None:
+            datos['bocetos']['tdigest'] = self.digest.a_dict()
+        return datos
+
+    @classmethod
+    def desde_dict(cls, datos):
+        bocetos = datos['bocetos']
+        perfil = cls(cuantiles='tdigest' in bocetos)
+        for atributo in ('filas', 'nulos', 'minimo', 'maximo', 'suma', 'numericos'):
+            setattr(perfil, atributo, bocetos[atributo])
+        perfil.distintos = HyperLogLog.desde_dict(bocetos['hll'])
+        perfil.frecuencias = CountMinTopK.desde_dict(bocetos['count_min'])
+        if 'tdigest' in bocetos:
+            perfil.digest = TDigest.desde_dict(bocetos['tdigest'])
+        return perfil
+
+class PerfiladorStreaming:
+    """Perfil de todas las columnas de un dataset construido por bloques"""
+
+    def __init__(self):
+        self.tablas = {}
+
+    def agregar_bloque(self, tabla, df):
+        """Actualiza los perfiles de las columnas de una tabla con un bloque"""
+        columnas = self.tablas.setdefault(tabla, {})
+        for columna in df.columns:
+            if columna not in columnas:
+                columnas[columna] = PerfilColumna(cuantiles=columna in COLUMNAS_CUANTILES.get(tabla, []))
+            columnas[columna].agregar(df[columna])
+
+    def fusionar(self, otro):
+        """Combina el perfil de otro fragmento del dataset"""
+        for tabla, columnas in otro.tablas.items():
+            propias = self.tablas.setdefault(tabla, {})
+            for columna, perfil in columnas.items():
+                if columna in propias:
+                    propias[columna].fusionar(perfil)
+                else:
+                    propias[columna] = perfil
+
+    def a_dict(self, fuentes):
+        return {
+            'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'fuentes': fuentes,
+            'tablas': {
+                tabla: {
+                    'filas': max((p.filas for p in columnas.values()), default=0),
+                    'columnas': {columna: perfil.a_dict() for columna, perfil in columnas.items()}
+                }
+                for tabla, columnas in self.tablas.items()
+            }
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        perfilador = cls()
+        for tabla, contenido in datos['tablas'].items():
+            perfilador.tablas[tabla] = {
+                columna: PerfilColumna.desde_dict(perfil)
+                for columna, perfil in contenido['columnas'].items()
+            }
+        return perfilador
+
+def iterar_registros(ruta, tamaño_lectura=TAMAÑO_LECTURA):
+    """Recorre un dataset {"tabla": [registros, ...], ...} sin cargarlo completo
+
+    Lee el archivo por fragmentos y decodifica cada registro con
+    JSONDecoder.raw_decode. Genera tuplas (tabla, registro).
+    """
+    decodificador = json.JSONDecoder()
+    abrir = gzip.open if ruta.endswith('.gz') else open
+
+    with abrir(ruta, 'rt', encoding='utf-8') as archivo:
+        buffer, pos = '', 0
+
+        def caracter():
+            """Siguiente carácter no blanco (lee más texto si hace falta)"""
+            nonlocal buffer, pos
+            while True:
+                pos = BLANCOS.match(buffer, pos).end()
+                if pos < len(buffer):
+                    return buffer[pos]
+                fragmento = archivo.read(tamaño_lectura)
+                if not fragmento:
+                    return ''
+                buffer, pos = fragmento, 0
+
+        def decodificar():
+            """Decodifica el valor JSON que empieza en la posición actual"""
+            nonlocal buffer, pos
+            while True:
+                try:
+                    valor, fin = decodificador.raw_decode(buffer, pos)
+                    pos = fin
+                    return valor
+                except json.JSONDecodeError:
+                    fragmento = archivo.read(tamaño_lectura)
+                    if not fragmento:
+                        raise
+                    buffer, pos = buffer[pos:] + fragmento, 0
+
+        def esperar(simbolo):
+            nonlocal pos
+            if caracter() != simbolo:
+                raise ValueError(f"Se esperaba '{simbolo}' en el dataset JSON")
+            pos += 1
+
+        esperar('{')
+        while caracter() not in ('}', ''):
+            tabla = decodificar()
+            esperar(':')
+            esperar('[')
+            while caracter() != ']':
+                yield tabla, decodificar()
+                if caracter() == ',':
+                    pos += 1
+            esperar(']')
+            if caracter() == ',':
+                pos += 1
+
+def iterar_bloques(ruta, tamaño_bloque=TAMAÑO_BLOQUE):
+    """Agrupa los registros del dataset en DataFrames de tamaño_bloque filas"""
+    tabla_actual, registros = None, []
+    for tabla, registro in iterar_registros(ruta):
+        if tabla != tabla_actual or len(registros) >= tamaño_bloque:
+            if registros:
+                yield TABLAS.get(tabla_actual, tabla_actual), pd.DataFrame(registros)
+            tabla_actual, registros = tabla, []
+        registros.append(registro)
+    if registros:
+        yield TABLAS.get(tabla_actual, tabla_actual), pd.DataFrame(registros)
+
+def perfilar_archivo(ruta, tamaño_bloque=TAMAÑO_BLOQUE):
+    """Construye el perfil de un dataset leyéndolo por bloques"""
+    perfilador = PerfiladorStreaming()
+    for tabla, df in iterar_bloques(ruta, tamaño_bloque):
+        perfilador.agregar_bloque(tabla, df)
+    return perfilador
+
+def verificar_cuantiles(perfilador, rutas, tamaño_bloque=TAMAÑO_BLOQUE):
+    """Compara los cuantiles del t-digest con los exactos de los datasets
+
+    Solo se leen las columnas de COLUMNAS_CUANTILES. El error de rango es la
+    distancia entre q y el intervalo de rangos que ocupa el valor estimado.
+    """
+    valores = {}
+    for ruta in rutas:
+        for tabla, df in iterar_bloques(ruta, tamaño_bloque):
+            for columna in COLUMNAS_CUANTILES.get(tabla, []):
+                if columna in df:
+                    valores.setdefault((tabla, columna), []).append(normalizar(df[columna]).to_numpy())
+
+    filas = []
+    for (tabla, columna), partes in valores.items():
+        exactos = np.sort(np.concatenate(partes))
+        digest = perfilador.tablas[tabla][columna].digest
+        for q in CUANTILES:
+            estimado = digest.cuantil(q)
+            rango_min = np.searchsorted(exactos, estimado, side='left') / len(exactos)
+            rango_max = np.searchsorted(exactos, estimado, side='right') / len(exactos)
+            filas.append({'tabla': tabla, 'columna': columna, 'cuantil': f"p{int(q * 100):02d}",
+                          'estimado': estimado, 'exacto': float(np.quantile(exactos, q)),
+                          'error_rango': max(0.0, rango_min - q, q - rango_max)})
+    return pd.DataFrame(filas)
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de columnas por streaming con resúmenes fusionables")
+    parser.add_argument('--entrada', nargs='+', default=['../datos/dataset_hospital.json'],
+                        help="Datasets JSON (admite .gz); varios se perfilan y fusionan")
+    parser.add_argument('--fusionar', nargs='+', default=None,
+                        help="Perfiles JSON ya calculados a fusionar en lugar de leer datasets")
+    parser.add_argument('--tamaño-bloque', type=int, default=TAMAÑO_BLOQUE)
+    parser.add_argument('--salida', default='../reportes/perfil_columnas.json')
+    parser.add_argument('--verificar-cuantiles', type=float, nargs='?', const=0.01, default=None,
+                        metavar='TOLERANCIA',
+                        help="Comparar los cuantiles con los exactos de --entrada y fallar si el "
+                             "error de rango supera la tolerancia (por defecto 0.01)")
+    args = parser.parse_args()
+
+    print("PERFILADOR DE COLUMNAS POR STREAMING")
+    print("=" * 60)
+
+    total = PerfiladorStreaming()
+    fuentes = []
+    if args.fusionar:
+        for ruta in args.fusionar:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            total.fusionar(PerfiladorStreaming.desde_dict(datos))
+            fuentes.extend(datos.get('fuentes', [ruta]))
+            print(f"  - Perfil fusionado: {ruta}")
+    else:
+        for ruta in args.entrada:
+            total.fusionar(perfilar_archivo(ruta, args.tamaño_bloque))
+            fuentes.append(ruta)
+            print(f"  - Dataset perfilado: {ruta}")
+
+    perfil = total.a_dict(fuentes)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(perfil, f, indent=2, ensure_ascii=False)
+
+    for tabla, contenido in perfil['tablas'].items():
+        print(f"\n{tabla.upper()} ({contenido['filas']:,} filas)")
+        for columna, datos in contenido['columnas'].items():
+            resumen = datos['resumen']
+            print(f"  {columna:<18} nulos {resumen['nulos']:>10,} ({resumen['porcentaje_nulos']:5.1f}%)  "
+                  f"distintos≈{resumen['distintos_aprox']:,}")
+
+    print(f"\nPerfil guardado en: {args.salida}")
+
+    if args.verificar_cuantiles is not None:
+        comparacion = verificar_cuantiles(total, args.entrada, args.tamaño_bloque)
+        print("\nCUANTILES T-DIGEST FRENTE A LOS EXACTOS")
+        print(comparacion.to_string(index=False))
+        fuera = comparacion[comparacion['error_rango'] > args.verificar_cuantiles]
+        if len(fuera):
+            print(f"\nERROR: {len(fuera)} cuantiles con error de rango mayor a {args.verificar_cuantiles}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SERVIDOR LOCAL DEL DASHBOARD
+Sirve los KPIs y los agregados de cada panel como JSON, mantiene los datos y
+el cubo en memoria y, cuando cambia el dataset limpio, recalcula solo los
+paneles afectados. La página cliente consulta los cambios cada segundo.
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.offline
+
+dashboard_mod = importlib.import_module('05_dashboard_profesional')
+from esquema_datos import cargar_dataset
+
+TITULOS_PANELES = {
+    'especialidades': 'Especialidades Médicas',
+    'ciudades': 'Distribución por Ciudad',
+    'estados': 'Estados de las Citas',
+    'volumen': 'Volumen de Registros',
+    'edades': 'Distribución de Edades',
+    'costos': 'Costos por Especialidad',
+}
+
+def huella_tabla(df):
+    """Hash del contenido de una tabla, para detectar qué tablas cambiaron"""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+
+def firma_archivo(ruta):
+    """Fecha de modificación y tamaño del archivo (None si no existe)"""
+    try:
+        estado = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+def figura_panel(nombre, datos):
+    """Figura de plotly de un panel, serializada como dict JSON"""
+    figura = go.Figure(data=dashboard_mod.trazas_panel(nombre, datos))
+    figura.update_layout(title=TITULOS_PANELES[nombre], template='plotly_white',
+                         showlegend=False, height=380, margin=dict(t=50, b=40, l=40, r=20))
+    return json.loads(figura.to_json())
+
+class EstadoDashboard:
+    """Datos, cubo y paneles en memoria, con un número de versión por panel"""
+
+    def __init__(self, ruta_original='../datos/dataset_hospital.json',
+                 ruta_limpio='../resultados/dataset_hospital_limpio.json'):
+        self.ruta_original = ruta_original
+        self.ruta_limpio = ruta_limpio
+        self.dashboard = dashboard_mod.DashboardInteractivo()
+        self.bloqueo = threading.Lock()
+        self.version = 0
+        self.kpis = {'version': 0, 'datos': {}}
+        self.paneles = {}
+        self.huellas = {}
+        self.firma = None
+
+    def cargar(self):
+        """Carga inicial: datos, KPIs, cubo y todos los paneles"""
+        self.firma = firma_archivo(self.ruta_limpio)
+        self.dashboard.cargar_datos(self.ruta_original, self.ruta_limpio)
+        self.dashboard.cargar_estadisticas_limpieza()
+        self.huellas = {tabla: huella_tabla(df) for tabla, df in self.dashboard.datos_limpios.items()}
+        self.dashboard.calcular_kpis_principales()
+        self.dashboard.construir_cubo()
+        self.publicar(self.dashboard.agregados_paneles())
+
+    def publicar(self, agregados):
+        """Guarda KPIs y paneles con una versión nueva; solo los que cambiaron"""
+        self.version += 1
+        if self.dashboard.metricas != self.kpis['datos']:
+            self.kpis = {'version': self.version, 'datos': self.dashboard.metricas}
+        cambiados = []
+        for nombre, datos in agregados.items():
+            anterior = self.paneles.get(nombre)
+            if anterior is None or anterior['datos'] != datos:
+                self.paneles[nombre] = {'version': self.version, 'datos': datos,
+                                        'figura': figura_panel(nombre, datos)}
+                cambiados.append(nombre)
+        return cambiados
+
+    def actualizar(self):
+        """Recarga el dataset limpio si cambió y recalcula los paneles afectados"""
+        firma = firma_archivo(self.ruta_limpio)
+        if firma is None or firma == self.firma:
+            return None
+
+        inicio = time.perf_counter()
+        try:
+            pacientes, citas = cargar_dataset(self.ruta_limpio, limpio=True)
+        except (ValueError, KeyError):
+            # Archivo a medio escribir: se reintenta en la siguiente revisión
+            return None
+        self.firma = firma
+
+        tablas = {'pacientes': pacientes, 'citas': citas}
+        huellas = {tabla: huella_tabla(df) for tabla, df in tablas.items()}
+        cambiadas = {tabla for tabla in tablas if huellas[tabla] != self.huellas.get(tabla)}
+        if not cambiadas:
+            return None
+
+        afectados = [nombre for nombre, dependencias
+                     in self.dashboard.DEPENDENCIAS_PANELES.items() if dependencias & cambiadas]
+        with self.bloqueo:
+            self.huellas = huellas
+            self.dashboard.datos_limpios = tablas
+            self.dashboard.calcular_kpis_principales()
+            self.dashboard.construir_cubo(cambiadas)
+            cambiados = self.publicar(self.dashboard.agregados_paneles(afectados))
+
+        print(f"Datos actualizados ({', '.join(sorted(cambiadas))}): "
+              f"paneles recalculados {afectados}, cambiados {cambiados} "
+              f"en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return cambiados
+
+    def cambios_desde(self, version):
+        """KPIs y paneles con versión posterior a la indicada"""
+        with self.bloqueo:
+            respuesta = {
+                'version': self.version,
+                'paneles': {nombre: {'version': panel['version'], 'figura': panel['figura']}
+                            for nombre, panel in self.paneles.items() if panel['version'] > version}
+            }
+            if self.kpis['version'] > version:
+                respuesta['kpis'] = self.kpis['datos']
+        return respuesta
+
+    def vigilar(self, intervalo):
+        """Revisa el dataset limpio cada intervalo segundos (hilo en segundo plano)"""
+        while True:
+            time.sleep(intervalo)
+            try:
+                self.actualizar()
+            except Exception as e:
+                print(f"ERROR al actualizar el dashboard: {e}")
+
+PAGINA = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Dashboard en Vivo - Calidad de Datos</title>
+    <script src="/plotly.min.js"></script>
+    <style>
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #f5f7fa; margin: 20px; }
+        h1 { color: darkblue; text-align: center; }
+        .kpis { display: grid; grid-template-columns: repeat(3, 1fr); gap: 15px; margin-bottom: 20px; }
+        .kpi-card { background: white; border-radius: 10px; padding: 15px; text-align: center; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }
+        .kpi-value { font-size: 2em; font-weight: bold; color: #2c3e50; }
+        .kpi-label { color: #7f8c8d; }
+        .paneles { display: grid; grid-template-columns: repeat(3, 1fr); gap: 15px; }
+        .panel { background: white; border-radius: 10px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }
+        #estado { text-align: center; color: #7f8c8d; font-size: 0.9em; }
+    </style>
+</head>
+<body>
+    <h1>Dashboard de Calidad de Datos Hospitalarios</h1>
+    <div id="estado">Conectando...</div>
+    <div class="kpis" id="kpis"></div>
+    <div class="paneles">PANELES</div>
+    <script>
+        let version = 0;
+
+        function mostrarKpis(kpis) {
+            document.getElementById('kpis').innerHTML = Object.entries(kpis).map(([nombre, valor]) =>
+                `<div class="kpi-card"><div class="kpi-value">${valor.limpio.toFixed(1)}%</div>` +
+                `<div class="kpi-label">${nombre} (original ${valor.original.toFixed(1)}%)</div></div>`
+            ).join('');
+        }
+
+        async function refrescar() {
+            try {
+                const respuesta = await fetch('/api/cambios?desde=' + version);
+                const cambios = await respuesta.json();
+                if (cambios.kpis) mostrarKpis(cambios.kpis);
+                for (const [nombre, panel] of Object.entries(cambios.paneles)) {
+                    Plotly.react(nombre, panel.figura.data, panel.figura.layout);
+                }
+                version = cambios.version;
+                document.getElementById('estado').textContent =
+                    'Versión ' + version + ' - ' + new Date().toLocaleTimeString();
+            } catch (error) {
+                document.getElementById('estado').textContent = 'Sin conexión con el servidor';
+            }
+            setTimeout(refrescar, INTERVALO);
+        }
+        refrescar();
+    </script>
+</body>
+</html>
+"""
+
+class ManejadorDashboard(BaseHTTPRequestHandler):
+    """Rutas: / (página), /plotly.min.js, /api/kpis, /api/paneles, /api/cambios?desde=N"""
+
+    estado = None
+    pagina = b''
+    plotly_js = b''
+
+    def responder(self, cuerpo, tipo, cache=False):
+        self.send_response(200)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.send_header('Cache-Control', 'public, max-age=31536000' if cache else 'no-store')
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def responder_json(self, datos):
+        self.responder(json.dumps(datos, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        estado = self.estado
+        if url.path == '/':
+            self.responder(self.pagina, 'text/html; charset=utf-8')
+        elif url.path == '/plotly.min.js':
+            self.responder(self.plotly_js, 'application/javascript', cache=True)
+        elif url.path == '/api/kpis':
+            with estado.bloqueo:
+                self.responder_json({'version': estado.kpis['version'], 'kpis': estado.kpis['datos']})
+        elif url.path == '/api/paneles':
+            with estado.bloqueo:
+                self.responder_json({
+                    'version': estado.version,
+                    'paneles': {nombre: {'version': panel['version'], 'datos': panel['datos']}
+                                for nombre, panel in estado.paneles.items()}
+                })
+        elif url.path == '/api/cambios':
+            try:
+                desde = int(parse_qs(url.query).get('desde', ['0'])[0])
+            except ValueError:
+                self.send_error(400, "El parámetro desde debe ser un entero")
+                return
+            self.responder_json(estado.cambios_desde(desde))
+        else:
+            self.send_error(404)
+
+    def log_message(self, formato, *args):
+        pass
+
+def servir(estado, puerto=8050, intervalo=0.5, refresco_ms=1000):
+    """Arranca el vigilante del dataset limpio y el servidor HTTP"""
+    divs = ''.join(f'<div class="panel" id="{nombre}"></div>' for nombre in dashboard_mod.POSICIONES_PANELES)
+    ManejadorDashboard.estado = estado
+    ManejadorDashboard.pagina = PAGINA.replace('PANELES', divs).replace('INTERVALO', str(refresco_ms)).encode('utf-8')
+    ManejadorDashboard.plotly_js = plotly.offline.get_plotlyjs().encode('utf-8')
+
+    threading.Thread(target=estado.vigilar, args=(intervalo,), daemon=True).start()
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', puerto), ManejadorDashboard)
+    print(f"Dashboard en vivo: http://127.0.0.1:{puerto}/ (Ctrl+C para detener)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local del dashboard con refresco incremental")
+    parser.add_argument('--puerto', type=int, default=8050, help="Puerto HTTP local")
+    parser.add_argument('--original', default='../datos/dataset_hospital.json',
+                        help="Dataset original (para las comparaciones antes/después)")
+    parser.add_argument('--limpio', default='../resultados/dataset_hospital_limpio.json',
+                        help="Dataset limpio vigilado")
+    parser.add_argument('--intervalo', type=float, default=0.5,
+                        help="Segundos entre revisiones del dataset limpio")
+    parser.add_argument('--refresco-ms', type=int, default=1000,
+                        help="Milisegundos entre consultas de la página cliente")
+    args = parser.parse_args()
+
+    print("INICIANDO SERVIDOR DEL DASHBOARD...")
+    inicio = time.perf_counter()
+    estado = EstadoDashboard(args.original, args.limpio)
+    estado.cargar()
+    print(f"Datos y paneles en memoria en {time.perf_counter() - inicio:.2f} s")
+
+    servir(estado, args.puerto, args.intervalo, args.refresco_ms)
+
+if __name__ == "__main__":
+    main()